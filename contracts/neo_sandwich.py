@@ -1,19 +1,14 @@
-from typing import Any, Union
+from typing import Any, List, Union, cast
 
-from boa3.builtin import NeoMetadata, metadata, public
+from boa3.builtin import CreateNewEvent, NeoMetadata, metadata, public
 from boa3.builtin.contract import Nep17TransferEvent, abort
 from boa3.builtin.interop.blockchain import get_contract
-from boa3.builtin.interop.contract import call_contract, GAS
-from boa3.builtin.interop.runtime import calling_script_hash, check_witness, executing_script_hash, get_notifications, \
-    time
-from boa3.builtin.interop.storage import delete, get, put
+from boa3.builtin.interop.contract import call_contract, update_contract, GAS, NEO
+from boa3.builtin.interop.runtime import calling_script_hash, check_witness, executing_script_hash, time
+from boa3.builtin.interop.storage import delete, find, get, put
 from boa3.builtin.type import UInt160
 
 
-# todo - add option to update the contracts itself (saw some snippet, check it out)
-
-# todo - should claim & swap be on the same call (may be problematic if the claimed amount gets large)
-
 # todo - best way to automate the process of claiming & swapping
 
 
@@ -30,21 +25,74 @@ def manifest_metadata() -> NeoMetadata:
     return meta
 
 
-# bNEO contracts script hash & address
+# bNEO contracts script hash, transferring bNEO to it claims the accumulated GAS
 bNEO = UInt160(0x48C40D4666F93408BE1BEF038B6722404D9A4C2A)
-bNEO_ADDRESS = b"NPmdLGJN47EddqYcxixdGMhtkr7Z5w4Aos"
 
 # flamingo swap router contracts script hash
 FLAMINGO_SWAP_ROUTER = UInt160(0xc4b74578540abd0197391867dd18d60762a4d7bd)  # fixme - this is a test net value!
 
+# smallest GAS amount worth swapping by `harvest`
+MIN_HARVEST_GAS = 1_00000000
+
+# maximum slippage of the `harvest` swap from the router quote, in basis points
+MAX_SLIPPAGE = 50
+SLIPPAGE_DENOMINATOR = 10_000
+
+# time the `harvest` swap stays valid, in milliseconds
+SWAP_DEADLINE = 300_000
+
 # script hash of the contracts owner
 OWNER = UInt160()  # todo - fill
 
-# total supply storage key
-SUPPLY_KEY = "totalSupply"
+# storage key of the supplies record, holding both the total sNEO supply & the total bNEO supply
+SUPPLY_KEY = b"s"
+
+# both supplies are packed in a single integer: burger_supply * SUPPLY_SHIFT + total_supply
+SUPPLY_SHIFT = 18446744073709551616  # 2 ** 64, way above the whole NEO supply with 8 decimals
+
+# added to the supplies record while `harvest` is swapping or a NEO deposit is being wrapped, the bNEO received
+# meanwhile are credited by them instead of being minted as a deposit
+CREDITING_FLAG = 340282366920938463463374607431768211456  # 2 ** 128
+
+# storage prefix of the accounts balances
+BALANCE_PREFIX = b"b"
+
+# storage key of the number of ratio checkpoints ever written
+RATIO_CHECKPOINTS_KEY = b"c"
+
+# storage prefix of the ratio checkpoints ring buffer, each slot holding share ratio * SUPPLY_SHIFT + timestamp, the
+# timestamp is bounded but the share ratio isn't, e.g. a few sNEO left after a big harvest
+RATIO_CHECKPOINT_PREFIX = b"r"
+
+# number of slots of the ratio checkpoints ring buffer, the oldest checkpoint is overwritten once it's full
+RATIO_CHECKPOINTS = 256
+
+# storage key of the withdrawal queue, holding both the first request to settle & the next request id, packed as the
+# supplies record: next_request * SUPPLY_SHIFT + first_request
+WITHDRAWAL_QUEUE_KEY = b"w"
+
+# storage prefix of the queued withdrawals, the account followed by its bNEO amount, by request id
+WITHDRAWAL_PREFIX = b"q"
+
+# storage prefix of the settled withdrawals owed to smart contracts, by account, paid by `claimWithdrawal`
+WITHDRAWAL_CREDIT_PREFIX = b"p"
+
+# storage key of the layout version the storage was written with, see `update`
+STORAGE_VERSION_KEY = b"v"
 
-# total bNEO supply storage key
-BURGER_SUPPLY_KEY = "burgerSupply"
+# layout version written by this code. An update changing the layout bumps it, converts the single records in
+# `_deploy` and the balances in `migrate_balance`, on the first touch of each account, never in a bulk pass
+STORAGE_VERSION = 0
+
+# the balance records are tagged as the supplies record: layout version * SUPPLY_SHIFT + balance, so a record tells the
+# layout it was written with, the version 0 records being the plain balance
+BALANCE_VERSION = STORAGE_VERSION * SUPPLY_SHIFT
+
+# `holders` enumerates the balances bucket by bucket, a bucket holding the accounts that share their first byte
+HOLDERS_BUCKETS = 256
+# a `holders` cursor is bucket * HOLDERS_CURSOR_SHIFT + the number of accounts to skip in the bucket
+HOLDERS_CURSOR_SHIFT = 4294967296  # 2 ** 32
+MAX_HOLDERS_PAGE = 100
 
 # token symbol
 TOKEN_SYMBOL = "sNEO"
@@ -52,6 +100,45 @@ TOKEN_SYMBOL = "sNEO"
 # number of decimal places
 TOKEN_DECIMALS = 8
 
+# the share ratio is the bNEO per sNEO multiplied by RATIO_PRECISION, i.e. with TOKEN_DECIMALS decimal places
+RATIO_PRECISION = 100_000_000
+
+
+# the pool events carry both supplies after the operation, so the ratio history can be built from them alone.
+# They're fired before any onPayment call, keeping the events in the order of the supplies changes
+on_deposit = CreateNewEvent(
+    [
+        ('from_address', UInt160),
+        ('account', UInt160),
+        ('burger_amount', int),
+        ('sandwich_amount', int),
+        ('total_supply', int),
+        ('burger_supply', int),
+    ],
+    'Deposit'
+)
+
+on_withdraw = CreateNewEvent(
+    [
+        ('account', UInt160),
+        ('burger_amount', int),
+        ('sandwich_amount', int),
+        ('total_supply', int),
+        ('burger_supply', int),
+    ],
+    'Withdraw'
+)
+
+on_harvest = CreateNewEvent(
+    [
+        ('gas_amount', int),
+        ('burger_amount', int),
+        ('total_supply', int),
+        ('burger_supply', int),
+    ],
+    'Harvest'
+)
+
 
 @public
 def deploy() -> bool:
@@ -67,15 +154,64 @@ def deploy() -> bool:
     if not check_witness(OWNER):
         return False
 
-    if get(SUPPLY_KEY).to_int() > 0:
+    if totalSupply() > 0:
         return False
 
-    put(SUPPLY_KEY, 0)
+    # bNEO may be left once every holder burned, e.g. a harvest after the last burn, it stays in the pool
+    put_supplies(0, burgerSupply())
+    put(STORAGE_VERSION_KEY, STORAGE_VERSION)
     Nep17TransferEvent(None, OWNER, 0)
 
     return True
 
 
+@public
+def _deploy(data: Any, updated: bool):
+    """
+    Called by ContractManagement once the contracts is deployed or updated.
+    After an update, converts the single records to the current layout version. The balances aren't converted here,
+    see `get_balance`.
+
+    :param data: the `update` data
+    :type data: Any
+    :param updated: whether the contracts was updated
+    :type updated: bool
+    """
+    if updated:
+        version = get(STORAGE_VERSION_KEY).to_int()
+        if version != STORAGE_VERSION:
+            # convert the single records written by the older layout versions here
+            put(STORAGE_VERSION_KEY, STORAGE_VERSION)
+
+
+@public
+def update(nef_file: bytes, manifest: bytes, data: Any):
+    """
+    Updates the contracts script & manifest, keeping its script hash & storage, so the holders don't need to move.
+    Only the owner can update.
+
+    :param nef_file: the new compiled contracts
+    :type nef_file: bytes
+    :param manifest: the new manifest
+    :type manifest: bytes
+    :param data: passed to the new contracts `_deploy`
+    :type data: Any
+    """
+    if not check_witness(OWNER):
+        abort()
+
+    update_contract(nef_file, manifest, data)
+
+
+@public(safe=True)
+def storageVersion() -> int:
+    """
+    Gets the layout version of the storage.
+    :return: the version, the balances of other versions being converted on the first touch of each account
+    """
+    return get(STORAGE_VERSION_KEY).to_int()
+
+
 @public
 def symbol() -> str:
     """
@@ -101,7 +237,7 @@ def totalSupply() -> int:
     Gets the total sNEO token supply.
     :return: the total token supply deployed in the system
     """
-    return get(SUPPLY_KEY).to_int()
+    return get(SUPPLY_KEY).to_int() % SUPPLY_SHIFT
 
 
 @public
@@ -110,7 +246,7 @@ def burgerSupply() -> int:
     Gets the total bNEO token supply held by the contracts
     :return: the total bNEO tokens the contracts has
     """
-    return get(BURGER_SUPPLY_KEY).to_int()
+    return get(SUPPLY_KEY).to_int() // SUPPLY_SHIFT % SUPPLY_SHIFT
 
 
 @public
@@ -122,7 +258,254 @@ def balanceOf(account: UInt160) -> int:
     :type account: UInt160
     """
     assert len(account) == 20
-    return get(account).to_int()
+    return get_balance(BALANCE_PREFIX + account)
+
+
+@public(safe=True)
+def getState() -> List[int]:
+    """
+    Gets the whole pool state in a single call.
+    :return: [total sNEO supply, total bNEO supply, share ratio, decimals], the share ratio being the bNEO per sNEO
+    multiplied by RATIO_PRECISION
+    """
+    supplies = get_supplies()
+    return [supplies[0], supplies[1], share_ratio(supplies[0], supplies[1]), TOKEN_DECIMALS]
+
+
+@public(safe=True)
+def ratioAt(timestamp: int) -> int:
+    """
+    Gets the share ratio at a past time, binary searching the ratio checkpoints.
+    :param timestamp: the time, in milliseconds
+    :type timestamp: int
+    :return: the share ratio of the last checkpoint at or before `timestamp`, or 0 if `timestamp` is older than the
+    oldest kept checkpoint
+    """
+    checkpoints = get(RATIO_CHECKPOINTS_KEY).to_int()
+    oldest = checkpoints - RATIO_CHECKPOINTS
+    if oldest < 0:
+        oldest = 0
+
+    # finds the first checkpoint after `timestamp`
+    low = oldest
+    high = checkpoints
+    while low < high:
+        middle = (low + high) // 2
+        if get_ratio_checkpoint(middle) % SUPPLY_SHIFT <= timestamp:
+            low = middle + 1
+        else:
+            high = middle
+
+    if low == oldest:
+        return 0
+    return get_ratio_checkpoint(low - 1) // SUPPLY_SHIFT
+
+
+@public(safe=True)
+def ratioCheckpoints() -> List[List[int]]:
+    """
+    Gets the kept ratio checkpoints.
+    :return: the [timestamp, share ratio] checkpoints, oldest first
+    """
+    checkpoints = get(RATIO_CHECKPOINTS_KEY).to_int()
+    index = checkpoints - RATIO_CHECKPOINTS
+    if index < 0:
+        index = 0
+
+    result: List[List[int]] = []
+    while index < checkpoints:
+        checkpoint = get_ratio_checkpoint(index)
+        result.append([checkpoint % SUPPLY_SHIFT, checkpoint // SUPPLY_SHIFT])
+        index += 1
+    return result
+
+
+@public(safe=True)
+def balancesOf(accounts: List[UInt160]) -> List[int]:
+    """
+    Gets the current balances of many addresses in a single call.
+    :param accounts: the accounts addresses to retrieve the balances for
+    :type accounts: List[UInt160]
+    :return: the balances, in the `accounts` order
+    :raise AssertionError: raised if any account length is not 20
+    """
+    balances: List[int] = []
+    for account in accounts:
+        assert len(account) == 20
+        balances.append(get_balance(BALANCE_PREFIX + account))
+    return balances
+
+
+@public(safe=True)
+def holders(cursor: int, limit: int) -> List[Any]:
+    """
+    Enumerates the sNEO holders, page by page.
+
+    The balances are iterated with `storage.find` one bucket at a time. A find can't start after a given key, so
+    resuming a page iterates again the entries of its bucket before the cursor: a call costs O(limit + the holders of
+    a bucket, about holders / HOLDERS_BUCKETS), plus a find per crossed bucket.
+    :param cursor: 0 for the first page, then the cursor returned by the previous page
+    :type cursor: int
+    :param limit: the maximum number of holders in the page, at most MAX_HOLDERS_PAGE
+    :type limit: int
+    :return: [[[account, balance], ...], next page cursor], the cursor being -1 once all the holders were returned
+    :raise AssertionError: raised if `cursor` is negative or `limit` is out of bounds
+    """
+    assert cursor >= 0
+    assert 0 < limit <= MAX_HOLDERS_PAGE
+
+    page: List[List[Any]] = []
+    bucket = cursor // HOLDERS_CURSOR_SHIFT
+    skip = cursor % HOLDERS_CURSOR_SHIFT
+    while bucket < HOLDERS_BUCKETS:
+        # bucket + 256 converts to 2 little endian bytes, the first one being the bucket byte
+        balances = find(BALANCE_PREFIX + (bucket + 256).to_bytes()[0:1])
+        position = 0
+        while balances.next():
+            if position >= skip:
+                if len(page) == limit:
+                    return [page, bucket * HOLDERS_CURSOR_SHIFT + position]
+
+                entry = cast(List[bytes], balances.value)
+                page.append([entry[0][len(BALANCE_PREFIX):], balance_from_record(entry[1].to_int())])
+            position += 1
+
+        bucket += 1
+        skip = 0
+
+    return [page, -1]
+
+
+def get_supplies() -> List[int]:
+    """
+    Reads both supplies with a single storage access.
+
+    :return: [total sNEO supply, total bNEO supply, whether incoming bNEO are being credited by the caller]
+    """
+    supplies_record = get(SUPPLY_KEY).to_int()
+    return [
+        supplies_record % SUPPLY_SHIFT,
+        supplies_record // SUPPLY_SHIFT % SUPPLY_SHIFT,
+        supplies_record // CREDITING_FLAG,
+    ]
+
+
+def put_supplies(total_supply: int, burger_supply: int):
+    """
+    Writes both supplies with a single storage access.
+
+    :param total_supply: the total sNEO supply
+    :type total_supply: int
+    :param burger_supply: the total bNEO supply held by the contracts
+    :type burger_supply: int
+    """
+    put(SUPPLY_KEY, burger_supply * SUPPLY_SHIFT + total_supply)
+
+
+def get_balance(account_key: bytes) -> int:
+    """
+    Reads an account balance, whatever the layout version its record was written with.
+    The record is converted to the current layout by the next `put_balance` of the account, so an update changing the
+    layout never needs a migration pass over all the holders.
+
+    :param account_key: the account balance storage key
+    :type account_key: bytes
+    :return: the account balance
+    """
+    return balance_from_record(get(account_key).to_int())
+
+
+def balance_from_record(record: int) -> int:
+    """
+    Reads a balance record, passing the records of another layout version through `migrate_balance`.
+
+    :param record: the stored record, see STORAGE_VERSION
+    :type record: int
+    :return: the balance
+    """
+    version = record // SUPPLY_SHIFT
+    if version != STORAGE_VERSION:
+        return migrate_balance(version, record % SUPPLY_SHIFT)
+    return record % SUPPLY_SHIFT
+
+
+def migrate_balance(version: int, value: int) -> int:
+    """
+    Migration hook of the balances, converts the value of a balance record written by another layout version.
+
+    :param version: the layout version of the record
+    :type version: int
+    :param value: the record without its version
+    :type value: int
+    :return: the balance
+    """
+    # every layout so far stores the plain balance, convert the values of a new layout here
+    return value
+
+
+def put_balance(account_key: bytes, balance: int):
+    """
+    Writes an account balance with the current layout version, deleting the record of empty balances.
+
+    :param account_key: the account balance storage key
+    :type account_key: bytes
+    :param balance: the new account balance
+    :type balance: int
+    """
+    if balance == 0:
+        delete(account_key)
+    else:
+        put(account_key, BALANCE_VERSION + balance)
+
+
+def share_ratio(total_supply: int, burger_supply: int) -> int:
+    """
+    :return: the bNEO per sNEO multiplied by RATIO_PRECISION
+    """
+    if total_supply > 0:
+        return burger_supply * RATIO_PRECISION // total_supply
+    # the first deposit mints 1 sNEO per bNEO
+    return RATIO_PRECISION
+
+
+def ratio_checkpoint_key(index: int) -> bytes:
+    """
+    :return: the storage key of the ring buffer slot of the `index`th checkpoint
+    """
+    return RATIO_CHECKPOINT_PREFIX + (index % RATIO_CHECKPOINTS).to_bytes()
+
+
+def get_ratio_checkpoint(index: int) -> int:
+    """
+    :return: the packed checkpoint, share ratio * SUPPLY_SHIFT + timestamp
+    """
+    return get(ratio_checkpoint_key(index)).to_int()
+
+
+def checkpoint_ratio(total_supply: int, burger_supply: int):
+    """
+    Writes the share ratio to the checkpoints ring buffer, nothing is written while the ratio doesn't change, and a
+    single checkpoint is kept per block.
+
+    :param total_supply: the total sNEO supply
+    :type total_supply: int
+    :param burger_supply: the total bNEO supply held by the contracts
+    :type burger_supply: int
+    """
+    assert time < SUPPLY_SHIFT
+    ratio = share_ratio(total_supply, burger_supply)
+    checkpoints = get(RATIO_CHECKPOINTS_KEY).to_int()
+
+    if checkpoints > 0:
+        last_checkpoint = get_ratio_checkpoint(checkpoints - 1)
+        if last_checkpoint // SUPPLY_SHIFT == ratio:
+            return
+        if last_checkpoint % SUPPLY_SHIFT == time:
+            put(ratio_checkpoint_key(checkpoints - 1), ratio * SUPPLY_SHIFT + time)
+            return
+
+    put(ratio_checkpoint_key(checkpoints), ratio * SUPPLY_SHIFT + time)
+    put(RATIO_CHECKPOINTS_KEY, checkpoints + 1)
 
 
 @public
@@ -158,36 +541,91 @@ def transfer(from_address: UInt160, to_address: UInt160, amount: int, data: Any)
     assert len(from_address) == 20 and len(to_address) == 20
     assert amount >= 0
 
-    # The function MUST return false if the from account balance does not have enough tokens to spend.
-    from_balance = get(from_address).to_int()
-    if from_balance < amount:
-        return False
-
+    # the witness is checked before any storage access, so the unauthorized calls don't pay for it
     if from_address != calling_script_hash:
         if not check_witness(from_address):
             return False
 
-    if from_address != to_address and amount != 0:
-        if from_balance == amount:
-            delete(from_address)
-        else:
-            put(from_address, from_balance - amount)
+    # a zero amount never exceeds the balance & a self transfer doesn't change it, only the other ones touch storage
+    if amount != 0:
+        # The function MUST return false if the from account balance does not have enough tokens to spend.
+        from_key = BALANCE_PREFIX + from_address
+        from_balance = get_balance(from_key)
+        if from_balance < amount:
+            return False
+
+        if from_address != to_address:
+            put_balance(from_key, from_balance - amount)
 
-        to_balance = get(to_address).to_int()
-        put(to_address, to_balance + amount)
+            to_key = BALANCE_PREFIX + to_address
+            put_balance(to_key, get_balance(to_key) + amount)
 
     # if the method succeeds, it must fire the transfer event
     Nep17TransferEvent(from_address, to_address, amount)
-    # if the to_address is a smart contracts, it must call the contracts onPayment
-    post_transfer(from_address, to_address, amount, data, True)
+    # if the to_address is a smart contracts, it must call the contracts onPayment, even for zero & self transfers
+    post_transfer(from_address, to_address, amount, data)
 
     return True
 
 
-def post_transfer(
-        from_address: Union[UInt160, None], to_address: Union[UInt160, None], amount: int, data: Any,
-        call_onPayment: bool
-):
+@public
+def transferMany(from_address: UInt160, transfers: List[List[Any]]) -> bool:
+    """
+    Transfers sNEO tokens from one account to many, as if `transfer` was called once per entry.
+
+    The witness is checked once and the sender balance is read & written once for the whole batch, but the `Transfer`
+    event is fired and the receiver's onPayment is called for every entry.
+    Either all of the transfers succeed or none of them does.
+    :param from_address: the address to transfer from
+    :type from_address: UInt160
+    :param transfers: list of [to_address, amount, data] entries
+    :type transfers: List[List[Any]]
+    :return: whether the transfers were successful
+    :raise AssertionError: raised if `from_address` or any `to_address` length is not 20 or if any `amount` is less
+    than zero.
+    """
+    assert len(from_address) == 20
+
+    if from_address != calling_script_hash:
+        if not check_witness(from_address):
+            return False
+
+    from_key = BALANCE_PREFIX + from_address
+    from_balance = get_balance(from_key)
+    spent_amount = 0
+    for entry in transfers:
+        to_address = cast(UInt160, entry[0])
+        amount = cast(int, entry[1])
+        assert len(to_address) == 20
+        assert amount >= 0
+
+        # each entry must be valid on its own, same as a single transfer
+        if from_balance < amount:
+            return False
+        if from_address != to_address:
+            spent_amount += amount
+
+    if from_balance < spent_amount:
+        return False
+
+    if spent_amount != 0:
+        put_balance(from_key, from_balance - spent_amount)
+
+    for entry in transfers:
+        to_address = cast(UInt160, entry[0])
+        amount = cast(int, entry[1])
+
+        if from_address != to_address and amount != 0:
+            to_key = BALANCE_PREFIX + to_address
+            put_balance(to_key, get_balance(to_key) + amount)
+
+        Nep17TransferEvent(from_address, to_address, amount)
+        post_transfer(from_address, to_address, amount, entry[2])
+
+    return True
+
+
+def post_transfer(from_address: Union[UInt160, None], to_address: UInt160, amount: int, data: Any):
     """
     Checks if the one receiving NEP17 tokens is a smart contracts and if it's one the onPayment method will be called.
 
@@ -199,36 +637,32 @@ def post_transfer(
     :type amount: int
     :param data: any pertinent data that might validate the transaction
     :type data: Any
-    :param call_onPayment: whether onPayment should be called or not
-    :type call_onPayment: bool
     """
-    if call_onPayment:
-        if not isinstance(to_address, None):  # TODO: change to 'is not None' when `is` semantic is implemented
-            contract = get_contract(to_address)
-            if not isinstance(contract, None):  # TODO: change to 'is not None' when `is` semantic is implemented
-                call_contract(to_address, "onNEP17Payment", [from_address, amount, data])
+    contract = get_contract(to_address)
+    if not isinstance(contract, None):  # TODO: change to 'is not None' when `is` semantic is implemented
+        call_contract(to_address, "onNEP17Payment", [from_address, amount, data])
 
 
-def mint(account: UInt160, amount: int):
+def mint(account: UInt160, amount: int, data: Any):
     """
     Mints new sNEO tokens.
+    The caller is responsible for updating the supplies record.
 
-    :param account: the address of the account that is sending cryptocurrency to this contracts
+    :param account: the address of the account receiving the minted sNEO
     :type account: UInt160
-    :param amount: the amount of gas to be refunded
+    :param amount: the amount of sNEO to mint
     :type amount: int
+    :param data: the data passed to the account's onPayment, if it's a smart contracts
+    :type data: Any
     :raise AssertionError: raised if amount is less than than 0
     """
     assert amount > 0
 
-    current_total_supply = totalSupply()
-    account_balance = balanceOf(account)
-
-    put(SUPPLY_KEY, current_total_supply + amount)
-    put(account, account_balance + amount)
+    account_key = BALANCE_PREFIX + account
+    put_balance(account_key, get_balance(account_key) + amount)
 
     Nep17TransferEvent(None, account, amount)
-    post_transfer(None, account, amount, None, True)
+    post_transfer(None, account, amount, data)
 
 
 @public
@@ -247,23 +681,179 @@ def burn(account: UInt160, amount: int):
     assert amount > 0
 
     if check_witness(account):
-        initial_total_supply = totalSupply()
-        account_balance = balanceOf(account)
+        burgers_to_transfer = burn_sandwiches(account, amount)
+        call_contract(bNEO, "transfer", [executing_script_hash, account, burgers_to_transfer, None])
+
+
+def burn_sandwiches(account: UInt160, amount: int) -> int:
+    """
+    Burns sNEO tokens, taking their share of bNEO out of the pool.
+    The caller is responsible for checking the witness & paying the bNEO.
+
+    :param account: the address of the account that is pulling out cryptocurrency of this contracts
+    :type account: UInt160
+    :param amount: the amount of sNEO to burn
+    :type amount: int
+    :return: the bNEO share of the burned sNEO
+    :raise AssertionError: raised if the account doesn't have enough sNEO to burn
+    """
+    supplies = get_supplies()
+    initial_total_supply = supplies[0]
+    initial_burger_supply = supplies[1]
+
+    account_key = BALANCE_PREFIX + account
+    account_balance = get_balance(account_key)
+
+    assert account_balance >= amount
+
+    burgers_to_transfer = amount * initial_burger_supply // initial_total_supply
+    put_supplies(initial_total_supply - amount, initial_burger_supply - burgers_to_transfer)
+    checkpoint_ratio(initial_total_supply - amount, initial_burger_supply - burgers_to_transfer)
+
+    put_balance(account_key, account_balance - amount)
+
+    Nep17TransferEvent(account, None, amount)
+    on_withdraw(account, burgers_to_transfer, amount, initial_total_supply - amount,
+                initial_burger_supply - burgers_to_transfer)
+    return burgers_to_transfer
+
+
+@public
+def requestWithdraw(account: UInt160, amount: int) -> int:
+    """
+    Burns sNEO tokens right away, queuing their bNEO to be paid by `settleWithdrawals`.
+
+    The bNEO amount is locked at the current ratio and leaves the pool immediately, so the yield harvested while the
+    request is queued goes to the remaining holders only.
+
+    :param account: the address of the account that is pulling out cryptocurrency of this contracts
+    :type account: UInt160
+    :param amount: the amount of sNEO to burn
+    :type amount: int
+    :return: the withdrawal request id
+    :raise AssertionError: raised if `account` length is not 20, amount is less than than 0 or the account doesn't have
+    enough sNEO to burn
+    """
+    assert len(account) == 20
+    assert amount > 0
+
+    if not check_witness(account):
+        abort()
+
+    burgers_to_transfer = burn_sandwiches(account, amount)
 
-        assert account_balance >= amount
+    queue = get(WITHDRAWAL_QUEUE_KEY).to_int()
+    request_id = queue // SUPPLY_SHIFT
+    put(WITHDRAWAL_PREFIX + request_id.to_bytes(), account + burgers_to_transfer.to_bytes())
+    put(WITHDRAWAL_QUEUE_KEY, queue + SUPPLY_SHIFT)
 
-        put(SUPPLY_KEY, initial_total_supply - amount)
+    return request_id
 
-        if account_balance == amount:
-            delete(account)
+
+@public
+def settleWithdrawals(max_requests: int) -> int:
+    """
+    Pays out the queued withdrawals, oldest first, in a single invocation.
+    Anyone can settle, the bNEO are always paid to the accounts that requested them.
+    The smart contracts accounts are credited instead of paid, their onNEP17Payment could abort & block the whole
+    queue, they pull their bNEO with `claimWithdrawal`.
+
+    :param max_requests: the maximum number of requests to settle
+    :type max_requests: int
+    :return: the number of settled requests
+    :raise AssertionError: raised if `max_requests` is less than 1 or if a bNEO payment fails
+    """
+    assert max_requests > 0
+
+    queue = get(WITHDRAWAL_QUEUE_KEY).to_int()
+    first_request = queue % SUPPLY_SHIFT
+    next_request = queue // SUPPLY_SHIFT
+
+    last_request = first_request + max_requests
+    if last_request > next_request:
+        last_request = next_request
+
+    # the queue is advanced before paying, so a receiver's onNEP17Payment can't settle the same requests again
+    put(WITHDRAWAL_QUEUE_KEY, next_request * SUPPLY_SHIFT + last_request)
+
+    request_id = first_request
+    while request_id < last_request:
+        request_key = WITHDRAWAL_PREFIX + request_id.to_bytes()
+        request = get(request_key)
+        delete(request_key)
+
+        account = UInt160(request[0:20])
+        burgers_to_transfer = request[20:].to_int()
+        if isinstance(get_contract(account), None):
+            assert cast(bool, call_contract(bNEO, "transfer", [executing_script_hash, account, burgers_to_transfer,
+                                                               None]))
         else:
-            put(account, account_balance - amount)
+            credit_key = WITHDRAWAL_CREDIT_PREFIX + account
+            put(credit_key, get(credit_key).to_int() + burgers_to_transfer)
+        request_id += 1
 
-        Nep17TransferEvent(account, None, amount)
+    return last_request - first_request
 
-        burgers_to_transfer = amount * burgerSupply() // initial_total_supply
 
-        call_contract(bNEO, "transfer", [executing_script_hash, account, burgers_to_transfer, None])
+@public(safe=True)
+def withdrawalQueue() -> List[int]:
+    """
+    Gets the withdrawal queue bounds.
+    :return: [first request to settle, next request id], the queue is empty when both are equal
+    """
+    queue = get(WITHDRAWAL_QUEUE_KEY).to_int()
+    return [queue % SUPPLY_SHIFT, queue // SUPPLY_SHIFT]
+
+
+@public(safe=True)
+def getWithdrawal(request_id: int) -> List[Any]:
+    """
+    Gets a queued withdrawal.
+    :param request_id: the id returned by `requestWithdraw`
+    :type request_id: int
+    :return: [account, bNEO amount], or an empty list if the request was settled or doesn't exist
+    """
+    request = get(WITHDRAWAL_PREFIX + request_id.to_bytes())
+    if len(request) == 0:
+        return []
+    return [UInt160(request[0:20]), request[20:].to_int()]
+
+
+@public
+def claimWithdrawal(account: UInt160) -> int:
+    """
+    Pays the settled withdrawals credited to a smart contracts account.
+
+    :param account: the credited account, it must be the caller or sign
+    :type account: UInt160
+    :return: the amount of bNEO paid
+    :raise AssertionError: raised if `account` length is not 20 or if the bNEO payment fails
+    """
+    assert len(account) == 20
+
+    if not check_witness(account):
+        abort()
+
+    credit_key = WITHDRAWAL_CREDIT_PREFIX + account
+    burgers_to_transfer = get(credit_key).to_int()
+    if burgers_to_transfer == 0:
+        return 0
+
+    # the credit is cleared before paying, so the receiver's onNEP17Payment can't claim it again
+    delete(credit_key)
+    assert cast(bool, call_contract(bNEO, "transfer", [executing_script_hash, account, burgers_to_transfer, None]))
+    return burgers_to_transfer
+
+
+@public(safe=True)
+def withdrawalCredit(account: UInt160) -> int:
+    """
+    Gets the settled withdrawals bNEO waiting for `claimWithdrawal`.
+    :param account: the credited account
+    :type account: UInt160
+    :return: the amount of bNEO owed to `account`
+    """
+    return get(WITHDRAWAL_CREDIT_PREFIX + account).to_int()
 
 
 @public
@@ -271,62 +861,136 @@ def claim_gas():
     """
     Claims GAS from the bNEO tokens that held in the smart contracts.
     """
-    call_contract(bNEO, "transfer", [executing_script_hash, bNEO_ADDRESS, 0, None])
-
-
-# todo - convert_gas cannot be compiled
-# @public
-# def convert_gas(amount: int):
-#     """
-#     Converts amount of GAS to bNEO from the contracts GAS balance using FlamingoFinance.
-#
-#     NOTE - This is the method that causes the ratio to increase!
-#     """
-#     if not check_witness(OWNER):
-#         abort()
-#
-#     # todo - is there a way to make it replaceable in-case of Flamingo changing contracts?
-#     reserves = call_contract(FLAMINGO_SWAP_ROUTER, "GetReserves", [bNEO, GAS])
-#
-#     burger_price = (reserves[0] // 100_000_000) // (reserves[1] // 100_000_000)
-#     amount_out_min = amount * burger_price * 0.995
-#
-#     deadline = time + 300  # 5 minutes
-#
-#     # todo - transfer GAS?
-#
-#     call_contract(
-#         FLAMINGO_SWAP_ROUTER,
-#         "SwapTokenInForTokenOut",
-#         [executing_script_hash, amount, amount_out_min, [bNEO, GAS], deadline],
-#     )
-#
-#     events = get_notifications(FLAMINGO_SWAP_ROUTER)
-#     swap_event = events[-1]  # todo - verify correct index/method & verify.
-#
-#     # todo - fetch the event to know how many bNEO were claimed
-#
-#     # todo - update the total bNEO supply (increase it with the fetched amount)
+    call_contract(bNEO, "transfer", [executing_script_hash, bNEO, 0, None])
+
+
+@public
+def harvest(min_burgers_out: int) -> int:
+    """
+    Compounds the yield in a single invocation: claims the GAS generated by the held bNEO, swaps it to bNEO using
+    Flamingo and adds the bought bNEO to the pool.
+
+    NOTE - This is the method that causes the ratio to increase!
+    The swap is skipped while the GAS balance is below MIN_HARVEST_GAS, the GAS is kept for the next harvest.
+    The contracts itself must be one of the transaction signers (see `verify`), so the router can pull the GAS.
+
+    :param min_burgers_out: the minimum bNEO the swap must return, on top of the MAX_SLIPPAGE bound from the router
+    quote
+    :type min_burgers_out: int
+    :return: the amount of bNEO added to the pool
+    :raise AssertionError: raised if the swap returned less than the minimum bNEO
+    """
+    if not check_witness(OWNER):
+        abort()
+
+    claim_gas()
+
+    gas_amount = cast(int, call_contract(GAS, "balanceOf", [executing_script_hash]))
+    if gas_amount < MIN_HARVEST_GAS:
+        return 0
+
+    swap_path = [GAS, bNEO]
+    quote = cast(List[int], call_contract(FLAMINGO_SWAP_ROUTER, "getAmountsOut", [gas_amount, swap_path]))
+    amount_out_min = quote[1] * (SLIPPAGE_DENOMINATOR - MAX_SLIPPAGE) // SLIPPAGE_DENOMINATOR
+    if amount_out_min < min_burgers_out:
+        amount_out_min = min_burgers_out
+
+    burgers_before = cast(int, call_contract(bNEO, "balanceOf", [executing_script_hash]))
+    supplies = get_supplies()
+
+    # the bought bNEO are sent to onNEP17Payment, flag them as yield so they aren't minted as a deposit
+    put(SUPPLY_KEY, supplies[1] * SUPPLY_SHIFT + supplies[0] + CREDITING_FLAG)
+    call_contract(
+        FLAMINGO_SWAP_ROUTER,
+        "swapTokenInForTokenOut",
+        [executing_script_hash, gas_amount, amount_out_min, swap_path, time + SWAP_DEADLINE],
+    )
+
+    burgers_out = cast(int, call_contract(bNEO, "balanceOf", [executing_script_hash])) - burgers_before
+    assert burgers_out >= amount_out_min
+
+    put_supplies(supplies[0], supplies[1] + burgers_out)
+    checkpoint_ratio(supplies[0], supplies[1] + burgers_out)
+    on_harvest(gas_amount, burgers_out, supplies[0], supplies[1] + burgers_out)
+    return burgers_out
 
 
 @public
 def onNEP17Payment(from_address: UInt160, amount: int, data: Any):
     """
     When this smart contracts receives bNEO, it will mint sNEO using the current ratio.
-    Other assets than bNEO will revert the transaction
+    NEO is wrapped into bNEO by the bNEO contracts first, then minted the same way, in the same invocation.
+    GAS is accepted without minting, it is the yield waiting for `harvest`.
+    Other assets will revert the transaction
 
     :param from_address: the address of the one who is trying to send cryptocurrency to this smart contracts
     :type from_address: UInt160
     :param amount: the amount of cryptocurrency that is being sent to the this smart contracts
     :type amount: int
-    :param data: any pertinent data that might validate the transaction
+    :param data: where to deliver the minted sNEO: None to mint to `from_address`, a beneficiary address, or a
+    [beneficiary, forwarding data] list, the forwarding data being passed to the beneficiary's onPayment
     :type data: Any
+    :raise AssertionError: raised if the beneficiary length is not 20
     """
     if calling_script_hash == bNEO:
-        if get(SUPPLY_KEY).to_int() > 0:
-            sandwiches_to_mint = amount * totalSupply() // burgerSupply()
-            mint(from_address, sandwiches_to_mint)
-        else:
-            mint(from_address, amount)
+        supplies = get_supplies()
+        if supplies[2] != 0:
+            # bNEO bought by `harvest` or wrapped from a NEO deposit, which credit them to the pool
+            return
+
+        mint_deposit(from_address, amount, data, supplies[0], supplies[1])
+    elif calling_script_hash == NEO:
+        supplies = get_supplies()
+        burgers_before = cast(int, call_contract(bNEO, "balanceOf", [executing_script_hash]))
+
+        # transferring NEO to bNEO mints bNEO to this contracts, flag them so they aren't minted as a bNEO deposit
+        put(SUPPLY_KEY, supplies[1] * SUPPLY_SHIFT + supplies[0] + CREDITING_FLAG)
+        call_contract(NEO, "transfer", [executing_script_hash, bNEO, amount, None])
+
+        # the deposit is whatever bNEO were minted for the NEO
+        burgers_in = cast(int, call_contract(bNEO, "balanceOf", [executing_script_hash])) - burgers_before
+        mint_deposit(from_address, burgers_in, data, supplies[0], supplies[1])
+    elif calling_script_hash == GAS:
+        # GAS claimed from bNEO, waiting to be harvested
+        pass
     else:
         abort()
+
+
+def mint_deposit(from_address: UInt160, amount: int, data: Any, total_supply: int, burger_supply: int):
+    """
+    Mints sNEO for a bNEO deposit using the current ratio, adding the bNEO to the pool.
+
+    :param from_address: the address of the depositor
+    :type from_address: UInt160
+    :param amount: the amount of deposited bNEO
+    :type amount: int
+    :param data: where to deliver the minted sNEO, see `onNEP17Payment`
+    :type data: Any
+    :param total_supply: the total sNEO supply before the deposit
+    :type total_supply: int
+    :param burger_supply: the total bNEO supply before the deposit
+    :type burger_supply: int
+    :raise AssertionError: raised if the beneficiary length is not 20
+    """
+    if total_supply > 0:
+        sandwiches_to_mint = amount * total_supply // burger_supply
+    else:
+        sandwiches_to_mint = amount
+
+    beneficiary = from_address
+    forwarding_data: Any = None
+    if isinstance(data, list):
+        route = cast(List[Any], data)
+        assert len(route) == 2
+        beneficiary = cast(UInt160, route[0])
+        forwarding_data = route[1]
+    elif not isinstance(data, None):  # TODO: change to 'is not None' when `is` semantic is implemented
+        beneficiary = cast(UInt160, data)
+    assert len(beneficiary) == 20
+
+    put_supplies(total_supply + sandwiches_to_mint, burger_supply + amount)
+    checkpoint_ratio(total_supply + sandwiches_to_mint, burger_supply + amount)
+    on_deposit(from_address, beneficiary, amount, sandwiches_to_mint, total_supply + sandwiches_to_mint,
+               burger_supply + amount)
+    mint(beneficiary, sandwiches_to_mint, forwarding_data)
@@ -0,0 +1,140 @@
+"""
+Client of the sNEO contracts, wrapping its read methods.
+
+`symbol` & `decimals` never change and are cached for good. The supplies only change with new blocks, so they are read
+together through `getState` & cached by the block height the read was made at, the least recently used heights being
+evicted once `max_cached_blocks` are kept. `read_many` runs many reads in a single `invokescript` request.
+`AsyncSandwichClient` is the asyncio variant, sharing the caches & the RPC connections pool of a `SandwichClient`.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from offchain.consts import LEDGER_HASH
+from offchain.rpc import AsyncRpcClient, RpcClient, hash160_param
+
+
+class SandwichClient:
+    """
+    Reads the sNEO contracts state, caching the constant & per block values
+    """
+
+    def __init__(self, rpc: RpcClient, contract_hash: bytes, max_cached_blocks: int = 16):
+        """
+        :param rpc: the node client, its connections are pooled
+        :param contract_hash: the sNEO contracts script hash
+        :param max_cached_blocks: the number of block heights whose supplies are kept
+        """
+        self.rpc = rpc
+        self.contract_hash = contract_hash
+        self.max_cached_blocks = max_cached_blocks
+
+        self._lock = threading.Lock()
+        self._constants: Dict[str, Any] = {}
+        # block height -> (total sNEO supply, total bNEO supply), least recently used first
+        self._supplies: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+
+    def _constant(self, method: str) -> Any:
+        with self._lock:
+            if method in self._constants:
+                return self._constants[method]
+
+        value = self.rpc.invoke_read(self.contract_hash, method)
+        with self._lock:
+            self._constants[method] = value
+        return value
+
+    def symbol(self) -> str:
+        return self._constant("symbol").decode()
+
+    def decimals(self) -> int:
+        return self._constant("decimals")
+
+    def supplies(self) -> Tuple[int, int]:
+        """
+        Reads both supplies at the latest block, once per block height.
+        The ledger index is read in the same `invokescript` as `getState`, so the supplies are cached under the block
+        they were read at, even if a block is added after `getblockcount`.
+        :return: (total sNEO supply, total bNEO supply)
+        """
+        height = self.rpc.get_block_count()
+        with self._lock:
+            if height in self._supplies:
+                self._supplies.move_to_end(height)
+                return self._supplies[height]
+
+        index, state = self.rpc.invoke_reads([(LEDGER_HASH, "currentIndex", []), (self.contract_hash, "getState", [])])
+        # the block count is the index of the latest block + 1
+        height = index + 1
+        supplies = (state[0], state[1])
+        with self._lock:
+            self._supplies[height] = supplies
+            while len(self._supplies) > self.max_cached_blocks:
+                self._supplies.popitem(last=False)
+        return supplies
+
+    def total_supply(self) -> int:
+        return self.supplies()[0]
+
+    def burger_supply(self) -> int:
+        return self.supplies()[1]
+
+    def cached_heights(self) -> List[int]:
+        """
+        :return: the block heights whose supplies are cached, least recently used first
+        """
+        with self._lock:
+            return list(self._supplies)
+
+    def balance_of(self, account: bytes) -> int:
+        return self.rpc.invoke_read(self.contract_hash, "balanceOf", hash160_param(account))
+
+    def get_state(self) -> List[int]:
+        """
+        :return: [total sNEO supply, total bNEO supply, share ratio, decimals]
+        """
+        return self.rpc.invoke_read(self.contract_hash, "getState")
+
+    def read_many(self, calls: List[tuple]) -> List[Any]:
+        """
+        Runs many read only methods of the contracts in a single `invokescript` request.
+        :param calls: (method, *arguments) tuples, the accounts being passed as bytes
+        :return: the methods return values, in the calls order
+        :raise RpcError: raised if any of the calls FAULTs
+        """
+        return self.rpc.invoke_reads([(self.contract_hash, method, list(args)) for method, *args in calls])
+
+
+class AsyncSandwichClient:
+    """
+    asyncio variant of `SandwichClient`, the reads run in worker threads sharing the same caches & connections pool
+    """
+
+    def __init__(self, rpc: AsyncRpcClient, contract_hash: bytes, max_cached_blocks: int = 16,
+                 client: Optional[SandwichClient] = None):
+        self.client = client or SandwichClient(rpc.client, contract_hash, max_cached_blocks)
+
+    async def symbol(self) -> str:
+        return await asyncio.to_thread(self.client.symbol)
+
+    async def decimals(self) -> int:
+        return await asyncio.to_thread(self.client.decimals)
+
+    async def supplies(self) -> Tuple[int, int]:
+        return await asyncio.to_thread(self.client.supplies)
+
+    async def total_supply(self) -> int:
+        return await asyncio.to_thread(self.client.total_supply)
+
+    async def burger_supply(self) -> int:
+        return await asyncio.to_thread(self.client.burger_supply)
+
+    async def balance_of(self, account: bytes) -> int:
+        return await asyncio.to_thread(self.client.balance_of, account)
+
+    async def get_state(self) -> List[int]:
+        return await asyncio.to_thread(self.client.get_state)
+
+    async def read_many(self, calls: List[tuple]) -> List[Any]:
+        return await asyncio.to_thread(self.client.read_many, calls)
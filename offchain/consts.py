@@ -0,0 +1,17 @@
+from offchain.rpc import script_hash_from_str
+
+# native contracts
+NEO_HASH = script_hash_from_str("0xef4073a0f2b305a38ec4050e4d3d28bc40ea63f5")
+GAS_HASH = script_hash_from_str("0xd2a4cff31913016155e38e474a2c06d08be276cf")
+LEDGER_HASH = script_hash_from_str("0xda65b600f7124ce6c79950c1772a36403104f2be")
+
+# same values as the contracts constants
+BNEO_HASH = script_hash_from_str("0x48c40d4666f93408be1bef038b6722404d9a4c2a")
+FLAMINGO_SWAP_ROUTER_HASH = script_hash_from_str("0xc4b74578540abd0197391867dd18d60762a4d7bd")
+MIN_HARVEST_GAS = 1_00000000
+MAX_SLIPPAGE = 50
+SLIPPAGE_DENOMINATOR = 10_000
+RATIO_PRECISION = 100_000_000
+
+# neo-express default RPC port
+NEO_EXPRESS_RPC_URL = "http://127.0.0.1:50012"
@@ -0,0 +1,279 @@
+"""
+Incremental indexer of the sNEO contracts events.
+
+Streams the sNEO notifications block by block into a SQLite database: the `Transfer` events keep the holders balances,
+the `Deposit`, `Withdraw` & `Harvest` events the pool operations and the total / burger supplies history, each of them
+carrying both supplies after the operation. Holders & exchange rate queries don't need to replay the chain.
+Every batch of blocks is applied in a single database transaction, together with the checkpoint, so the indexer can
+be stopped at any time and resumes where it left off. Neo blocks are final, there are no reorganizations to undo.
+
+usage: python -m offchain.indexer --contract 0x... [--rpc URL] [--database PATH] [--follow]
+"""
+import argparse
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from offchain.consts import NEO_EXPRESS_RPC_URL
+from offchain.rpc import RpcClient, parse_stack_item, script_hash_from_str, script_hash_to_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_PATH = "sneo_index.sqlite3"
+MILLISECONDS_PER_YEAR = 365 * 24 * 60 * 60 * 1000
+
+# the sNEO events changing the pool, all of them ending with the total & burger supplies after the operation
+POOL_EVENTS = ("Deposit", "Withdraw", "Harvest")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    contract TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    total_supply INTEGER NOT NULL,
+    burger_supply INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holders (
+    account BLOB PRIMARY KEY,
+    balance INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS holders_balance ON holders (balance);
+CREATE TABLE IF NOT EXISTS transfers (
+    height INTEGER NOT NULL,
+    txid TEXT NOT NULL,
+    from_address BLOB,
+    to_address BLOB,
+    amount INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transfers_height ON transfers (height);
+CREATE TABLE IF NOT EXISTS pool_events (
+    height INTEGER NOT NULL,
+    txid TEXT NOT NULL,
+    event TEXT NOT NULL,
+    account BLOB,
+    burger_amount INTEGER NOT NULL,
+    sandwich_amount INTEGER NOT NULL,
+    total_supply INTEGER NOT NULL,
+    burger_supply INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pool_events_height ON pool_events (height);
+CREATE TABLE IF NOT EXISTS supplies (
+    height INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    total_supply INTEGER NOT NULL,
+    burger_supply INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS supplies_time ON supplies (time);
+"""
+
+
+class Indexer:
+    """
+    Indexes the sNEO contracts notifications into a SQLite database
+    """
+
+    def __init__(self, rpc: RpcClient, contract_hash: bytes, database_path: str = DEFAULT_DATABASE_PATH,
+                 batch_size: int = 100):
+        """
+        :param rpc: the node client
+        :param contract_hash: the sNEO contracts script hash
+        :param database_path: the SQLite database, created if missing
+        :param batch_size: the number of blocks fetched & stored together
+        """
+        self.rpc = rpc
+        self.contract_hash = contract_hash
+        self.batch_size = batch_size
+
+        self.database = sqlite3.connect(database_path)
+        self.database.executescript(SCHEMA)
+
+        contract = script_hash_to_str(contract_hash)
+        with self.database:
+            self.database.execute("INSERT OR IGNORE INTO checkpoint VALUES (0, ?, 0, 0, 0)", (contract,))
+        indexed_contract, = self.database.execute("SELECT contract FROM checkpoint").fetchone()
+        if indexed_contract != contract:
+            raise ValueError(f"{database_path} indexes {indexed_contract}, not {contract}")
+
+    def close(self):
+        self.database.close()
+
+    def __enter__(self) -> "Indexer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def height(self) -> int:
+        """
+        :return: the number of indexed blocks, i.e. the next block to index
+        """
+        return self.database.execute("SELECT height FROM checkpoint").fetchone()[0]
+
+    def sync(self, end: Optional[int] = None) -> int:
+        """
+        Indexes the blocks from the checkpoint up to `end`, excluded.
+        :param end: defaults to the node block count
+        :return: the new checkpoint height
+        """
+        end = self.rpc.get_block_count() if end is None else end
+        start = self.height
+        while start < end:
+            batch_end = min(start + self.batch_size, end)
+            self.index_blocks(start, batch_end)
+            logger.info("indexed blocks %s to %s", start, batch_end - 1)
+            start = batch_end
+        return start
+
+    def index_blocks(self, start: int, end: int):
+        """
+        Indexes the blocks from `start` to `end`, excluded, which must continue the checkpoint.
+        """
+        _, _, height, total_supply, burger_supply = self.database.execute("SELECT * FROM checkpoint").fetchone()
+        if start != height:
+            raise ValueError(f"Blocks must be indexed in order, expected {height}, got {start}")
+
+        blocks = self.rpc.batch([("getblock", index, True) for index in range(start, end)])
+        transaction_hashes = [transaction["hash"] for block in blocks for transaction in block["tx"]]
+        logs = self.rpc.batch([("getapplicationlog", transaction_hash) for transaction_hash in transaction_hashes])
+        logs_by_hash = dict(zip(transaction_hashes, logs))
+
+        contract = script_hash_to_str(self.contract_hash)
+        transfers: List[tuple] = []
+        pool_events: List[tuple] = []
+        supplies: List[tuple] = []
+        balance_changes: Dict[bytes, int] = defaultdict(int)
+
+        for block in blocks:
+            block_supplies = (total_supply, burger_supply)
+            for transaction in block["tx"]:
+                for execution in logs_by_hash[transaction["hash"]]["executions"]:
+                    if execution["vmstate"] != "HALT":
+                        continue
+
+                    for notification in execution["notifications"]:
+                        if notification["contract"] != contract:
+                            continue
+                        event = notification["eventname"]
+                        state = parse_stack_item(notification["state"])
+
+                        if event in POOL_EVENTS:
+                            # the events are fired in the order of the supplies changes, the last one is current
+                            total_supply, burger_supply = state[-2:]
+                            if event == "Deposit":
+                                _, account, burger_amount, sandwich_amount = state[:4]
+                            elif event == "Withdraw":
+                                account, burger_amount, sandwich_amount = state[:3]
+                            else:
+                                account, burger_amount, sandwich_amount = None, state[1], 0
+                            pool_events.append((block["index"], transaction["hash"], event, account, burger_amount,
+                                                sandwich_amount, total_supply, burger_supply))
+                            continue
+
+                        if event != "Transfer":
+                            continue
+                        from_address, to_address, amount = state
+                        transfers.append((block["index"], transaction["hash"], from_address, to_address, amount))
+                        if from_address is not None:
+                            balance_changes[from_address] -= amount
+                        if to_address is not None:
+                            balance_changes[to_address] += amount
+
+            if (total_supply, burger_supply) != block_supplies:
+                supplies.append((block["index"], block["time"], total_supply, burger_supply))
+
+        with self.database:
+            self.database.executemany("INSERT INTO transfers VALUES (?, ?, ?, ?, ?)", transfers)
+            self.database.executemany("INSERT INTO pool_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", pool_events)
+            self.database.executemany("INSERT INTO supplies VALUES (?, ?, ?, ?)", supplies)
+            self.database.executemany(
+                "INSERT INTO holders VALUES (?, ?) "
+                "ON CONFLICT (account) DO UPDATE SET balance = balance + excluded.balance",
+                [(account, change) for account, change in balance_changes.items() if change != 0]
+            )
+            self.database.execute("DELETE FROM holders WHERE balance = 0")
+            self.database.execute("UPDATE checkpoint SET height = ?, total_supply = ?, burger_supply = ?",
+                                  (end, total_supply, burger_supply))
+
+    def balance_of(self, account: bytes) -> int:
+        row = self.database.execute("SELECT balance FROM holders WHERE account = ?", (account,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def holders(self, limit: Optional[int] = None) -> List[Tuple[bytes, int]]:
+        """
+        :return: the (account, balance) of the holders, largest balances first
+        """
+        return self.database.execute("SELECT account, balance FROM holders ORDER BY balance DESC, account LIMIT ?",
+                                     (-1 if limit is None else limit,)).fetchall()
+
+    def pool_events(self, account: Optional[bytes] = None) -> List[tuple]:
+        """
+        :param account: only the deposits & withdrawals of this account, defaults to all the events
+        :return: the (height, txid, event, account, burger amount, sandwich amount, total supply, burger supply) of the
+        pool events, in order. The account is the depositor's beneficiary, and None for the harvests
+        """
+        if account is None:
+            return self.database.execute("SELECT * FROM pool_events ORDER BY rowid").fetchall()
+        return self.database.execute("SELECT * FROM pool_events WHERE account = ? ORDER BY rowid",
+                                     (account,)).fetchall()
+
+    def supplies_at(self, height: Optional[int] = None) -> Tuple[int, int]:
+        """
+        :param height: the block index, defaults to the last indexed block
+        :return: the (total supply, burger supply) after the block
+        """
+        if height is None:
+            return self.database.execute("SELECT total_supply, burger_supply FROM checkpoint").fetchone()
+        row = self.database.execute("SELECT total_supply, burger_supply FROM supplies WHERE height <= ? "
+                                    "ORDER BY height DESC LIMIT 1", (height,)).fetchone()
+        return (0, 0) if row is None else row
+
+    def supplies_at_time(self, timestamp: int) -> Tuple[int, int]:
+        """
+        :param timestamp: in milliseconds
+        :return: the (total supply, burger supply) at `timestamp`
+        """
+        row = self.database.execute("SELECT total_supply, burger_supply FROM supplies WHERE time <= ? "
+                                    "ORDER BY height DESC LIMIT 1", (timestamp,)).fetchone()
+        return (0, 0) if row is None else row
+
+    def apy(self, start_time: int, end_time: int) -> float:
+        """
+        Annualizes the bNEO per sNEO growth between two timestamps, in milliseconds.
+        :return: the yearly yield, e.g. 0.05 for 5%
+        """
+        start_total, start_burger = self.supplies_at_time(start_time)
+        end_total, end_burger = self.supplies_at_time(end_time)
+        if start_total == 0 or end_total == 0 or end_time <= start_time:
+            return 0.0
+
+        growth = (end_burger * start_total) / (end_total * start_burger)
+        return growth ** (MILLISECONDS_PER_YEAR / (end_time - start_time)) - 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexes the sNEO holders & exchange rate history into SQLite")
+    parser.add_argument("--rpc", default=NEO_EXPRESS_RPC_URL, help="node JSON-RPC url")
+    parser.add_argument("--contract", required=True, help="sNEO contracts script hash, e.g. 0x...")
+    parser.add_argument("--database", default=DEFAULT_DATABASE_PATH)
+    parser.add_argument("--batch-size", type=int, default=100, help="blocks fetched & stored together")
+    parser.add_argument("--follow", action="store_true", help="keep indexing the new blocks")
+    parser.add_argument("--poll-interval", type=float, default=15)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    rpc = RpcClient(args.rpc)
+    with Indexer(rpc, script_hash_from_str(args.contract), args.database, args.batch_size) as indexer:
+        try:
+            indexer.sync()
+            while args.follow:
+                time.sleep(args.poll_interval)
+                indexer.sync()
+        finally:
+            rpc.close()
+
+
+if __name__ == "__main__":
+    main()
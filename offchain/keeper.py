@@ -0,0 +1,187 @@
+"""
+Keeper service, harvesting the sNEO contracts yield whenever it's profitable.
+
+Every poll it reads the GAS waiting to be harvested, quotes its swap to bNEO, test invokes `harvest` to learn the
+invocation fee, and only submits the harvest when the expected bNEO gain net of the fee beats the threshold.
+
+usage: python -m offchain.keeper --contract 0x... --owner 0x... [--rpc URL] [--dry-run] [--stand-in]
+"""
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+from offchain.consts import BNEO_HASH, FLAMINGO_SWAP_ROUTER_HASH, GAS_HASH, MAX_SLIPPAGE, MIN_HARVEST_GAS, \
+    NEO_EXPRESS_RPC_URL, SLIPPAGE_DENOMINATOR
+from offchain.rpc import AsyncRpcClient, RpcError, hash160_param, script_hash_from_str
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KeeperConfig:
+    contract_hash: bytes
+    owner: bytes
+    bneo_hash: bytes = BNEO_HASH
+    router_hash: bytes = FLAMINGO_SWAP_ROUTER_HASH
+    # seconds between polls
+    poll_interval: float = 60
+    # bNEO the harvest must gain for the pool, net of its fee, to be submitted
+    min_net_gain: int = 0
+    # GAS added to the invocation GAS to estimate the transaction fee
+    network_fee: int = 200_000
+    dry_run: bool = False
+
+
+class HarvestEstimate(NamedTuple):
+    pending_gas: int
+    expected_burgers: int
+    fee_gas: int
+    fee_burgers: int
+    net_gain: int
+    profitable: bool
+
+
+class Keeper:
+    """
+    Polls the contracts state & submits `harvest` when profitable
+    """
+
+    def __init__(self, rpc: AsyncRpcClient, config: KeeperConfig):
+        self.rpc = rpc
+        self.config = config
+
+    async def pending_gas(self) -> int:
+        """
+        :return: the GAS the next harvest would swap, both claimed & still waiting in bNEO
+        """
+        contract = hash160_param(self.config.contract_hash)
+        claimed, unclaimed = await asyncio.gather(
+            self.rpc.invoke_read(GAS_HASH, "balanceOf", contract),
+            self.rpc.invoke_read(self.config.bneo_hash, "reward", contract),
+        )
+        return claimed + unclaimed
+
+    async def estimate(self) -> HarvestEstimate:
+        """
+        Estimates the outcome of harvesting now.
+        """
+        pending_gas = await self.pending_gas()
+        if pending_gas < MIN_HARVEST_GAS:
+            return HarvestEstimate(pending_gas, 0, 0, 0, 0, False)
+
+        swap_path = [hash160_param(GAS_HASH), hash160_param(self.config.bneo_hash)]
+        quote = await self.rpc.invoke_read(self.config.router_hash, "getAmountsOut", pending_gas, swap_path)
+        expected_burgers = quote[1] * (SLIPPAGE_DENOMINATOR - MAX_SLIPPAGE) // SLIPPAGE_DENOMINATOR
+
+        # the harvest test invocation gives the exact GAS it consumes
+        invocation = await self.rpc.invoke_function(self.config.contract_hash, "harvest", [expected_burgers],
+                                                    signers=[self.config.owner, self.config.contract_hash])
+        fee_gas = int(invocation["gasconsumed"]) + self.config.network_fee
+        fee_burgers = fee_gas * quote[1] // pending_gas
+
+        net_gain = expected_burgers - fee_burgers
+        return HarvestEstimate(pending_gas, expected_burgers, fee_gas, fee_burgers, net_gain,
+                               net_gain > 0 and net_gain >= self.config.min_net_gain)
+
+    async def submit_harvest(self, estimate: HarvestEstimate) -> str:
+        """
+        Submits the harvest through the node wallet, which must hold the owner account.
+        :return: the transaction hash
+        """
+        invocation = await self.rpc.invoke_function(self.config.contract_hash, "harvest",
+                                                    [estimate.expected_burgers],
+                                                    signers=[self.config.owner, self.config.contract_hash])
+        if "tx" not in invocation:
+            raise RpcError("The node didn't sign the harvest, is the owner wallet open?")
+        return await self.rpc.send_raw_transaction(invocation["tx"])
+
+    async def tick(self) -> Optional[str]:
+        """
+        Runs a single poll.
+        :return: the harvest transaction hash, None if nothing was submitted
+        """
+        estimate = await self.estimate()
+        logger.info("pending %s GAS, expecting %s bNEO for %s bNEO fee (net %s)",
+                    estimate.pending_gas, estimate.expected_burgers, estimate.fee_burgers, estimate.net_gain)
+
+        if not estimate.profitable:
+            return None
+        if self.config.dry_run:
+            logger.info("dry run, harvest not submitted")
+            return None
+
+        transaction_hash = await self.submit_harvest(estimate)
+        logger.info("harvest submitted: %s", transaction_hash)
+        return transaction_hash
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """
+        Polls until `stop` is set.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.tick()
+            except (RpcError, OSError) as error:
+                logger.warning("poll failed: %s", error)
+
+            try:
+                await asyncio.wait_for(stop.wait(), self.config.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harvests the sNEO yield whenever it's profitable")
+    parser.add_argument("--rpc", default=NEO_EXPRESS_RPC_URL, help="node JSON-RPC url")
+    parser.add_argument("--contract", help="sNEO contracts script hash, e.g. 0x...")
+    parser.add_argument("--owner", help="contracts owner script hash, its wallet must be open in the node")
+    parser.add_argument("--poll-interval", type=float, default=60)
+    parser.add_argument("--min-net-gain", type=int, default=0, help="minimum bNEO gain net of fees, in datoshi")
+    parser.add_argument("--dry-run", action="store_true", help="only log the harvest decisions")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="run against a local stand-in node, where GAS is generated every poll")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(_run(args))
+
+
+async def _run(args):
+    node = None
+    if args.stand_in:
+        from offchain.stand_in_node import StandInNode
+
+        node = StandInNode().start()
+        node.chain.model.deposit(bytes(20), 1000_00000000)
+        args.rpc = node.url
+        args.contract = args.contract or "0x" + node.chain.sandwich_hash[::-1].hex()
+        args.owner = args.owner or "0x" + bytes(20).hex()
+
+    config = KeeperConfig(
+        contract_hash=script_hash_from_str(args.contract),
+        owner=script_hash_from_str(args.owner),
+        poll_interval=args.poll_interval,
+        min_net_gain=args.min_net_gain,
+        dry_run=args.dry_run,
+    )
+    rpc = AsyncRpcClient(args.rpc)
+    keeper = Keeper(rpc, config)
+    try:
+        if node is None:
+            await keeper.run()
+        else:
+            while True:
+                node.chain.mine(generated_gas=50_000_000)
+                await keeper.tick()
+                await asyncio.sleep(args.poll_interval)
+    finally:
+        rpc.close()
+        if node is not None:
+            node.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import asyncio
+import base64
+import hashlib
+import http.client
+import itertools
+import json
+import queue
+from typing import Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# NeoVM opcodes used by `contract_calls_script`
+PUSHINT8 = 0x00
+PUSHT = 0x08
+PUSHF = 0x09
+PUSHNULL = 0x0B
+PUSHDATA1 = 0x0C
+PUSHDATA2 = 0x0D
+PUSHDATA4 = 0x0E
+PUSHM1 = 0x0F
+PUSH0 = 0x10
+SYSCALL = 0x41
+PACK = 0xC0
+NEWARRAY0 = 0xC2
+
+CONTRACT_CALL_SYSCALL = hashlib.sha256(b"System.Contract.Call").digest()[:4]
+# CallFlags.ReadStates | CallFlags.AllowCall
+READ_ONLY_CALL_FLAGS = 0x05
+
+
+class RpcError(Exception):
+    """
+    Raised when the node returns a JSON-RPC error, or an invocation FAULTs
+    """
+
+
+def script_hash_to_str(script_hash: bytes) -> str:
+    """
+    Converts a little endian script hash to its RPC form, e.g. '0x48c40d4666f93408be1bef038b6722404d9a4c2a'
+    """
+    return "0x" + bytes(script_hash)[::-1].hex()
+
+
+def script_hash_from_str(script_hash: str) -> bytes:
+    """
+    Converts the RPC form of a script hash back to its little endian bytes
+    """
+    return bytes.fromhex(script_hash[2:] if script_hash.startswith("0x") else script_hash)[::-1]
+
+
+def hash160_param(script_hash: bytes) -> dict:
+    return {"type": "Hash160", "value": script_hash_to_str(script_hash)}
+
+
+def to_parameter(value: Any) -> dict:
+    """
+    Converts a python value to a contracts parameter, use `hash160_param` for script hashes.
+    """
+    if isinstance(value, dict):
+        return value
+    if value is None:
+        return {"type": "Any"}
+    if isinstance(value, bool):
+        return {"type": "Boolean", "value": value}
+    if isinstance(value, int):
+        return {"type": "Integer", "value": str(value)}
+    if isinstance(value, str):
+        return {"type": "String", "value": value}
+    if isinstance(value, (bytes, bytearray)):
+        return {"type": "ByteArray", "value": base64.b64encode(value).decode()}
+    if isinstance(value, (list, tuple)):
+        return {"type": "Array", "value": [to_parameter(item) for item in value]}
+    raise TypeError(f"Can't convert {type(value).__name__} to a contracts parameter")
+
+
+def emit_push(script: bytearray, value: Any):
+    """
+    Appends the NeoVM instructions pushing a python value to `script`, script hashes being pushed as bytes.
+    """
+    if value is None:
+        script.append(PUSHNULL)
+    elif isinstance(value, bool):
+        script.append(PUSHT if value else PUSHF)
+    elif isinstance(value, int):
+        if -1 <= value <= 16:
+            script.append(PUSH0 + value if value >= 0 else PUSHM1)
+        else:
+            # PUSHINT8 to PUSHINT256, the smallest that fits the two's complement value
+            size = next(size for size in (1, 2, 4, 8, 16, 32) if -(1 << 8 * size - 1) <= value < 1 << 8 * size - 1)
+            script.append(PUSHINT8 + size.bit_length() - 1)
+            script += value.to_bytes(size, "little", signed=True)
+    elif isinstance(value, (str, bytes, bytearray)):
+        data = value.encode() if isinstance(value, str) else bytes(value)
+        if len(data) < 0x100:
+            script += bytes([PUSHDATA1, len(data)])
+        elif len(data) < 0x10000:
+            script += bytes([PUSHDATA2]) + len(data).to_bytes(2, "little")
+        else:
+            script += bytes([PUSHDATA4]) + len(data).to_bytes(4, "little")
+        script += data
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            script.append(NEWARRAY0)
+        else:
+            for item in reversed(value):
+                emit_push(script, item)
+            emit_push(script, len(value))
+            script.append(PACK)
+    else:
+        raise TypeError(f"Can't push {type(value).__name__} to the stack")
+
+
+def contract_calls_script(calls: List[Tuple[bytes, str, List[Any]]]) -> bytes:
+    """
+    Builds a script calling many read only contracts methods, leaving their results on the stack in the calls order.
+    :param calls: (script hash, method, arguments) tuples
+    :return: the NeoVM script
+    """
+    script = bytearray()
+    for script_hash, method, args in calls:
+        emit_push(script, list(args))
+        emit_push(script, READ_ONLY_CALL_FLAGS)
+        emit_push(script, method)
+        emit_push(script, script_hash)
+        script += bytes([SYSCALL]) + CONTRACT_CALL_SYSCALL
+    return bytes(script)
+
+
+def parse_stack_item(item: dict) -> Any:
+    """
+    Converts a result stack item to a python value.
+    """
+    item_type = item["type"]
+    if item_type == "Integer":
+        return int(item["value"])
+    if item_type == "Boolean":
+        return item["value"] in (True, "true", "True")
+    if item_type in ("ByteString", "Buffer"):
+        return base64.b64decode(item["value"])
+    if item_type in ("Array", "Struct"):
+        return [parse_stack_item(value) for value in item["value"]]
+    if item_type == "Map":
+        return {parse_stack_item(entry["key"]): parse_stack_item(entry["value"]) for entry in item["value"]}
+    return None
+
+
+class RpcClient:
+    """
+    Neo JSON-RPC client, reusing a pool of keep-alive connections across calls & threads
+    """
+
+    def __init__(self, url: str, pool_size: int = 4, timeout: float = 30):
+        parsed_url = urlparse(url)
+        self.host = parsed_url.hostname
+        self.port = parsed_url.port
+        self.path = parsed_url.path or "/"
+        self.https = parsed_url.scheme == "https"
+        self.timeout = timeout
+
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._ids = itertools.count()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_type = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_type(self.host, self.port, timeout=self.timeout)
+
+    def _post(self, body: bytes) -> Any:
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+
+        try:
+            connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            payload = json.loads(response.read())
+        except (http.client.HTTPException, OSError):
+            # the node may close idle keep-alive connections, retry once on a new one
+            connection.close()
+            connection = self._connect()
+            connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            payload = json.loads(response.read())
+
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        return payload
+
+    def call(self, method: str, *params) -> Any:
+        """
+        Sends a JSON-RPC request.
+        :return: the request result
+        :raise RpcError: raised if the node returns an error
+        """
+        body = json.dumps({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        payload = self._post(body.encode())
+        if "error" in payload:
+            raise RpcError(payload["error"])
+        return payload["result"]
+
+    def batch(self, requests: List[tuple]) -> List[Any]:
+        """
+        Sends many JSON-RPC requests in a single round trip.
+        :param requests: (method, *params) tuples
+        :return: the results, in the requests order
+        :raise RpcError: raised if the node returns an error for any of the requests
+        """
+        if not requests:
+            return []
+
+        ids = [next(self._ids) for _ in requests]
+        body = [{"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+                for request_id, (method, *params) in zip(ids, requests)]
+
+        responses = {response["id"]: response for response in self._post(json.dumps(body).encode())}
+        results = []
+        for request_id in ids:
+            response = responses[request_id]
+            if "error" in response:
+                raise RpcError(response["error"])
+            results.append(response["result"])
+        return results
+
+    def get_block_count(self) -> int:
+        return self.call("getblockcount")
+
+    def invoke_function(self, script_hash: bytes, operation: str, params: List[Any] = (),
+                        signers: List[bytes] = ()) -> dict:
+        """
+        Test invokes a contracts method, nothing is persisted.
+        :return: the invocation result, with the 'stack' parsed to python values
+        :raise RpcError: raised if the invocation FAULTs
+        """
+        signers_json = [{"account": script_hash_to_str(signer), "scopes": "Global"} for signer in signers]
+        result = self.call("invokefunction", script_hash_to_str(script_hash), operation,
+                           [to_parameter(param) for param in params], signers_json)
+        if result["state"] != "HALT":
+            raise RpcError(f"{operation} FAULTed: {result.get('exception')}")
+
+        result["stack"] = [parse_stack_item(item) for item in result["stack"]]
+        return result
+
+    def invoke_read(self, script_hash: bytes, operation: str, *params) -> Any:
+        """
+        Test invokes a read only method.
+        :return: the method return value
+        """
+        return self.invoke_function(script_hash, operation, list(params))["stack"][0]
+
+    def invoke_script(self, script: bytes, signers: List[bytes] = ()) -> dict:
+        """
+        Test invokes a script, nothing is persisted.
+        :return: the invocation result, with the 'stack' parsed to python values
+        :raise RpcError: raised if the invocation FAULTs
+        """
+        signers_json = [{"account": script_hash_to_str(signer), "scopes": "Global"} for signer in signers]
+        result = self.call("invokescript", base64.b64encode(script).decode(), signers_json)
+        if result["state"] != "HALT":
+            raise RpcError(f"script FAULTed: {result.get('exception')}")
+
+        result["stack"] = [parse_stack_item(item) for item in result["stack"]]
+        return result
+
+    def invoke_reads(self, calls: List[Tuple[bytes, str, List[Any]]]) -> List[Any]:
+        """
+        Test invokes many read only methods in a single `invokescript` request.
+        :param calls: (script hash, method, arguments) tuples
+        :return: the methods return values, in the calls order
+        """
+        if not calls:
+            return []
+        return self.invoke_script(contract_calls_script(calls))["stack"]
+
+    def send_raw_transaction(self, transaction: str) -> str:
+        """
+        Relays a signed transaction.
+        :param transaction: the base64 transaction
+        :return: the transaction hash
+        """
+        return self.call("sendrawtransaction", transaction)["hash"]
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class AsyncRpcClient:
+    """
+    asyncio variant of `RpcClient`, the requests run in worker threads sharing the same connections pool
+    """
+
+    def __init__(self, url: str, pool_size: int = 4, timeout: float = 30, client: Optional[RpcClient] = None):
+        self.client = client or RpcClient(url, pool_size, timeout)
+
+    async def call(self, method: str, *params) -> Any:
+        return await asyncio.to_thread(self.client.call, method, *params)
+
+    async def batch(self, requests: List[tuple]) -> List[Any]:
+        return await asyncio.to_thread(self.client.batch, requests)
+
+    async def get_block_count(self) -> int:
+        return await asyncio.to_thread(self.client.get_block_count)
+
+    async def invoke_function(self, script_hash: bytes, operation: str, params: List[Any] = (),
+                              signers: List[bytes] = ()) -> dict:
+        return await asyncio.to_thread(self.client.invoke_function, script_hash, operation, params, signers)
+
+    async def invoke_read(self, script_hash: bytes, operation: str, *params) -> Any:
+        return await asyncio.to_thread(self.client.invoke_read, script_hash, operation, *params)
+
+    async def invoke_script(self, script: bytes, signers: List[bytes] = ()) -> dict:
+        return await asyncio.to_thread(self.client.invoke_script, script, signers)
+
+    async def invoke_reads(self, calls: List[Tuple[bytes, str, List[Any]]]) -> List[Any]:
+        return await asyncio.to_thread(self.client.invoke_reads, calls)
+
+    async def send_raw_transaction(self, transaction: str) -> str:
+        return await asyncio.to_thread(self.client.send_raw_transaction, transaction)
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,415 @@
+"""
+A local, in-memory stand-in for a neo-express node, serving the JSON-RPC methods the off-chain tools use.
+
+The sNEO contracts is backed by `utils.model.SandwichModel`, bNEO, GAS & the Flamingo router by a few counters, so the
+off-chain tools can be exercised end to end (dry runs, tests) without a real chain.
+"""
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from offchain.consts import BNEO_HASH, FLAMINGO_SWAP_ROUTER_HASH, GAS_HASH, LEDGER_HASH, MIN_HARVEST_GAS, \
+    RATIO_PRECISION
+from offchain.rpc import CONTRACT_CALL_SYSCALL, NEWARRAY0, PACK, PUSH0, PUSHDATA1, PUSHF, PUSHINT8, PUSHM1, PUSHNULL, \
+    PUSHT, SYSCALL, script_hash_from_str, script_hash_to_str, to_parameter
+from utils.model import SandwichModel
+
+# default sNEO contracts hash of the stand-in chain
+SANDWICH_HASH = bytes(range(1, 21))
+# blocks timestamps, in milliseconds
+GENESIS_TIME = 1_600_000_000_000
+BLOCK_TIME = 15_000
+
+
+def to_stack_item(value: Any) -> dict:
+    """
+    Converts a python value to a result stack item.
+    """
+    if value is None:
+        return {"type": "Any"}
+    if isinstance(value, bool):
+        return {"type": "Boolean", "value": value}
+    if isinstance(value, int):
+        return {"type": "Integer", "value": str(value)}
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, (bytes, bytearray)):
+        return {"type": "ByteString", "value": base64.b64encode(value).decode()}
+    if isinstance(value, (list, tuple)):
+        return {"type": "Array", "value": [to_stack_item(item) for item in value]}
+    raise TypeError(f"Can't convert {type(value).__name__} to a stack item")
+
+
+def from_parameter(parameter: dict) -> Any:
+    """
+    Converts a contracts parameter to a python value.
+    """
+    parameter_type = parameter["type"]
+    value = parameter.get("value")
+    if parameter_type == "Integer":
+        return int(value)
+    if parameter_type == "Hash160":
+        return script_hash_from_str(value)
+    if parameter_type == "ByteArray":
+        return base64.b64decode(value)
+    if parameter_type == "Array":
+        return [from_parameter(item) for item in value]
+    return value
+
+
+def parse_calls_script(script: bytes) -> List[Tuple[bytes, str, List[Any]]]:
+    """
+    Decodes a script built by `offchain.rpc.contract_calls_script`, the only scripts `invokescript` supports.
+    :return: the (script hash, method, arguments) calls
+    :raise ValueError: raised if the script uses any other instruction
+    """
+    calls = []
+    stack: List[Any] = []
+    offset = 0
+    while offset < len(script):
+        opcode = script[offset]
+        offset += 1
+        if PUSHM1 <= opcode <= PUSH0 + 16:
+            stack.append(opcode - PUSH0)
+        elif PUSHINT8 <= opcode <= PUSHINT8 + 5:
+            size = 1 << opcode - PUSHINT8
+            stack.append(int.from_bytes(script[offset:offset + size], "little", signed=True))
+            offset += size
+        elif PUSHDATA1 <= opcode <= PUSHDATA1 + 2:
+            prefix_size = 1 << opcode - PUSHDATA1
+            length = int.from_bytes(script[offset:offset + prefix_size], "little")
+            offset += prefix_size
+            stack.append(script[offset:offset + length])
+            offset += length
+        elif opcode in (PUSHT, PUSHF):
+            stack.append(opcode == PUSHT)
+        elif opcode == PUSHNULL:
+            stack.append(None)
+        elif opcode == NEWARRAY0:
+            stack.append([])
+        elif opcode == PACK:
+            stack.append([stack.pop() for _ in range(stack.pop())])
+        elif opcode == SYSCALL and script[offset:offset + 4] == CONTRACT_CALL_SYSCALL:
+            offset += 4
+            script_hash, method = stack.pop(), stack.pop().decode()
+            stack.pop()  # call flags
+            calls.append((script_hash, method, stack.pop()))
+        else:
+            raise ValueError(f"Unsupported instruction {opcode:#04x} at {offset - 1}")
+    return calls
+
+
+class StandInChain:
+    """
+    State of the stand-in chain
+    """
+
+    def __init__(self, sandwich_hash: bytes = SANDWICH_HASH, rate: int = 5, invocation_gas: int = 5_000_000):
+        """
+        :param sandwich_hash: the sNEO contracts script hash
+        :param rate: the bNEO the router pays for 100 GAS
+        :param invocation_gas: the GAS consumed by any contracts invocation
+        """
+        self.sandwich_hash = sandwich_hash
+        self.rate = rate
+        self.invocation_gas = invocation_gas
+
+        self.model = SandwichModel()
+        # GAS generated by the sNEO contracts bNEO that wasn't claimed yet
+        self.pending_gas = 0
+        # GAS already claimed by the sNEO contracts
+        self.claimed_gas = 0
+        self.transactions: List[dict] = []
+        self.application_logs: Dict[str, dict] = {}
+        self.blocks: List[dict] = [self._block(0, [])]
+
+        self._lock = threading.Lock()
+        # transactions waiting for the next block, and the notifications of the running invocation
+        self._mempool: List[str] = []
+        self._notifications: List[dict] = []
+        self._methods: Dict[bytes, Dict[str, Callable]] = {
+            self.sandwich_hash: {
+                "symbol": lambda: "sNEO",
+                "decimals": lambda: 8,
+                "totalSupply": lambda: self.model.total_supply,
+                "burgerSupply": lambda: self.model.burger_supply,
+                "balanceOf": self.model.balance_of,
+                "getState": self._get_state,
+                "balancesOf": lambda accounts: [self.model.balance_of(account) for account in accounts],
+                "transfer": self._transfer,
+                "burn": self._burn,
+                "requestWithdraw": self._request_withdraw,
+                "settleWithdrawals": self._settle_withdrawals,
+                "harvest": self._harvest,
+            },
+            BNEO_HASH: {
+                "reward": lambda account: self.pending_gas if account == self.sandwich_hash else 0,
+                "transfer": self._bneo_transfer,
+            },
+            GAS_HASH: {
+                "balanceOf": lambda account: self.claimed_gas if account == self.sandwich_hash else 0,
+            },
+            LEDGER_HASH: {
+                "currentIndex": lambda: len(self.blocks) - 1,
+            },
+            FLAMINGO_SWAP_ROUTER_HASH: {
+                "getAmountsOut": lambda amount_in, paths: [amount_in, amount_in * self.rate // 100],
+            },
+        }
+
+    def _get_state(self) -> List[int]:
+        total_supply, burger_supply = self.model.total_supply, self.model.burger_supply
+        ratio = burger_supply * RATIO_PRECISION // total_supply if total_supply > 0 else RATIO_PRECISION
+        return [total_supply, burger_supply, ratio, 8]
+
+    def _harvest(self, min_burgers_out: int) -> int:
+        self.claimed_gas += self.pending_gas
+        self.pending_gas = 0
+        if self.claimed_gas < MIN_HARVEST_GAS:
+            return 0
+
+        burgers_out = self.claimed_gas * self.rate // 100
+        if burgers_out < min_burgers_out:
+            raise ValueError("swap returned less than the minimum")
+
+        gas_amount, self.claimed_gas = self.claimed_gas, 0
+        self.model.inject_yield(burgers_out)
+        self._notify(BNEO_HASH, "Transfer", FLAMINGO_SWAP_ROUTER_HASH, self.sandwich_hash, burgers_out)
+        self._notify(self.sandwich_hash, "Harvest", gas_amount, burgers_out, self.model.total_supply,
+                     self.model.burger_supply)
+        return burgers_out
+
+    def _transfer(self, from_address: bytes, to_address: bytes, amount: int, data: Any) -> bool:
+        transferred = self.model.transfer(from_address, to_address, amount)
+        if transferred:
+            self._notify(self.sandwich_hash, "Transfer", from_address, to_address, amount)
+        return transferred
+
+    def _burn(self, account: bytes, amount: int):
+        burgers_to_transfer = self.model.burn(account, amount)
+        self._notify_withdraw(account, burgers_to_transfer, amount)
+        self._notify(BNEO_HASH, "Transfer", self.sandwich_hash, account, burgers_to_transfer)
+
+    def _request_withdraw(self, account: bytes, amount: int) -> int:
+        request_id = self.model.request_withdraw(account, amount)
+        self._notify_withdraw(account, self.model.withdrawals[request_id][1], amount)
+        return request_id
+
+    def _settle_withdrawals(self, max_requests: int) -> int:
+        settled = self.model.settle_withdrawals(max_requests)
+        for account, burgers_to_transfer in settled:
+            self._notify(BNEO_HASH, "Transfer", self.sandwich_hash, account, burgers_to_transfer)
+        return len(settled)
+
+    def _bneo_transfer(self, from_address: bytes, to_address: bytes, amount: int, data: Any) -> bool:
+        self._notify(BNEO_HASH, "Transfer", from_address, to_address, amount)
+        if to_address == self.sandwich_hash:
+            # same routing as the contracts `onNEP17Payment`, the forwarding data only matters to receiving contracts
+            beneficiary = from_address
+            if isinstance(data, list):
+                beneficiary = data[0]
+            elif data is not None:
+                beneficiary = data
+            if len(beneficiary) != 20:
+                raise ValueError("invalid deposit beneficiary")
+            sandwiches_to_mint = self.model.deposit(beneficiary, amount)
+            self._notify(self.sandwich_hash, "Deposit", from_address, beneficiary, amount, sandwiches_to_mint,
+                         self.model.total_supply, self.model.burger_supply)
+            self._notify(self.sandwich_hash, "Transfer", None, beneficiary, sandwiches_to_mint)
+        return True
+
+    def _notify_withdraw(self, account: bytes, burgers_to_transfer: int, amount: int):
+        self._notify(self.sandwich_hash, "Transfer", account, None, amount)
+        self._notify(self.sandwich_hash, "Withdraw", account, burgers_to_transfer, amount, self.model.total_supply,
+                     self.model.burger_supply)
+
+    def _notify(self, script_hash: bytes, event_name: str, *state):
+        self._notifications.append({
+            "contract": script_hash_to_str(script_hash),
+            "eventname": event_name,
+            "state": to_stack_item(list(state)),
+        })
+
+    def _block(self, index: int, transactions: List[str]) -> dict:
+        return {
+            "hash": script_hash_to_str(index.to_bytes(32, "little")),
+            "index": index,
+            "time": GENESIS_TIME + index * BLOCK_TIME,
+            "tx": [{"hash": transaction_hash} for transaction_hash in transactions],
+        }
+
+    @property
+    def height(self) -> int:
+        return len(self.blocks)
+
+    def mine(self, blocks: int = 1, generated_gas: int = 0):
+        """
+        Advances the chain, the sNEO contracts bNEO generating `generated_gas` GAS.
+        The transactions sent since the last call are included in the first block.
+        """
+        with self._lock:
+            for _ in range(blocks):
+                self.blocks.append(self._block(len(self.blocks), self._mempool))
+                self._mempool = []
+            self.pending_gas += generated_gas
+
+    def execute(self, script_hash: bytes, operation: str, *args) -> dict:
+        """
+        Sends a transaction invoking a contracts method, witnesses aren't checked.
+        :return: the transaction application log
+        """
+        invocation = {"contract": script_hash_to_str(script_hash), "operation": operation,
+                      "params": [to_parameter(arg) for arg in args]}
+        return self.application_logs[self._send(invocation)]
+
+    def _send(self, invocation: dict) -> str:
+        args = [from_parameter(parameter) for parameter in invocation["params"]]
+        result = self.invoke(script_hash_from_str(invocation["contract"]), invocation["operation"], args,
+                             persist=True)
+        self.transactions.append({**invocation, "result": result})
+
+        transaction_hash = script_hash_to_str(len(self.transactions).to_bytes(32, "little"))
+        execution = {"trigger": "Application", "vmstate": result["state"], **result}
+        del execution["state"]
+        with self._lock:
+            self.application_logs[transaction_hash] = {"txid": transaction_hash, "executions": [execution]}
+            self._mempool.append(transaction_hash)
+        return transaction_hash
+
+    def invoke(self, script_hash: bytes, operation: str, args: List[Any], persist: bool) -> dict:
+        """
+        Runs a contracts method, rolling the state back unless `persist` is set.
+        """
+        return self.invoke_calls([(script_hash, operation, args)], persist)
+
+    def invoke_calls(self, calls: List[Tuple[bytes, str, List[Any]]], persist: bool) -> dict:
+        """
+        Runs many contracts methods as a single invocation, each result being left on the stack.
+        The state is rolled back unless `persist` is set, or if any of the calls fails.
+        """
+        with self._lock:
+            snapshot = (self.model.state(), list(self.model.withdrawals), self.model.settled_withdrawals,
+                        self.pending_gas, self.claimed_gas)
+            self._notifications = []
+            try:
+                result = {
+                    "state": "HALT",
+                    "gasconsumed": str(self.invocation_gas * len(calls)),
+                    "stack": [to_stack_item(self._methods[script_hash][operation](*args))
+                              for script_hash, operation, args in calls],
+                    "notifications": self._notifications,
+                }
+            except Exception as error:
+                result = {"state": "FAULT", "gasconsumed": str(self.invocation_gas * len(calls)), "stack": [],
+                          "exception": repr(error), "notifications": []}
+
+            if not persist or result["state"] == "FAULT":
+                (model_state, self.model.withdrawals, self.model.settled_withdrawals, self.pending_gas,
+                 self.claimed_gas) = snapshot
+                self.model.total_supply = model_state["total_supply"]
+                self.model.burger_supply = model_state["burger_supply"]
+                self.model.balances = model_state["balances"]
+            return result
+
+    def handle(self, method: str, params: list) -> Any:
+        """
+        Handles a JSON-RPC request.
+        """
+        if method == "getblockcount":
+            return self.height
+
+        if method == "getblock":
+            return self.blocks[params[0]]
+
+        if method == "getapplicationlog":
+            if params[0] not in self.application_logs:
+                raise IndexError(params[0])
+            return self.application_logs[params[0]]
+
+        if method == "invokefunction":
+            script_hash, operation = script_hash_from_str(params[0]), params[1]
+            args = [from_parameter(parameter) for parameter in (params[2] if len(params) > 2 else [])]
+            result = self.invoke(script_hash, operation, args, persist=False)
+            if len(params) > 3 and params[3] and result["state"] == "HALT":
+                # the node wallet "signs" the invocation, the stand-in transaction is just the invocation json
+                invocation = {"contract": params[0], "operation": operation, "params": params[2]}
+                result["tx"] = base64.b64encode(json.dumps(invocation).encode()).decode()
+            return result
+
+        if method == "invokescript":
+            try:
+                calls = parse_calls_script(base64.b64decode(params[0]))
+            except ValueError as error:
+                return {"state": "FAULT", "gasconsumed": "0", "stack": [], "exception": str(error),
+                        "notifications": []}
+            return self.invoke_calls(calls, persist=False)
+
+        if method == "sendrawtransaction":
+            return {"hash": self._send(json.loads(base64.b64decode(params[0])))}
+
+        raise KeyError(method)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse their connections
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(request, list):
+            response = [self._respond(single_request) for single_request in request]
+        else:
+            response = self._respond(request)
+
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond(self, request: dict) -> dict:
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            response["result"] = self.server.chain.handle(request["method"], request.get("params", []))
+        except KeyError as error:
+            response["error"] = {"code": -32601, "message": f"Method not found: {error}"}
+        except IndexError:
+            response["error"] = {"code": -100, "message": "Unknown block or transaction"}
+        return response
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInNode:
+    """
+    Serves a `StandInChain` over JSON-RPC from a background thread
+    """
+
+    def __init__(self, chain: Optional[StandInChain] = None, host: str = "127.0.0.1", port: int = 0):
+        self.chain = chain or StandInChain()
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.chain = self.chain
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInNode":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInNode":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
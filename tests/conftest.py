@@ -1,17 +1,58 @@
 import os
 import pytest
 from boa3_test.tests.test_classes.testengine import TestEngine
-from utils.consts import CONTRACTS_DIR_PATH
+from utils.base_test import BaseTest
+from utils.benchmark import GasReport
+from utils.compile import compile_contract, link_stand_ins, script_hash
+from utils.consts import BNEO_STAND_IN_PATH, BUILD_DIR_PATH, CONTRACTS_DIR_PATH, ROOT_DIR
+from utils.profiler import Profiler
 
 
 def list_contracts() -> list:
     """
-    todo
+    Lists the contracts sources under the contracts directory
+    :return: the contracts files names, e.g. ['neo_sandwich.py']
     """
-    return os.listdir(CONTRACTS_DIR_PATH)
+    return sorted(name for name in os.listdir(CONTRACTS_DIR_PATH) if name.endswith('.py'))
 
 def pytest_addoption(parser):
     parser.addoption("--contracts-name", "--cn", action="store", default="neo_sandwich")
+    parser.addoption("--gas-baseline", action="store", default=None,
+                     help="json file holding the GAS benchmarks baseline, "
+                          "defaults to tests/<contracts name>.gas_baseline.json")
+    parser.addoption("--gas-threshold", action="store", type=float, default=0.05,
+                     help="relative growth of a GAS benchmark that fails the test, e.g. 0.05 for 5%%")
+    parser.addoption("--update-gas-baseline", action="store_true", default=False,
+                     help="write the measured GAS benchmarks as the new baseline")
+    parser.addoption("--differential-sequences", action="store", type=int, default=3,
+                     help="number of random sequences replayed against both the model and the contracts")
+    parser.addoption("--differential-length", action="store", type=int, default=20,
+                     help="number of operations in each differential sequence")
+    parser.addoption("--profile", action="store_true", default=False,
+                     help="profile every invocation, writing the profiles to build/profiles/<test name>")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "contracts(name): the test targets the contracts `name`, it only runs when "
+                                       "`--contracts-name` is `name`")
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Deselects the tests marked for another contracts than `--contracts-name`, the unmarked tests are kept
+    """
+    contract_name = config.getoption("contracts_name")
+    selected, deselected = [], []
+    for item in items:
+        marker = item.get_closest_marker("contracts")
+        if marker is not None and marker.args[0] != contract_name:
+            deselected.append(item)
+        else:
+            selected.append(item)
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
 
 
 @pytest.fixture(autouse=True)
@@ -23,10 +64,18 @@ def engine():
     return TestEngine()
 
 
+@pytest.fixture(scope="session")
+def bneo_path() -> str:
+    """
+    Returns the path for the bNEO stand-in contracts
+    """
+    return BNEO_STAND_IN_PATH
+
+
 @pytest.fixture(scope="session", autouse=True)
 def contract_path(pytestconfig) -> str:
     """
-    Returns the path for the tested contracts
+    Returns the path for the tested contracts, linked against the bNEO stand-in
     """
     contract_name = pytestconfig.getoption("contracts_name") + '.py'
     available_contracts = list_contracts()
@@ -34,5 +83,60 @@ def contract_path(pytestconfig) -> str:
     assert contract_name in available_contracts, f"Contract not in available contracts - {available_contracts}"
 
     contract_path_ = os.path.join(CONTRACTS_DIR_PATH, contract_name)
-    return contract_path_
+    return link_stand_ins(contract_path_)
+
+
+@pytest.fixture(scope="session")
+def contract_hash(contract_path) -> bytes:
+    """
+    Returns the script hash of the tested contracts
+    """
+    return script_hash(contract_path)
+
+
+@pytest.fixture(scope="session")
+def funded_builder(pytestconfig, contract_path, contract_hash, bneo_path) -> BaseTest:
+    """
+    Builds the baseline state shared by the session: contracts deployed & holders funded.
+    Tests get their own copy of it through `BaseTest.funded`, it must not be changed directly.
+    """
+    compile_contract(contract_path, debug=True)
+    compile_contract(bneo_path)
+
+    builder = BaseTest()
+    builder.engine = TestEngine()
+    builder.contract_path = contract_path
+    builder.contract_hash = contract_hash
+    builder.bneo_path = bneo_path
+    builder.profiles = []
+    if pytestconfig.getoption("profile"):
+        builder.profiler = Profiler()
+    builder.fund()
+
+    return builder
+
+
+@pytest.fixture(scope="session")
+def funded_engine(funded_builder) -> TestEngine:
+    """
+    The engine of the session's baseline state, see `funded_builder`
+    """
+    return funded_builder.engine
+
+
+@pytest.fixture(scope="session")
+def gas_report(pytestconfig):
+    """
+    Collects the GAS benchmarks of the session, writing them to the build directory when the session ends
+    """
+    contract_name = pytestconfig.getoption("contracts_name")
+    baseline_path = pytestconfig.getoption("gas_baseline") or \
+        os.path.join(ROOT_DIR, "tests", f"{contract_name}.gas_baseline.json")
+
+    report = GasReport(baseline_path, pytestconfig.getoption("gas_threshold"),
+                       pytestconfig.getoption("update_gas_baseline"))
+    yield report
 
+    report.save(os.path.join(BUILD_DIR_PATH, f"{contract_name}.gas_report.json"))
+    if pytestconfig.getoption("update_gas_baseline"):
+        report.update_baseline()
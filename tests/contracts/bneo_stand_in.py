@@ -0,0 +1,125 @@
+from typing import Any, cast
+
+from boa3.builtin import NeoMetadata, metadata, public
+from boa3.builtin.contract import Nep17TransferEvent
+from boa3.builtin.interop.blockchain import get_contract
+from boa3.builtin.interop.contract import GAS, NEO, call_contract
+from boa3.builtin.interop.runtime import calling_script_hash, check_witness, executing_script_hash
+from boa3.builtin.interop.storage import delete, get, put
+from boa3.builtin.type import UInt160
+
+
+@metadata
+def manifest_metadata() -> NeoMetadata:
+    """
+    Defines this smart contracts's metadata information
+    """
+    meta = NeoMetadata()
+    meta.supported_standards = ["NEP-17"]
+    meta.author = "Neo Sandwich"
+    meta.description = "Test stand-in for the bNEO token, do not deploy."
+    meta.email = ""
+    return meta
+
+
+# total supply storage key
+SUPPLY_KEY = "totalSupply"
+
+# bNEO minted per wrapped NEO, NEO being indivisible
+BURGERS_PER_NEO = 100_000_000
+
+
+@public
+def symbol() -> str:
+    return "bNEO"
+
+
+@public
+def decimals() -> int:
+    return 8
+
+
+@public
+def totalSupply() -> int:
+    return get(SUPPLY_KEY).to_int()
+
+
+@public
+def balanceOf(account: UInt160) -> int:
+    assert len(account) == 20
+    return get(account).to_int()
+
+
+@public
+def transfer(from_address: UInt160, to_address: UInt160, amount: int, data: Any) -> bool:
+    """
+    Plain NEP-17 transfer, calling `onNEP17Payment` when the receiver is a smart contracts.
+    Transferring to bNEO itself is how holders claim their GAS, the stand-in pays all of its GAS balance.
+    """
+    assert len(from_address) == 20 and len(to_address) == 20
+    assert amount >= 0
+
+    from_balance = get(from_address).to_int()
+    if from_balance < amount:
+        return False
+
+    if from_address != calling_script_hash:
+        if not check_witness(from_address):
+            return False
+
+    if from_address != to_address and amount != 0:
+        if from_balance == amount:
+            delete(from_address)
+        else:
+            put(from_address, from_balance - amount)
+
+        put(to_address, get(to_address).to_int() + amount)
+
+    Nep17TransferEvent(from_address, to_address, amount)
+
+    if to_address == executing_script_hash:
+        claimed_gas = cast(int, call_contract(GAS, "balanceOf", [executing_script_hash]))
+        if claimed_gas > 0:
+            call_contract(GAS, "transfer", [executing_script_hash, from_address, claimed_gas, None])
+        return True
+
+    contract = get_contract(to_address)
+    if not isinstance(contract, None):  # TODO: change to 'is not None' when `is` semantic is implemented
+        call_contract(to_address, "onNEP17Payment", [from_address, amount, data])
+
+    return True
+
+
+@public
+def mint(account: UInt160, amount: int):
+    """
+    Test helper, credits `amount` bNEO to `account` without any backing.
+    """
+    assert len(account) == 20
+    assert amount > 0
+
+    put(SUPPLY_KEY, totalSupply() + amount)
+    put(account, get(account).to_int() + amount)
+
+    Nep17TransferEvent(None, account, amount)
+
+
+@public
+def onNEP17Payment(from_address: UInt160, amount: int, data: Any):
+    """
+    Wraps NEO: mints 1 bNEO per NEO to the sender, calling its `onNEP17Payment` when it's a smart contracts.
+    GAS is accepted as is, it's generated by the wrapped NEO.
+    """
+    if calling_script_hash == GAS:
+        return
+    assert calling_script_hash == NEO
+    burgers = amount * BURGERS_PER_NEO
+
+    put(SUPPLY_KEY, totalSupply() + burgers)
+    put(from_address, get(from_address).to_int() + burgers)
+
+    Nep17TransferEvent(None, from_address, burgers)
+
+    contract = get_contract(from_address)
+    if not isinstance(contract, None):  # TODO: change to 'is not None' when `is` semantic is implemented
+        call_contract(from_address, "onNEP17Payment", [None, burgers, None])
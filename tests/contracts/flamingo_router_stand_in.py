@@ -0,0 +1,63 @@
+from typing import Any, List, cast
+
+from boa3.builtin import NeoMetadata, metadata, public
+from boa3.builtin.interop.contract import call_contract
+from boa3.builtin.interop.runtime import executing_script_hash, time
+from boa3.builtin.interop.storage import get, put
+from boa3.builtin.type import UInt160
+
+
+@metadata
+def manifest_metadata() -> NeoMetadata:
+    """
+    Defines this smart contracts's metadata information
+    """
+    meta = NeoMetadata()
+    meta.author = "Neo Sandwich"
+    meta.description = "Test stand-in for the Flamingo swap router, do not deploy."
+    meta.email = ""
+    return meta
+
+
+# storage keys of the swap rate, amount out = amount in * numerator // denominator
+RATE_NUMERATOR_KEY = "rateNumerator"
+RATE_DENOMINATOR_KEY = "rateDenominator"
+
+# storage key of the rate actually paid by swaps, lower than the quoted one to simulate slippage
+PAID_RATE_NUMERATOR_KEY = "paidRateNumerator"
+
+
+@public
+def setRate(numerator: int, denominator: int, paid_numerator: int):
+    """
+    Test helper, sets the quoted swap rate & the rate swaps actually pay.
+    """
+    put(RATE_NUMERATOR_KEY, numerator)
+    put(RATE_DENOMINATOR_KEY, denominator)
+    put(PAID_RATE_NUMERATOR_KEY, paid_numerator)
+
+
+@public
+def getAmountsOut(amount_in: int, paths: List[UInt160]) -> List[int]:
+    return [amount_in, amount_in * get(RATE_NUMERATOR_KEY).to_int() // get(RATE_DENOMINATOR_KEY).to_int()]
+
+
+@public
+def swapTokenInForTokenOut(sender: UInt160, amount_in: int, amount_out_min: int, paths: List[UInt160],
+                           deadline: int) -> bool:
+    """
+    Pulls `amount_in` of paths[0] from `sender` and pays paths[1] at the paid rate, from the stand-in own balance.
+    """
+    assert deadline >= time
+
+    amount_out = amount_in * get(PAID_RATE_NUMERATOR_KEY).to_int() // get(RATE_DENOMINATOR_KEY).to_int()
+    assert amount_out >= amount_out_min
+
+    assert cast(bool, call_contract(paths[0], "transfer", [sender, executing_script_hash, amount_in, None]))
+    assert cast(bool, call_contract(paths[1], "transfer", [executing_script_hash, sender, amount_out, None]))
+    return True
+
+
+@public
+def onNEP17Payment(from_address: UInt160, amount: int, data: Any):
+    pass
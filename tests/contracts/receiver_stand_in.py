@@ -0,0 +1,24 @@
+from typing import Any
+
+from boa3.builtin import NeoMetadata, metadata, public
+from boa3.builtin.type import UInt160
+
+
+@metadata
+def manifest_metadata() -> NeoMetadata:
+    """
+    Defines this smart contracts's metadata information
+    """
+    meta = NeoMetadata()
+    meta.author = "Neo Sandwich"
+    meta.description = "Test stand-in for a contracts receiving NEP-17 tokens, do not deploy."
+    meta.email = ""
+    return meta
+
+
+@public
+def onNEP17Payment(from_address: UInt160, amount: int, data: Any):
+    """
+    Accepts any NEP-17 token.
+    """
+    pass
@@ -0,0 +1,54 @@
+from typing import Any, cast
+
+from boa3.builtin import NeoMetadata, metadata, public
+from boa3.builtin.contract import abort
+from boa3.builtin.interop.contract import call_contract
+from boa3.builtin.interop.runtime import executing_script_hash
+from boa3.builtin.interop.storage import get, put
+from boa3.builtin.type import UInt160
+
+
+@metadata
+def manifest_metadata() -> NeoMetadata:
+    """
+    Defines this smart contracts's metadata information
+    """
+    meta = NeoMetadata()
+    meta.author = "Neo Sandwich"
+    meta.description = "Test stand-in for a contracts that can reject NEP-17 payments, do not deploy."
+    meta.email = ""
+    return meta
+
+
+# storage key of the flag making `onNEP17Payment` abort
+REJECTING_KEY = b"r"
+
+
+@public
+def setRejecting(rejecting: bool):
+    put(REJECTING_KEY, 1 if rejecting else 0)
+
+
+@public
+def onNEP17Payment(from_address: UInt160, amount: int, data: Any):
+    """
+    Accepts any NEP-17 token, unless `setRejecting` was set.
+    """
+    if get(REJECTING_KEY).to_int() != 0:
+        abort()
+
+
+@public
+def requestWithdraw(sandwich: UInt160, amount: int) -> int:
+    """
+    Requests a withdrawal of the sNEO held by this contracts.
+    """
+    return cast(int, call_contract(sandwich, "requestWithdraw", [executing_script_hash, amount]))
+
+
+@public
+def claimWithdrawal(sandwich: UInt160) -> int:
+    """
+    Claims the settled withdrawals credited to this contracts.
+    """
+    return cast(int, call_contract(sandwich, "claimWithdrawal", [executing_script_hash]))
@@ -0,0 +1,55 @@
+from typing import Any, List, cast
+
+from boa3.builtin import CreateNewEvent, NeoMetadata, metadata, public
+from boa3.builtin.interop.contract import call_contract
+from boa3.builtin.type import UInt160
+
+
+@metadata
+def manifest_metadata() -> NeoMetadata:
+    """
+    Defines this smart contracts's metadata information
+    """
+    meta = NeoMetadata()
+    meta.author = "Neo Sandwich"
+    meta.description = "Test driver running many sNEO operations in a single invocation, do not deploy."
+    meta.email = ""
+    return meta
+
+
+# emitted after every operation, so the scenario notifications can be split by operation
+on_operation = CreateNewEvent(
+    [
+        ('index', int),
+    ],
+    'Operation'
+)
+
+
+@public
+def run(sandwich: UInt160, burger: UInt160, operations: List[List[Any]]) -> List[Any]:
+    """
+    Runs the operations in order, each one being `[method, [arguments]]`.
+    `deposit` operations (`[account, amount]`) mint the bNEO to the account & transfer it to the sNEO contracts,
+    the other ones call the sNEO method. The accounts must sign with a global scope.
+    :param sandwich: the sNEO contracts script hash
+    :param burger: the bNEO stand-in script hash
+    :param operations: the operations to run
+    :return: the result of every operation
+    """
+    results: List[Any] = []
+    index = 0
+    for operation in operations:
+        method = cast(str, operation[0])
+        arguments = cast(List[Any], operation[1])
+
+        if method == "deposit":
+            call_contract(burger, "mint", [arguments[0], arguments[1]])
+            results.append(call_contract(burger, "transfer", [arguments[0], sandwich, arguments[1], None]))
+        else:
+            results.append(call_contract(sandwich, method, arguments))
+
+        on_operation(index)
+        index += 1
+
+    return results
@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+from offchain.client import AsyncSandwichClient, SandwichClient
+from offchain.consts import BNEO_HASH
+from offchain.rpc import AsyncRpcClient, RpcClient, RpcError
+from offchain.stand_in_node import StandInChain, StandInNode
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+HOLDER_1 = bytes(range(20))
+HOLDER_2 = bytes(range(20, 40))
+
+
+@pytest.fixture
+def node():
+    with StandInNode(StandInChain()) as node_:
+        yield node_
+
+
+@pytest.fixture
+def requests(node):
+    """
+    The JSON-RPC methods the node served, in order
+    """
+    methods = []
+    handle = node.chain.handle
+
+    def record(method, params):
+        methods.append(method)
+        return handle(method, params)
+
+    node.chain.handle = record
+    return methods
+
+
+@pytest.fixture
+def rpc(node):
+    client = RpcClient(node.url)
+    yield client
+    client.close()
+
+
+def deposit(node: StandInNode, account: bytes, amount: int):
+    node.chain.execute(BNEO_HASH, "transfer", account, node.chain.sandwich_hash, amount, None)
+
+
+def test_client_caches_constants(node, rpc, requests):
+    """
+    Verify `symbol` & `decimals` are read once.
+    """
+    client = SandwichClient(rpc, node.chain.sandwich_hash)
+    for _ in range(3):
+        assert client.symbol() == "sNEO"
+        assert client.decimals() == 8
+
+    assert requests == ["invokefunction", "invokefunction"]
+
+
+def test_client_caches_supplies_per_block(node, rpc, requests):
+    """
+    Verify the supplies are read once per block height, and the least recently used heights are evicted.
+    """
+    chain = node.chain
+    client = SandwichClient(rpc, chain.sandwich_hash, max_cached_blocks=2)
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    chain.mine()
+
+    assert client.supplies() == (10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER)
+    assert client.total_supply() == 10 * DECIMALS_MULTIPLIER
+    assert client.burger_supply() == 10 * DECIMALS_MULTIPLIER
+    assert requests == ["getblockcount", "invokescript", "getblockcount", "getblockcount"]
+
+    # a new block reads the supplies again
+    deposit(node, HOLDER_2, 5 * DECIMALS_MULTIPLIER)
+    chain.mine()
+    requests.clear()
+    assert client.total_supply() == 15 * DECIMALS_MULTIPLIER
+    assert requests == ["getblockcount", "invokescript"]
+    assert client.cached_heights() == [chain.height - 1, chain.height]
+
+    chain.mine()
+    client.supplies()
+    assert client.cached_heights() == [chain.height - 1, chain.height]
+
+
+def test_client_caches_supplies_at_read_height(node, rpc):
+    """
+    Verify supplies read after a new block is added to the one `getblockcount` returned are cached under the new block.
+    """
+    chain = node.chain
+    client = SandwichClient(rpc, chain.sandwich_hash)
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    chain.mine()
+    stale_height = chain.height
+    handle = chain.handle
+
+    def add_block_after_count(method, params):
+        result = handle(method, params)
+        if method == "getblockcount":
+            deposit(node, HOLDER_2, 5 * DECIMALS_MULTIPLIER)
+            chain.mine()
+        return result
+
+    chain.handle = add_block_after_count
+    assert client.supplies() == (15 * DECIMALS_MULTIPLIER, 15 * DECIMALS_MULTIPLIER)
+    assert client.cached_heights() == [stale_height + 1]
+
+
+def test_client_read_many(node, rpc, requests):
+    """
+    Verify many reads run in a single `invokescript` request, FAULTing together.
+    """
+    chain = node.chain
+    client = SandwichClient(rpc, chain.sandwich_hash)
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    deposit(node, HOLDER_2, 5 * DECIMALS_MULTIPLIER)
+
+    results = client.read_many([
+        ("balanceOf", HOLDER_1),
+        ("balancesOf", [HOLDER_2, bytes(20)]),
+        ("getState",),
+        ("symbol",),
+    ])
+
+    assert results == [
+        10 * DECIMALS_MULTIPLIER,
+        [5 * DECIMALS_MULTIPLIER, 0],
+        [15 * DECIMALS_MULTIPLIER, 15 * DECIMALS_MULTIPLIER, DECIMALS_MULTIPLIER, 8],
+        b"sNEO",
+    ]
+    assert requests == ["invokescript"]
+
+    with pytest.raises(RpcError):
+        client.read_many([("balanceOf", HOLDER_1), ("unknownMethod",)])
+    assert client.read_many([]) == []
+
+
+def test_async_client(node):
+    """
+    Verify the async client shares the caches & connections pool of the sync one.
+    """
+    chain = node.chain
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    chain.mine()
+    rpc = AsyncRpcClient(node.url, pool_size=2)
+    client = AsyncSandwichClient(rpc, chain.sandwich_hash)
+
+    async def read():
+        return await asyncio.gather(
+            client.symbol(),
+            client.decimals(),
+            client.supplies(),
+            client.balance_of(HOLDER_1),
+            client.read_many([("balanceOf", HOLDER_1), ("totalSupply",)]),
+            *[client.total_supply() for _ in range(8)],
+        )
+
+    try:
+        results = asyncio.run(read())
+    finally:
+        rpc.close()
+
+    assert results[:5] == ["sNEO", 8, (10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER), 10 * DECIMALS_MULTIPLIER,
+                           [10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER]]
+    assert results[5:] == [10 * DECIMALS_MULTIPLIER] * 8
+    assert client.client.cached_heights() == [chain.height]
@@ -0,0 +1,227 @@
+import json
+import os
+
+import pytest
+from utils.base_test import BaseTest
+from utils.compile import compile_contract, link_stand_ins, script_hash
+from utils.consts import TEST_CONTRACTS_DIR_PATH
+from utils.nef import count_method_instructions, load_debug_info, read_nef_script
+from utils.profiler import Profiler
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+RECEIVER_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'receiver_stand_in.py')
+# neo_sandwich.py right before & right after packing its supplies & prefixing its balances
+FORMER_LAYOUT_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'neo_sandwich_former_layout_stand_in.py')
+PACKED_LAYOUT_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'neo_sandwich_packed_layout_stand_in.py')
+# storage key of the bNEO supply in the former layout
+FORMER_BURGER_SUPPLY_KEY = b"burgerSupply"
+
+# price of a System.Storage.Get with the default execution fee factor, in datoshi
+STORAGE_GET_PRICE = (1 << 15) * 30
+
+
+@pytest.mark.contracts("neo_sandwich")
+class TestGasBenchmarks(BaseTest):
+    """
+    GAS benchmarks of the public contracts methods.
+
+    Every scenario is recorded to `build/<contracts name>.gas_report.json` and compared against
+    `tests/<contracts name>.gas_baseline.json`, failing when it grows past `--gas-threshold` or isn't in the baseline.
+    Run with `--update-gas-baseline` to accept the new numbers.
+    """
+    HOLDER_1 = bytes(range(20))
+    HOLDER_2 = bytes(range(20, 40))
+    HOLDER_3 = bytes(range(40, 60))
+
+    @pytest.fixture(autouse=True)
+    def setup_report(self, gas_report):
+        self.gas_report = gas_report
+
+    def benchmark(self, scenario: str, method: str, *args, contract_path: str = None, **kwargs):
+        """
+        Invokes a contracts method and records the GAS it consumed.
+        :param scenario: unique name of the scenario
+        :param method: the contracts method name
+        :param contract_path: the invoked contracts, defaults to the tested contracts
+        :return: The returned value from contracts.
+        """
+        contract_path = contract_path or self.contract_path
+        result = self.run_smart_contract(self.engine, contract_path, method, *args, **kwargs)
+
+        script = read_nef_script(self.contract_path.replace('.py', '.nef'))
+        method_instructions = count_method_instructions(script, load_debug_info(self.contract_path))
+        contract_method = "onNEP17Payment" if contract_path == self.bneo_path else method
+        self.gas_report.record(scenario, contract_method, self.engine.gas_consumed,
+                               method_instructions[contract_method])
+
+        regression = self.gas_report.regression(scenario)
+        if regression is not None:
+            pytest.fail(regression)
+        return result
+
+    def benchmark_deposit(self, scenario: str, account: bytes, amount: int):
+        """
+        Benchmarks a deposit, i.e. the bNEO transfer that triggers `onNEP17Payment`.
+        The measured GAS includes the bNEO stand-in transfer.
+        """
+        self.add_contract(self.contract_path.replace('.py', '.nef'))
+        self.call_bneo("mint", account, amount)
+        return self.benchmark(scenario, "transfer", account, self.contract_hash, amount, None,
+                              contract_path=self.bneo_path, signer_accounts=[account], expected_result_type=bool)
+
+    def test_deploy(self):
+        self.assertEqual(True, self.benchmark("deploy", "deploy", signer_accounts=[self.OWNER_SCRIPT_HASH]))
+
+    def test_balance_of(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(DECIMALS_MULTIPLIER, self.benchmark("balanceOf", "balanceOf", self.HOLDER_1))
+
+    def test_first_deposit(self):
+        self.deploy()
+        self.assertEqual(True, self.benchmark_deposit("onNEP17Payment first deposit", self.HOLDER_1,
+                                                      DECIMALS_MULTIPLIER))
+
+    def test_deposit_with_existing_supply(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(True, self.benchmark_deposit("onNEP17Payment existing supply", self.HOLDER_2,
+                                                      DECIMALS_MULTIPLIER))
+
+    def test_full_burn(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.benchmark("burn full balance", "burn", self.HOLDER_1, DECIMALS_MULTIPLIER,
+                       signer_accounts=[self.HOLDER_1])
+        self.assertEqual(0, self.call_method("balanceOf", self.HOLDER_1))
+
+    def test_partial_burn(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.benchmark("burn partial balance", "burn", self.HOLDER_1, DECIMALS_MULTIPLIER // 2,
+                       signer_accounts=[self.HOLDER_1])
+        self.assertEqual(DECIMALS_MULTIPLIER // 2, self.call_method("balanceOf", self.HOLDER_1))
+
+    def test_transfer_to_account(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(True, self.benchmark("transfer to account", "transfer", self.HOLDER_1, self.HOLDER_2,
+                                              DECIMALS_MULTIPLIER, None, signer_accounts=[self.HOLDER_1],
+                                              expected_result_type=bool))
+
+    def test_transfer_to_self(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(True, self.benchmark("transfer to self", "transfer", self.HOLDER_1, self.HOLDER_1,
+                                              DECIMALS_MULTIPLIER, None, signer_accounts=[self.HOLDER_1],
+                                              expected_result_type=bool))
+
+    def test_transfer_zero_amount(self):
+        self.deploy()
+        self.assertEqual(True, self.benchmark("transfer zero amount", "transfer", self.HOLDER_1, self.HOLDER_2, 0,
+                                              None, signer_accounts=[self.HOLDER_1], expected_result_type=bool))
+
+    def test_transfer_without_witness(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(False, self.benchmark("transfer without witness", "transfer", self.HOLDER_1, self.HOLDER_2,
+                                               DECIMALS_MULTIPLIER, None, expected_result_type=bool))
+
+    def test_transfer_no_ops_cheaper(self):
+        """
+        Verify a zero amount transfer & a transfer without witness, which skip the balances storage, cost less than a
+        real transfer.
+        """
+        self.deploy()
+        self.deposit(self.HOLDER_1, 2 * DECIMALS_MULTIPLIER)
+
+        self.call_method("transfer", self.HOLDER_1, self.HOLDER_2, DECIMALS_MULTIPLIER, None,
+                         signer_accounts=[self.HOLDER_1], expected_result_type=bool)
+        transfer_gas = self.engine.gas_consumed
+
+        self.assertEqual(True, self.call_method("transfer", self.HOLDER_1, self.HOLDER_2, 0, None,
+                                                signer_accounts=[self.HOLDER_1], expected_result_type=bool))
+        self.assertLess(self.engine.gas_consumed, transfer_gas)
+
+        self.assertEqual(False, self.call_method("transfer", self.HOLDER_1, self.HOLDER_2, DECIMALS_MULTIPLIER, None,
+                                                 expected_result_type=bool))
+        self.assertLess(self.engine.gas_consumed, transfer_gas)
+
+    def benchmark_layout_method(self, layout: str, contract_path: str, method: str):
+        """
+        Records the GAS the last invocation spent in a method of a storage layout stand-in, its callees included.
+        """
+        with open(contract_path.replace('.py', '.manifest.json')) as manifest_file:
+            contract_name = json.load(manifest_file)["name"]
+        method_instructions = count_method_instructions(read_nef_script(contract_path.replace('.py', '.nef')),
+                                                        load_debug_info(contract_path))
+
+        scenario = f"{method} {layout} layout"
+        gas = self.profiles[-1].method_gas(contract_name, method)
+        self.gas_report.record(scenario, method, gas, method_instructions[method])
+        regression = self.gas_report.regression(scenario)
+        if regression is not None:
+            pytest.fail(regression)
+        return gas
+
+    def test_storage_layouts(self):
+        """
+        Benchmarks onNEP17Payment, mint, burn & transfer of neo_sandwich.py right before & right after packing its
+        supplies & prefixing its balances: packing makes deposits & burns cheaper, and the balance prefix costs a
+        transfer less than a storage read. The measured savings are kept in `tests/storage_layout_gas.json`.
+        """
+        # mint is an internal method, the GAS of the methods is taken from the invocations profiles
+        if self.profiler is None:
+            self.profiler = Profiler()
+        for holder in (self.HOLDER_1, self.HOLDER_2):
+            self.call_bneo("mint", holder, 2 * DECIMALS_MULTIPLIER)
+
+        gas = {}
+        for layout, contract_path in (("former", FORMER_LAYOUT_PATH), ("packed", PACKED_LAYOUT_PATH)):
+            contract_path = link_stand_ins(contract_path)
+            self.add_contract(compile_contract(contract_path, debug=True))
+            layout_hash = script_hash(contract_path)
+            self.run_smart_contract(self.engine, contract_path, "deploy", signer_accounts=[self.OWNER_SCRIPT_HASH])
+
+            self.call_bneo("transfer", self.HOLDER_1, layout_hash, DECIMALS_MULTIPLIER, None,
+                           signer_accounts=[self.HOLDER_1], expected_result_type=bool)
+            if layout == "former":
+                # the former layout never wrote the bNEO supply, the next deposit would divide by zero
+                self.storage_put(FORMER_BURGER_SUPPLY_KEY, DECIMALS_MULTIPLIER, contract_path)
+
+            self.call_bneo("transfer", self.HOLDER_2, layout_hash, DECIMALS_MULTIPLIER, None,
+                           signer_accounts=[self.HOLDER_2], expected_result_type=bool)
+            gas[layout] = [self.benchmark_layout_method(layout, contract_path, "onNEP17Payment"),
+                           self.benchmark_layout_method(layout, contract_path, "mint")]
+
+            self.run_smart_contract(self.engine, contract_path, "burn", self.HOLDER_1, DECIMALS_MULTIPLIER // 2,
+                                    signer_accounts=[self.HOLDER_1])
+            gas[layout].append(self.benchmark_layout_method(layout, contract_path, "burn"))
+
+            self.assertEqual(True, self.run_smart_contract(self.engine, contract_path, "transfer", self.HOLDER_1,
+                                                           self.HOLDER_3, DECIMALS_MULTIPLIER // 4, None,
+                                                           signer_accounts=[self.HOLDER_1], expected_result_type=bool))
+            gas[layout].append(self.benchmark_layout_method(layout, contract_path, "transfer"))
+
+        (deposit_before, mint_before, burn_before, transfer_before), \
+            (deposit_after, mint_after, burn_after, transfer_after) = gas["former"], gas["packed"]
+        self.assertLess(deposit_after, deposit_before)
+        self.assertLess(mint_after, mint_before)
+        self.assertLess(burn_after, burn_before)
+        self.assertLess(transfer_after - transfer_before, STORAGE_GET_PRICE)
+
+    def test_transfer_to_contract(self):
+        self.add_contract(compile_contract(RECEIVER_PATH))
+        receiver_hash = script_hash(RECEIVER_PATH)
+
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(True, self.benchmark("transfer to contract", "transfer", self.HOLDER_1, receiver_hash,
+                                              DECIMALS_MULTIPLIER, None, signer_accounts=[self.HOLDER_1],
+                                              expected_result_type=bool))
+
+    def test_claim_gas(self):
+        self.deploy()
+        self.deposit(self.HOLDER_1, DECIMALS_MULTIPLIER)
+        self.benchmark("claim_gas", "claim_gas")
@@ -0,0 +1,83 @@
+import pytest
+from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
+from utils.base_test import BaseTest
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+MIN_HARVEST_GAS = DECIMALS_MULTIPLIER
+
+
+@pytest.mark.contracts("neo_sandwich")
+@pytest.mark.usefixtures("funded")
+class TestHarvest(BaseTest):
+    """
+    Testing suite for compounding the yield with neo_sandwich.py `harvest`.
+    """
+    OTHER_ACCOUNT_1 = bytes(range(20))
+
+    def test_harvest(self):
+        """
+        Verify harvest swaps the claimed GAS & adds the bNEO to the pool without minting sNEO.
+        """
+        total_supply = self.call_method("totalSupply")
+        burger_supply = self.call_method("burgerSupply")
+        events_before = len(self.engine.get_events("Transfer", origin=self.contract_hash))
+
+        burgers_out = self.harvest(10 * DECIMALS_MULTIPLIER, rate=5)
+        self.assertEqual(DECIMALS_MULTIPLIER // 2, burgers_out)
+
+        self.assertEqual(total_supply, self.call_method("totalSupply"))
+        self.assertEqual(burger_supply + burgers_out, self.call_method("burgerSupply"))
+        self.assertEqual(burger_supply + burgers_out, self.call_bneo("balanceOf", self.contract_hash))
+        self.assertEqual(events_before, len(self.engine.get_events("Transfer", origin=self.contract_hash)))
+
+        # the Harvest event carries the swapped GAS, the bought bNEO & both supplies after the harvest
+        harvest_event = self.engine.get_events("Harvest", origin=self.contract_hash)[-1]
+        self.assertEqual([10 * DECIMALS_MULTIPLIER, burgers_out, total_supply, burger_supply + burgers_out],
+                         list(harvest_event.arguments))
+
+    def test_deposit_after_harvest(self):
+        """
+        Verify deposits after a harvest mint at the increased ratio.
+        """
+        total_supply = self.call_method("totalSupply")
+        burgers_out = self.harvest(10 * DECIMALS_MULTIPLIER, rate=50)
+        burger_supply = self.call_method("burgerSupply")
+
+        self.deposit(self.OTHER_ACCOUNT_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(DECIMALS_MULTIPLIER * total_supply // burger_supply,
+                         self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertLess(self.call_method("balanceOf", self.OTHER_ACCOUNT_1), DECIMALS_MULTIPLIER)
+        self.assertGreater(burgers_out, 0)
+
+    def test_harvest_below_minimum_swap(self):
+        """
+        Verify small GAS amounts are claimed but kept for a later harvest.
+        """
+        burger_supply = self.call_method("burgerSupply")
+        self.assertEqual(0, self.harvest(MIN_HARVEST_GAS - 1))
+        self.assertEqual(burger_supply, self.call_method("burgerSupply"))
+
+        # the next harvest swaps the kept GAS as well
+        self.assertEqual(MIN_HARVEST_GAS * 2 - 1, self.harvest(MIN_HARVEST_GAS))
+
+    def test_harvest_slippage(self):
+        """
+        Verify the swap is reverted when paying too far below the quote, or below the given minimum.
+        """
+        burger_supply = self.call_method("burgerSupply")
+
+        with self.assertRaises(TestExecutionException):
+            self.harvest(100 * DECIMALS_MULTIPLIER, rate=100, paid_rate=99)
+
+        with self.assertRaises(TestExecutionException):
+            self.harvest(100 * DECIMALS_MULTIPLIER, rate=100, min_burgers_out=101 * DECIMALS_MULTIPLIER)
+
+        self.assertEqual(burger_supply, self.call_method("burgerSupply"))
+
+    def test_harvest_only_owner(self):
+        """
+        Verify only the owner can harvest.
+        """
+        with self.assertRaises(TestExecutionException):
+            self.call_method("harvest", 0, signer_accounts=[self.OTHER_ACCOUNT_1])
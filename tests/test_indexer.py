@@ -0,0 +1,178 @@
+import random
+
+import pytest
+from offchain.consts import BNEO_HASH
+from offchain.indexer import MILLISECONDS_PER_YEAR, Indexer
+from offchain.rpc import RpcClient
+from offchain.stand_in_node import BLOCK_TIME, GENESIS_TIME, StandInChain, StandInNode
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+HOLDER_1 = bytes(range(20))
+HOLDER_2 = bytes(range(20, 40))
+
+
+@pytest.fixture
+def node():
+    with StandInNode(StandInChain(rate=5)) as node_:
+        yield node_
+
+
+@pytest.fixture
+def rpc(node):
+    client = RpcClient(node.url)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return str(tmp_path / "index.sqlite3")
+
+
+def deposit(node: StandInNode, account: bytes, amount: int):
+    node.chain.execute(BNEO_HASH, "transfer", account, node.chain.sandwich_hash, amount, None)
+
+
+def test_indexer_holders_and_supplies(node, rpc, database_path):
+    """
+    Verify the indexed holders & supplies match the chain state.
+    """
+    chain = node.chain
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    chain.mine()
+    deposit(node, HOLDER_2, 5 * DECIMALS_MULTIPLIER)
+    chain.execute(chain.sandwich_hash, "transfer", HOLDER_1, HOLDER_2, 2 * DECIMALS_MULTIPLIER, None)
+    chain.mine(generated_gas=100 * DECIMALS_MULTIPLIER)
+    chain.execute(chain.sandwich_hash, "harvest", 0)
+    chain.execute(chain.sandwich_hash, "burn", HOLDER_2, 7 * DECIMALS_MULTIPLIER)
+    chain.mine()
+
+    with Indexer(rpc, chain.sandwich_hash, database_path) as indexer:
+        assert indexer.sync() == chain.height
+        assert indexer.holders() == [(HOLDER_1, 8 * DECIMALS_MULTIPLIER)]
+        assert indexer.balance_of(HOLDER_2) == 0
+        assert indexer.supplies_at() == (chain.model.total_supply, chain.model.burger_supply)
+
+        # the history is kept per block
+        assert indexer.supplies_at(0) == (0, 0)
+        assert indexer.supplies_at(1) == (10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER)
+        assert indexer.supplies_at(2) == (15 * DECIMALS_MULTIPLIER, 15 * DECIMALS_MULTIPLIER)
+
+
+def test_indexer_deposit_for_beneficiary(node, rpc, database_path):
+    """
+    Verify a deposit routed through its `data` is indexed under the beneficiary.
+    """
+    chain = node.chain
+    chain.execute(BNEO_HASH, "transfer", HOLDER_1, chain.sandwich_hash, 10 * DECIMALS_MULTIPLIER, HOLDER_2)
+    chain.execute(BNEO_HASH, "transfer", HOLDER_1, chain.sandwich_hash, 5 * DECIMALS_MULTIPLIER, [HOLDER_1, b"data"])
+    chain.mine()
+
+    with Indexer(rpc, chain.sandwich_hash, database_path) as indexer:
+        indexer.sync()
+        assert indexer.holders() == [(HOLDER_2, 10 * DECIMALS_MULTIPLIER), (HOLDER_1, 5 * DECIMALS_MULTIPLIER)]
+
+
+def test_indexer_pool_events(node, rpc, database_path):
+    """
+    Verify the deposits, withdrawals & harvests are indexed with the supplies after each of them, queued withdrawals
+    leaving the pool before their bNEO are paid.
+    """
+    chain = node.chain
+    deposit(node, HOLDER_1, 10 * DECIMALS_MULTIPLIER)
+    chain.mine(generated_gas=100 * DECIMALS_MULTIPLIER)
+    chain.execute(chain.sandwich_hash, "harvest", 0)
+    chain.execute(chain.sandwich_hash, "requestWithdraw", HOLDER_1, 4 * DECIMALS_MULTIPLIER)
+    chain.mine()
+    state_before_settlement = (chain.model.total_supply, chain.model.burger_supply)
+    chain.execute(chain.sandwich_hash, "settleWithdrawals", 1)
+    chain.mine()
+
+    with Indexer(rpc, chain.sandwich_hash, database_path) as indexer:
+        indexer.sync()
+        events = indexer.pool_events()
+        assert [event[2] for event in events] == ["Deposit", "Harvest", "Withdraw"]
+        assert events[0][3:] == (HOLDER_1, 10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER,
+                                 10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER)
+        assert events[1][3:] == (None, 5 * DECIMALS_MULTIPLIER, 0, 10 * DECIMALS_MULTIPLIER, 15 * DECIMALS_MULTIPLIER)
+        assert events[2][3:] == (HOLDER_1, 6 * DECIMALS_MULTIPLIER, 4 * DECIMALS_MULTIPLIER,
+                                 6 * DECIMALS_MULTIPLIER, 9 * DECIMALS_MULTIPLIER)
+        assert indexer.pool_events(HOLDER_2) == []
+
+        assert indexer.supplies_at(2) == state_before_settlement
+        assert indexer.supplies_at() == state_before_settlement == (chain.model.total_supply, chain.model.burger_supply)
+
+
+def test_indexer_skips_faulted_transactions(node, rpc, database_path):
+    """
+    Verify FAULTed transactions don't change the index.
+    """
+    chain = node.chain
+    deposit(node, HOLDER_1, DECIMALS_MULTIPLIER)
+    chain.execute(chain.sandwich_hash, "burn", HOLDER_2, DECIMALS_MULTIPLIER)
+    chain.mine()
+
+    with Indexer(rpc, chain.sandwich_hash, database_path) as indexer:
+        indexer.sync()
+        assert indexer.holders() == [(HOLDER_1, DECIMALS_MULTIPLIER)]
+        assert indexer.supplies_at() == (DECIMALS_MULTIPLIER, DECIMALS_MULTIPLIER)
+
+
+def test_indexer_resumes_from_checkpoint(node, rpc, database_path):
+    """
+    Verify a new indexer continues from the stored checkpoint, whatever the batches boundaries.
+    """
+    chain = node.chain
+    rng = random.Random(0)
+    accounts = [bytes([index]) * 20 for index in range(1, 6)]
+
+    def random_blocks(count: int):
+        for _ in range(count):
+            for _ in range(rng.randint(0, 3)):
+                account = rng.choice(accounts)
+                if rng.random() < 0.6:
+                    deposit(node, account, rng.randint(1, 10 * DECIMALS_MULTIPLIER))
+                elif chain.model.balance_of(account) > 0:
+                    chain.execute(chain.sandwich_hash, "transfer", account, rng.choice(accounts),
+                                  rng.randint(0, chain.model.balance_of(account)), None)
+            chain.execute(chain.sandwich_hash, "harvest", 0)
+            chain.mine(generated_gas=rng.randint(0, 2 * DECIMALS_MULTIPLIER))
+
+    random_blocks(30)
+    with Indexer(rpc, chain.sandwich_hash, database_path, batch_size=7) as indexer:
+        assert indexer.sync() == chain.height
+
+    random_blocks(30)
+    with Indexer(rpc, chain.sandwich_hash, database_path, batch_size=4) as indexer:
+        assert indexer.height == 31
+        assert indexer.sync() == chain.height
+        assert dict(indexer.holders()) == chain.model.balances
+        assert indexer.supplies_at() == (chain.model.total_supply, chain.model.burger_supply)
+
+        with pytest.raises(ValueError):
+            indexer.index_blocks(0, 1)
+
+    with pytest.raises(ValueError):
+        Indexer(rpc, bytes(20), database_path)
+
+
+def test_indexer_apy(node, rpc, database_path):
+    """
+    Verify the APY is annualized from the exchange rate growth.
+    """
+    chain = node.chain
+    deposit(node, HOLDER_1, 100 * DECIMALS_MULTIPLIER)
+    chain.mine(blocks=10, generated_gas=100 * DECIMALS_MULTIPLIER)
+    chain.execute(chain.sandwich_hash, "harvest", 0)
+    chain.mine()
+
+    with Indexer(rpc, chain.sandwich_hash, database_path) as indexer:
+        indexer.sync()
+
+        start_time = GENESIS_TIME + BLOCK_TIME
+        end_time = start_time + MILLISECONDS_PER_YEAR
+        # 5 bNEO harvested for 100 bNEO deposited
+        assert indexer.apy(start_time, end_time) == pytest.approx(0.05)
+        assert indexer.apy(start_time, start_time + BLOCK_TIME) == 0
+        assert indexer.apy(0, end_time) == 0
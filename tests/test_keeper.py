@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from offchain.keeper import Keeper, KeeperConfig
+from offchain.rpc import AsyncRpcClient
+from offchain.stand_in_node import StandInChain, StandInNode
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+OWNER = bytes(20)
+
+
+@pytest.fixture
+def node():
+    with StandInNode(StandInChain(rate=5, invocation_gas=5_000_000)) as node_:
+        node_.chain.model.deposit(bytes(range(20)), 1000 * DECIMALS_MULTIPLIER)
+        yield node_
+
+
+def run_tick(node: StandInNode, **config):
+    rpc = AsyncRpcClient(node.url)
+    keeper = Keeper(rpc, KeeperConfig(contract_hash=node.chain.sandwich_hash, owner=OWNER, **config))
+    try:
+        return asyncio.run(keeper.tick())
+    finally:
+        rpc.close()
+
+
+def test_keeper_skips_below_minimum_swap(node):
+    """
+    Verify the keeper doesn't harvest before there's enough GAS to swap.
+    """
+    node.chain.mine(generated_gas=DECIMALS_MULTIPLIER // 2)
+    assert run_tick(node) is None
+    assert node.chain.transactions == []
+
+
+def test_keeper_skips_unprofitable_harvest(node):
+    """
+    Verify the keeper waits while the fee eats the bNEO gain.
+    """
+    # 1 GAS swaps to 0.05 bNEO, while the harvest fee is 1.002 GAS
+    node.chain.invocation_gas = DECIMALS_MULTIPLIER
+    node.chain.mine(generated_gas=DECIMALS_MULTIPLIER)
+    assert run_tick(node) is None
+    assert node.chain.transactions == []
+
+    # a higher threshold than the net gain also waits
+    node.chain.mine(generated_gas=99 * DECIMALS_MULTIPLIER)
+    assert run_tick(node, min_net_gain=10 * DECIMALS_MULTIPLIER) is None
+    assert node.chain.transactions == []
+
+
+def test_keeper_harvests(node):
+    """
+    Verify the keeper submits the harvest once profitable, compounding the bNEO into the pool.
+    """
+    burger_supply = node.chain.model.burger_supply
+    node.chain.mine(generated_gas=100 * DECIMALS_MULTIPLIER)
+
+    assert run_tick(node) is not None
+    assert len(node.chain.transactions) == 1
+    assert node.chain.transactions[0]["operation"] == "harvest"
+    assert node.chain.model.burger_supply == burger_supply + 5 * DECIMALS_MULTIPLIER
+    assert node.chain.pending_gas == 0
+
+
+def test_keeper_dry_run(node):
+    """
+    Verify dry runs never submit.
+    """
+    node.chain.mine(generated_gas=100 * DECIMALS_MULTIPLIER)
+    assert run_tick(node, dry_run=True) is None
+    assert node.chain.transactions == []
+    assert node.chain.pending_gas == 100 * DECIMALS_MULTIPLIER
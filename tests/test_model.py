@@ -0,0 +1,129 @@
+import random
+
+import pytest
+from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
+from utils.base_test import BaseTest
+from utils.model import ModelFault, SandwichModel, random_operations
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+ACCOUNTS = [bytes([index]) * 20 for index in range(1, 5)]
+
+
+def run_model(seed: int, count: int) -> SandwichModel:
+    model = SandwichModel()
+    for operation in random_operations(random.Random(seed), ACCOUNTS, count, 1000 * DECIMALS_MULTIPLIER):
+        burger_supply, total_supply = model.burger_supply, model.total_supply
+        try:
+            model.apply(operation)
+        except ModelFault:
+            assert (burger_supply, total_supply) == (model.burger_supply, model.total_supply)
+            continue
+
+        assert sum(model.balances.values()) == model.total_supply
+        assert model.burger_supply >= 0
+        if total_supply > 0 and model.total_supply > 0:
+            # rounding always favors the pool, so the bNEO value of a sNEO never goes down
+            assert model.burger_supply * total_supply >= burger_supply * model.total_supply
+    return model
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_model_invariants(seed):
+    """
+    Verify the share accounting invariants hold over long random sequences.
+    """
+    run_model(seed, 10_000)
+
+
+def test_model_burn_everything():
+    """
+    Verify burning the whole supply pays out the whole bNEO supply, yield included.
+    """
+    model = SandwichModel()
+    model.deposit(ACCOUNTS[0], 10 * DECIMALS_MULTIPLIER)
+    model.deposit(ACCOUNTS[1], 5 * DECIMALS_MULTIPLIER)
+    model.inject_yield(3 * DECIMALS_MULTIPLIER)
+
+    paid = model.burn(ACCOUNTS[0], model.balance_of(ACCOUNTS[0]))
+    paid += model.burn(ACCOUNTS[1], model.balance_of(ACCOUNTS[1]))
+    assert paid == 18 * DECIMALS_MULTIPLIER
+    assert (model.total_supply, model.burger_supply) == (0, 0)
+
+
+def test_model_withdrawal_queue():
+    """
+    Verify queued withdrawals are paid at the ratio they were requested at, in order.
+    """
+    model = SandwichModel()
+    model.deposit(ACCOUNTS[0], 10 * DECIMALS_MULTIPLIER)
+    model.deposit(ACCOUNTS[1], 10 * DECIMALS_MULTIPLIER)
+
+    assert model.request_withdraw(ACCOUNTS[0], 10 * DECIMALS_MULTIPLIER) == 0
+    model.inject_yield(2 * DECIMALS_MULTIPLIER)
+    assert model.request_withdraw(ACCOUNTS[1], 5 * DECIMALS_MULTIPLIER) == 1
+
+    assert model.settle_withdrawals(1) == [(ACCOUNTS[0], 10 * DECIMALS_MULTIPLIER)]
+    assert model.settle_withdrawals(10) == [(ACCOUNTS[1], 6 * DECIMALS_MULTIPLIER)]
+    assert model.settle_withdrawals(10) == []
+    assert model.burger_supply == 6 * DECIMALS_MULTIPLIER
+
+
+@pytest.mark.contracts("neo_sandwich")
+class TestModelDifferential(BaseTest):
+    """
+    Replays random sequences against both the model & the compiled contracts, verifying they end in the same state.
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup_differential(self, pytestconfig):
+        self.sequences = pytestconfig.getoption("differential_sequences")
+        self.length = pytestconfig.getoption("differential_length")
+
+    def apply(self, operation) -> bool:
+        """
+        Applies an operation to the contracts.
+        :return: whether the execution FAULTed
+        """
+        method, *args = operation
+        try:
+            if method == "deposit":
+                self.deposit(*args)
+            elif method == "transfer":
+                from_address, to_address, amount, signed = args
+                self.call_method("transfer", from_address, to_address, amount, None,
+                                 signer_accounts=[from_address] if signed else [])
+            elif method == "burn":
+                account, amount, signed = args
+                self.call_method("burn", account, amount, signer_accounts=[account] if signed else [])
+            elif method == "inject_yield":
+                self.harvest(*args)
+        except TestExecutionException:
+            return True
+        return False
+
+    def assert_same_state(self, model: SandwichModel):
+        self.assertEqual(model.total_supply, self.call_method("totalSupply"))
+        self.assertEqual(model.burger_supply, self.call_method("burgerSupply"))
+        for account in ACCOUNTS:
+            self.assertEqual(model.balance_of(account), self.call_method("balanceOf", account))
+
+    def test_differential(self):
+        for seed in range(self.sequences):
+            self.reset()
+            self.deploy()
+            model = SandwichModel()
+
+            # smaller yields are kept as GAS by `harvest` instead of being swapped
+            operations = random_operations(random.Random(seed), ACCOUNTS, self.length, 100 * DECIMALS_MULTIPLIER,
+                                           min_yield=DECIMALS_MULTIPLIER)
+            for operation in operations:
+                try:
+                    model.apply(operation)
+                    model_fault = False
+                except ModelFault:
+                    model_fault = True
+
+                self.assertEqual(model_fault, self.apply(operation), f"seed {seed}: {operation}")
+
+            self.assert_same_state(model)
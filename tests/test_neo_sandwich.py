@@ -1,13 +1,22 @@
+import json
+import os
+
+import pytest
 from boa3.neo import to_script_hash
 from boa3 import constants
 from boa3.neo.cryptography import hash160
 from boa3.neo.vm.type.String import String
 from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
 from utils.base_test import BaseTest
+from utils.compile import compile_contract, script_hash
+from utils.consts import TEST_CONTRACTS_DIR_PATH
 
 DECIMALS_MULTIPLIER = 100_000_000
 
+RECEIVER_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'receiver_stand_in.py')
+
 
+@pytest.mark.contracts("neo_sandwich")
 class TestNeoSandwich(BaseTest):
     """
     Testing suite for neo_sandwich.py contracts.
@@ -96,3 +105,342 @@ class TestNeoSandwich(BaseTest):
         # self.assertEqual(neo_wrapped_before + minted_amount, neo_wrapped_after)
         # self.assertEqual(neo_aux_before - minted_amount, neo_aux_after)
         # self.assertEqual(zneo_aux_before + minted_amount, zneo_aux_after)
+
+    def test_transfer_many(self):
+        """
+        Verify transferMany behaves as a single transfer per entry, with one signature for all of them.
+        """
+        self.deploy()
+        self.assertEqual(True, self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER))
+
+        receivers = [self.OTHER_ACCOUNT_2, self.OWNER_SCRIPT_HASH, self.OTHER_ACCOUNT_1]
+        transfers = [[receiver, DECIMALS_MULTIPLIER, None] for receiver in receivers]
+
+        # should fail if the sender doesn't sign
+        result = self.call_method("transferMany", self.OTHER_ACCOUNT_1, transfers, expected_result_type=bool)
+        self.assertEqual(False, result)
+
+        # should fail if the sender can't pay for all of the entries, the self transfer not spending any
+        too_much = transfers + [[self.OTHER_ACCOUNT_2, 9 * DECIMALS_MULTIPLIER, None]]
+        result = self.call_method("transferMany", self.OTHER_ACCOUNT_1, too_much,
+                                  signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+        self.assertEqual(False, result)
+
+        # should fail when any of the entries is invalid
+        with self.assertRaises(TestExecutionException):
+            self.call_method("transferMany", self.OTHER_ACCOUNT_1, transfers + [[bytes(19), 0, None]],
+                             signer_accounts=[self.OTHER_ACCOUNT_1])
+        with self.assertRaises(TestExecutionException):
+            self.call_method("transferMany", self.OTHER_ACCOUNT_1, transfers + [[self.OTHER_ACCOUNT_2, -1, None]],
+                             signer_accounts=[self.OTHER_ACCOUNT_1])
+
+        events_before = len(self.engine.get_events("Transfer", origin=self.contract_hash))
+        result = self.call_method("transferMany", self.OTHER_ACCOUNT_1, transfers,
+                                  signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+        self.assertEqual(True, result)
+
+        # one transfer event per entry, in order
+        transfer_events = self.engine.get_events("Transfer", origin=self.contract_hash)[events_before:]
+        self.assertEqual(len(transfers), len(transfer_events))
+        for (receiver, amount, _), event in zip(transfers, transfer_events):
+            sender, event_receiver, event_amount = event.arguments
+            if isinstance(sender, str):
+                sender = String(sender).to_bytes()
+            if isinstance(event_receiver, str):
+                event_receiver = String(event_receiver).to_bytes()
+            self.assertEqual(self.OTHER_ACCOUNT_1, sender)
+            self.assertEqual(receiver, event_receiver)
+            self.assertEqual(amount, event_amount)
+
+        # transferring to yourself doesn't change the balance
+        self.assertEqual(8 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual(DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_2))
+        self.assertEqual(DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OWNER_SCRIPT_HASH))
+
+    def test_transfer_many_gas(self):
+        """
+        Verify a transferMany of N entries costs less GAS than N single transfers.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER)
+
+        receivers = [bytes([index]) * 20 for index in range(1, 11)]
+
+        single_transfers_gas = 0
+        for receiver in receivers:
+            self.call_method("transfer", self.OTHER_ACCOUNT_1, receiver, DECIMALS_MULTIPLIER // 100, None,
+                             signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+            single_transfers_gas += self.engine.gas_consumed
+
+        transfers = [[receiver, DECIMALS_MULTIPLIER // 100, None] for receiver in receivers]
+        self.call_method("transferMany", self.OTHER_ACCOUNT_1, transfers,
+                         signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+        transfer_many_gas = self.engine.gas_consumed
+
+        self.assertLess(transfer_many_gas, single_transfers_gas)
+
+    def test_supplies_follow_deposits_and_burns(self):
+        """
+        Verify both supplies are updated by deposits & burns, keeping the share ratio.
+        """
+        self.deploy()
+
+        self.assertEqual(True, self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("totalSupply"))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+
+        self.assertEqual(True, self.deposit(self.OTHER_ACCOUNT_2, 5 * DECIMALS_MULTIPLIER))
+        self.assertEqual(15 * DECIMALS_MULTIPLIER, self.call_method("totalSupply"))
+        self.assertEqual(15 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+        self.assertEqual(5 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_2))
+
+        self.call_method("burn", self.OTHER_ACCOUNT_1, 4 * DECIMALS_MULTIPLIER, signer_accounts=[self.OTHER_ACCOUNT_1])
+        self.assertEqual(11 * DECIMALS_MULTIPLIER, self.call_method("totalSupply"))
+        self.assertEqual(11 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+        self.assertEqual(6 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual(4 * DECIMALS_MULTIPLIER, self.call_bneo("balanceOf", self.OTHER_ACCOUNT_1))
+
+    def test_redeploy_keeps_leftover_burgers(self):
+        """
+        Verify a redeploy once every holder burned keeps the bNEO still held by the pool in the bNEO supply.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER)
+        self.call_method("burn", self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER, signer_accounts=[self.OTHER_ACCOUNT_1])
+
+        self.increase_block()
+        leftover = self.harvest(10 * DECIMALS_MULTIPLIER)
+        self.assertGreater(leftover, 0)
+        self.assertEqual(0, self.call_method("totalSupply"))
+
+        self.assertEqual(True, self.deploy())
+        self.assertEqual(0, self.call_method("totalSupply"))
+        self.assertEqual(leftover, self.call_method("burgerSupply"))
+        self.assertEqual(leftover, self.call_bneo("balanceOf", self.contract_hash))
+
+    def deposit_with_data(self, account: bytes, amount: int, data):
+        """
+        Same as `deposit`, passing `data` to the contracts `onNEP17Payment`.
+        """
+        self.add_contract(self.contract_path.replace('.py', '.nef'))
+        self.call_bneo("mint", account, amount)
+        return self.call_bneo("transfer", account, self.contract_hash, amount, data, signer_accounts=[account],
+                              expected_result_type=bool)
+
+    def test_deposit_for_beneficiary(self):
+        """
+        Verify the `data` of a deposit names the account receiving the minted sNEO.
+        """
+        self.deploy()
+
+        self.assertEqual(True, self.deposit_with_data(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER,
+                                                      self.OTHER_ACCOUNT_2))
+        self.assertEqual(0, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_2))
+
+        transfer_events = self.engine.get_events("Transfer", origin=self.contract_hash)
+        sender, receiver, amount = transfer_events[-1].arguments
+        if isinstance(receiver, str):
+            receiver = String(receiver).to_bytes()
+        self.assertEqual(None, sender)
+        self.assertEqual(self.OTHER_ACCOUNT_2, receiver)
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, amount)
+
+        # no data still mints to the depositor
+        self.assertEqual(True, self.deposit_with_data(self.OTHER_ACCOUNT_1, 5 * DECIMALS_MULTIPLIER, None))
+        self.assertEqual(5 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+
+    def test_deposit_forwarded_to_contract(self):
+        """
+        Verify a deposit for a smart contracts calls its onPayment with the forwarding data, in the same invocation.
+        """
+        self.add_contract(compile_contract(RECEIVER_PATH))
+        receiver_hash = script_hash(RECEIVER_PATH)
+        self.deploy()
+
+        self.assertEqual(True, self.deposit_with_data(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER,
+                                                      [receiver_hash, b"vault"]))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", receiver_hash))
+        self.assertEqual(0, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+
+    def test_deposit_invalid_beneficiary(self):
+        """
+        Verify a deposit whose `data` isn't a valid beneficiary reverts, the bNEO staying with the depositor.
+        """
+        self.deploy()
+
+        for data in (b"not an address", [self.OTHER_ACCOUNT_2], 10):
+            with self.assertRaises(TestExecutionException):
+                self.deposit_with_data(self.OTHER_ACCOUNT_1, DECIMALS_MULTIPLIER, data)
+
+        self.assertEqual(0, self.call_method("totalSupply"))
+
+    def test_neo_deposit(self):
+        """
+        Verify NEO deposits are wrapped into bNEO & minted in the same invocation.
+        """
+        self.deploy()
+        self.assertEqual(True, self.deposit(self.OTHER_ACCOUNT_2, 5 * DECIMALS_MULTIPLIER))
+
+        self.assertEqual(True, self.deposit_neo(self.OTHER_ACCOUNT_1, 3))
+        self.assertEqual(3 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual(8 * DECIMALS_MULTIPLIER, self.call_method("totalSupply"))
+        self.assertEqual(8 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+
+        # the pool holds the wrapped NEO as bNEO, the NEO went to bNEO
+        self.assertEqual(8 * DECIMALS_MULTIPLIER, self.call_bneo("balanceOf", self.contract_hash))
+        self.assertEqual(0, self.neo_balance(self.contract_hash))
+        self.assertEqual(3, self.neo_balance(script_hash(self.bneo_path)))
+
+        # the following bNEO deposits are minted as usual
+        self.assertEqual(True, self.deposit(self.OTHER_ACCOUNT_2, 2 * DECIMALS_MULTIPLIER))
+        self.assertEqual(7 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_2))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+
+    def test_neo_deposit_at_current_ratio(self):
+        """
+        Verify NEO deposits mint at the current ratio, to the beneficiary named by `data`.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_2, 10 * DECIMALS_MULTIPLIER)
+        self.harvest(100 * DECIMALS_MULTIPLIER, rate=5)
+        total_supply, burger_supply, *_ = self.call_method("getState")
+        self.assertGreater(burger_supply, total_supply)
+
+        self.assertEqual(True, self.deposit_neo(self.OWNER_SCRIPT_HASH, 2, self.OTHER_ACCOUNT_1))
+        self.assertEqual(2 * DECIMALS_MULTIPLIER * total_supply // burger_supply,
+                         self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual(0, self.call_method("balanceOf", self.OWNER_SCRIPT_HASH))
+        self.assertEqual(burger_supply + 2 * DECIMALS_MULTIPLIER, self.call_method("burgerSupply"))
+
+    def test_pool_events(self):
+        """
+        Verify deposits & burns fire `Deposit` & `Withdraw` with the amounts & the supplies after the operation.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER)
+        self.deposit_with_data(self.OTHER_ACCOUNT_2, 5 * DECIMALS_MULTIPLIER, self.OTHER_ACCOUNT_1)
+        self.call_method("burn", self.OTHER_ACCOUNT_1, 3 * DECIMALS_MULTIPLIER, signer_accounts=[self.OTHER_ACCOUNT_1])
+
+        deposit_events = self.engine.get_events("Deposit", origin=self.contract_hash)
+        expected_deposits = [
+            [self.OTHER_ACCOUNT_1, self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER,
+             10 * DECIMALS_MULTIPLIER, 10 * DECIMALS_MULTIPLIER],
+            [self.OTHER_ACCOUNT_2, self.OTHER_ACCOUNT_1, 5 * DECIMALS_MULTIPLIER, 5 * DECIMALS_MULTIPLIER,
+             15 * DECIMALS_MULTIPLIER, 15 * DECIMALS_MULTIPLIER],
+        ]
+        self.assertEqual(len(expected_deposits), len(deposit_events))
+        for expected, event in zip(expected_deposits, deposit_events):
+            arguments = [String(argument).to_bytes() if isinstance(argument, str) else argument
+                         for argument in event.arguments]
+            self.assertEqual(expected, arguments)
+
+        withdraw_event = self.engine.get_events("Withdraw", origin=self.contract_hash)[-1]
+        arguments = [String(argument).to_bytes() if isinstance(argument, str) else argument
+                     for argument in withdraw_event.arguments]
+        self.assertEqual([self.OTHER_ACCOUNT_1, 3 * DECIMALS_MULTIPLIER, 3 * DECIMALS_MULTIPLIER,
+                          12 * DECIMALS_MULTIPLIER, 12 * DECIMALS_MULTIPLIER], arguments)
+
+    @pytest.mark.usefixtures("funded")
+    def test_get_state(self):
+        """
+        Verify getState returns the supplies, share ratio & decimals, in one safe call.
+        """
+        total_deposits = sum(self.FUNDED_DEPOSITS.values())
+        self.assertEqual([total_deposits, total_deposits, DECIMALS_MULTIPLIER, 8], self.call_method("getState"))
+
+        # the ratio grows with the harvested bNEO
+        burgers_out = self.harvest(10 * DECIMALS_MULTIPLIER)
+        self.assertEqual(
+            [total_deposits, total_deposits + burgers_out,
+             (total_deposits + burgers_out) * DECIMALS_MULTIPLIER // total_deposits, 8],
+            self.call_method("getState")
+        )
+
+        with open(self.contract_path.replace('.py', '.manifest.json')) as manifest_file:
+            methods = {method["name"]: method for method in json.load(manifest_file)["abi"]["methods"]}
+        self.assertEqual(True, methods["getState"]["safe"])
+        self.assertEqual(True, methods["balancesOf"]["safe"])
+
+    def test_get_state_empty_pool(self):
+        self.deploy()
+        self.assertEqual([0, 0, DECIMALS_MULTIPLIER, 8], self.call_method("getState"))
+
+    @pytest.mark.usefixtures("funded")
+    def test_balances_of(self):
+        """
+        Verify balancesOf returns the balances of many accounts in order, 0 for unknown accounts.
+        """
+        holders = list(self.FUNDED_DEPOSITS) + [self.OTHER_ACCOUNT_1]
+        self.assertEqual(list(self.FUNDED_DEPOSITS.values()) + [0], self.call_method("balancesOf", holders))
+        self.assertEqual([], self.call_method("balancesOf", []))
+
+        with self.assertRaises(TestExecutionException):
+            self.call_method("balancesOf", [self.OTHER_ACCOUNT_1, bytes(19)])
+
+    def walk_holders(self, limit: int) -> list:
+        holders = []
+        cursor = 0
+        while cursor != -1:
+            page, cursor = self.call_method("holders", cursor, limit)
+            self.assertLessEqual(len(page), limit)
+            for account, balance in page:
+                if isinstance(account, str):
+                    account = String(account).to_bytes()
+                holders.append((account, balance))
+        return holders
+
+    @pytest.mark.usefixtures("funded")
+    def test_holders(self):
+        """
+        Verify holders enumerates every holder once, in accounts order, whatever the page size.
+        """
+        # a few holders sharing the same bucket, i.e. first byte
+        same_bucket = [bytes([0xA1]) + bytes([index]) * 19 for index in range(3)]
+        for index, holder in enumerate(same_bucket, start=1):
+            self.deposit(holder, index * DECIMALS_MULTIPLIER)
+
+        expected = sorted(list(self.FUNDED_DEPOSITS.items())
+                          + [(holder, index * DECIMALS_MULTIPLIER) for index, holder in enumerate(same_bucket, 1)])
+        for limit in (1, 2, 3, 100):
+            self.assertEqual(expected, self.walk_holders(limit))
+
+        # burning a whole balance removes the holder
+        holder, amount = next(iter(self.FUNDED_DEPOSITS.items()))
+        self.call_method("burn", holder, amount, signer_accounts=[holder])
+        self.assertNotIn(holder, dict(self.walk_holders(100)))
+
+        with self.assertRaises(TestExecutionException):
+            self.call_method("holders", 0, 0)
+        with self.assertRaises(TestExecutionException):
+            self.call_method("holders", 0, 101)
+        with self.assertRaises(TestExecutionException):
+            self.call_method("holders", -1, 10)
+
+    def test_holders_empty(self):
+        self.deploy()
+        self.assertEqual([[], -1], self.call_method("holders", 0, 10))
+
+    @pytest.mark.usefixtures("funded")
+    def test_funded_state(self):
+        """
+        Verify the shared baseline state holds the funded deposits, and that changing it doesn't leak to other tests.
+        """
+        total_deposits = sum(self.FUNDED_DEPOSITS.values())
+        self.assertEqual(total_deposits, self.call_method("totalSupply"))
+        self.assertEqual(total_deposits, self.call_method("burgerSupply"))
+        for holder, amount in self.FUNDED_DEPOSITS.items():
+            self.assertEqual(amount, self.call_method("balanceOf", holder))
+
+        holder, amount = next(iter(self.FUNDED_DEPOSITS.items()))
+        self.call_method("burn", holder, amount, signer_accounts=[holder])
+        self.assertEqual(0, self.call_method("balanceOf", holder))
+
+    @pytest.mark.usefixtures("funded")
+    def test_funded_state_is_copied(self):
+        """
+        Verify every test gets an untouched copy of the baseline state.
+        """
+        self.assertEqual(sum(self.FUNDED_DEPOSITS.values()), self.call_method("totalSupply"))
+        for holder, amount in self.FUNDED_DEPOSITS.items():
+            self.assertEqual(amount, self.call_method("balanceOf", holder))
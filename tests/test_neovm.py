@@ -0,0 +1,71 @@
+from utils.neovm import EXEC_FEE_FACTOR, NEO_HASH, Chain, Contract, entry_script, hash160
+
+# ADD, RET of `add`, then the RET of `nothing`
+ADDER_SCRIPT = bytes([0x9E, 0x40, 0x40])
+ADDER_MANIFEST = {
+    "name": "Adder",
+    "abi": {"methods": [
+        {"name": "add", "offset": 0, "parameters": [{"name": "a"}, {"name": "b"}], "returntype": "Integer"},
+        {"name": "nothing", "offset": 2, "parameters": [], "returntype": "Void"},
+    ]},
+}
+ACCOUNT = bytes(range(20))
+
+# the fixed part of every entry script: PUSH15 CallFlags.All, PUSHDATA1 the method & the hash, SYSCALL
+# System.Contract.Call, the implicit RET
+ENTRY_SCRIPT_FEE = (1 + 8 + 8 + 0 + (1 << 15) + 0) * EXEC_FEE_FACTOR
+
+
+def deploy_adder(chain: Chain) -> bytes:
+    script_hash = hash160(ADDER_SCRIPT)
+    chain.contracts[script_hash] = Contract(1, script_hash, ADDER_SCRIPT, [], ADDER_MANIFEST, "Adder")
+    chain.storage[script_hash] = {}
+    return script_hash
+
+
+def test_entry_script_is_a_dynamic_call():
+    """
+    Verify the entry script is the one `ScriptBuilder.EmitDynamicCall` emits.
+    """
+    script_hash = deploy_adder(Chain())
+
+    # PUSHINT8 40, PUSH2, PUSH2, PACK, PUSH15, PUSHDATA1 'add', PUSHDATA1 the hash, SYSCALL System.Contract.Call
+    assert entry_script(script_hash, "add", [2, 40]) == (bytes.fromhex("00 28 12 12 c0 1f 0c 03") + b"add"
+                                                         + bytes([0x0C, 20]) + script_hash
+                                                         + bytes.fromhex("41 62 7d 5b 52"))
+    assert entry_script(script_hash, "nothing", []).startswith(bytes.fromhex("c2 1f"))  # NEWARRAY0, PUSH15
+
+
+def test_invoke_charges_the_entry_script():
+    """
+    Verify an invocation costs the called method plus its entry script, System.Contract.Call included.
+    """
+    chain = Chain()
+    script_hash = deploy_adder(chain)
+
+    result = chain.invoke(script_hash, "add", [2, 40])
+    assert (result.state, result.result) == ("HALT", 42)
+    # PUSHINT8, PUSH2, PUSH2 & PACK of the arguments, ADD & RET of the method
+    assert result.gas_consumed == ENTRY_SCRIPT_FEE + (1 + 1 + 1 + (1 << 11) + (1 << 3) + 0) * EXEC_FEE_FACTOR
+
+    result = chain.invoke(script_hash, "nothing")
+    assert (result.state, result.result) == ("HALT", None)
+    # NEWARRAY0 of the arguments, RET of the method
+    assert result.gas_consumed == ENTRY_SCRIPT_FEE + ((1 << 4) + 0) * EXEC_FEE_FACTOR
+
+    result = chain.invoke(script_hash, "missing")
+    assert result.state == "FAULT"
+    assert result.gas_consumed == ENTRY_SCRIPT_FEE + (1 << 4) * EXEC_FEE_FACTOR
+
+
+def test_invoke_native_charges_the_entry_script():
+    """
+    Verify the native invocations are called from an entry script too.
+    """
+    chain = Chain()
+    chain.add_balance(NEO_HASH, ACCOUNT, 5)
+
+    result = chain.invoke(NEO_HASH, "balanceOf", [ACCOUNT])
+    assert (result.state, result.result) == ("HALT", 5)
+    # PUSHDATA1, PUSH1 & PACK of the arguments, NeoToken.balanceOf
+    assert result.gas_consumed == ENTRY_SCRIPT_FEE + (8 + 1 + (1 << 11) + (1 << 15)) * EXEC_FEE_FACTOR
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+from utils.base_test import BaseTest
+from utils.profiler import Profiler
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+
+@pytest.mark.contracts("neo_sandwich")
+class TestProfiler(BaseTest):
+    """
+    Testing suite for the instruction level profiles of the invocations, see `utils.profiler`.
+    """
+    OTHER_ACCOUNT_1 = bytes(range(20))
+    OTHER_ACCOUNT_2 = bytes(range(20, 40))
+
+    @pytest.fixture(autouse=True)
+    def profile_invocations(self, setup, tmp_path):
+        self.profiler = Profiler()
+        self.profiles_dir = str(tmp_path)
+
+    def test_profile_deposit(self):
+        """
+        Verify a deposit profile maps its GAS to the contracts methods, source lines & syscalls.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, DECIMALS_MULTIPLIER)
+
+        profile = self.profiles[-1]
+        self.assertEqual("HALT", profile.result.state)
+        self.assertEqual(True, profile.result.result)
+
+        summary = profile.summary()
+        self.assertEqual(profile.result.gas_consumed, summary["gas"])
+        self.assertEqual(summary["gas"], sum(row["gas"] for row in summary["lines"]))
+        self.assertEqual(summary["instructions"], sum(row["count"] for row in summary["opcodes"]))
+
+        syscalls = {row["name"]: row for row in summary["syscalls"]}
+        self.assertIn("System.Storage.Put", syscalls)
+        self.assertIn("System.Runtime.Notify", syscalls)
+        self.assertGreater(syscalls["storage fee"]["gas"], 0)
+
+        contract_file = os.path.basename(self.contract_path)
+        self.assertTrue(any(row["name"].startswith(contract_file + ":") for row in summary["lines"]))
+
+        # the entry script calls the bNEO transfer, which calls onNEP17Payment of the tested contracts
+        stacks = [line.rsplit(" ", 1) for line in profile.folded().splitlines()]
+        self.assertEqual(summary["gas"], sum(int(gas) for _, gas in stacks))
+        self.assertTrue(all(stack.startswith("EntryScript.script") for stack, _ in stacks))
+        self.assertTrue(any(".onNEP17Payment;" in stack for stack, _ in stacks))
+
+    def test_profile_gas_matches_engine(self):
+        """
+        Verify the profiles account for the same GAS as the engine, for the transfers, deposits, burns & harvests.
+        Both run the invocations from an EmitDynamicCall entry script, its opcodes & System.Contract.Call included.
+        """
+        self.deploy()
+
+        self.deposit(self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER)
+        self.assertEqual(self.engine.gas_consumed, self.profiles[-1].gas_consumed)
+
+        self.call_method("transfer", self.OTHER_ACCOUNT_1, self.OTHER_ACCOUNT_2, DECIMALS_MULTIPLIER, None,
+                         signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+        self.assertEqual(self.engine.gas_consumed, self.profiles[-1].gas_consumed)
+
+        self.call_method("burn", self.OTHER_ACCOUNT_2, DECIMALS_MULTIPLIER // 2, signer_accounts=[self.OTHER_ACCOUNT_2])
+        self.assertEqual(self.engine.gas_consumed, self.profiles[-1].gas_consumed)
+
+        self.increase_block()
+        self.harvest(3 * DECIMALS_MULTIPLIER)
+        self.assertTrue(self.profiles[-1].name.endswith("-harvest"))
+        self.assertEqual(self.engine.gas_consumed, self.profiles[-1].gas_consumed)
+
+    def test_profile_files(self):
+        """
+        Verify every invocation writes its json summary & folded stacks, and profiling doesn't change the results.
+        """
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, DECIMALS_MULTIPLIER)
+        result = self.call_method("transfer", self.OTHER_ACCOUNT_1, self.OTHER_ACCOUNT_2, DECIMALS_MULTIPLIER // 2,
+                                  None, signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+
+        self.assertEqual(True, result)
+        self.assertEqual(result, self.profiles[-1].result.result)
+        self.assertEqual([profile.name for profile in self.profiles],
+                         ["000-deploy", "001-mint", "002-transfer", "003-transfer"])
+
+        with open(os.path.join(self.profiles_dir, "003-transfer.json")) as summary_file:
+            self.assertEqual(self.profiles[-1].summary(), json.load(summary_file))
+        with open(os.path.join(self.profiles_dir, "003-transfer.folded")) as folded_file:
+            self.assertEqual(self.profiles[-1].folded(), folded_file.read())
+
+    def test_profile_fault(self):
+        """
+        Verify FAULTed invocations are profiled too, up to the failing instruction.
+        """
+        self.deploy()
+        profile = self.profiler.profile("burn", self.contract_path, "burn", [self.OTHER_ACCOUNT_1, 1])
+
+        self.assertEqual("FAULT", profile.result.state)
+        self.assertGreater(profile.gas_consumed, 0)
+        self.assertEqual(0, self.profiler.profile("balanceOf", self.contract_path, "balanceOf",
+                                                  [self.OTHER_ACCOUNT_1]).result.result)
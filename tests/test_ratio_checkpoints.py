@@ -0,0 +1,90 @@
+import pytest
+from utils.base_test import BaseTest
+
+DECIMALS_MULTIPLIER = 100_000_000
+SUPPLY_SHIFT = 2 ** 64
+
+
+@pytest.mark.contracts("neo_sandwich")
+@pytest.mark.usefixtures("funded")
+class TestRatioCheckpoints(BaseTest):
+    """
+    Testing suite for the share ratio checkpoints of neo_sandwich.py & `ratioAt`.
+    """
+    OTHER_ACCOUNT_1 = bytes(range(20))
+
+    def test_ratio_checkpoints(self):
+        """
+        Verify every ratio change is checkpointed, ordered by time, and the last checkpoint is the current ratio.
+        """
+        checkpoints = self.call_method("ratioCheckpoints")
+        self.assertEqual(DECIMALS_MULTIPLIER, checkpoints[-1][1])
+
+        for claimable_gas in (10 * DECIMALS_MULTIPLIER, 3 * DECIMALS_MULTIPLIER):
+            self.increase_block()
+            self.harvest(claimable_gas)
+
+        self.increase_block()
+        holder, amount = next(iter(self.FUNDED_DEPOSITS.items()))
+        self.call_method("burn", holder, amount // 3, signer_accounts=[holder])
+
+        checkpoints = self.call_method("ratioCheckpoints")
+        self.assertEqual(self.call_method("getState")[2], checkpoints[-1][1])
+        for (previous_time, previous_ratio), (checkpoint_time, ratio) in zip(checkpoints, checkpoints[1:]):
+            self.assertLess(previous_time, checkpoint_time)
+            self.assertNotEqual(previous_ratio, ratio)
+
+        # harvests only increase the ratio
+        self.assertEqual(sorted(ratio for _, ratio in checkpoints), [ratio for _, ratio in checkpoints])
+
+    def test_ratio_checkpoints_skip_unchanged_ratio(self):
+        """
+        Verify deposits that keep the ratio don't write a checkpoint.
+        """
+        checkpoints = self.call_method("ratioCheckpoints")
+        self.increase_block()
+        self.deposit(self.OTHER_ACCOUNT_1, DECIMALS_MULTIPLIER)
+        self.assertEqual(checkpoints, self.call_method("ratioCheckpoints"))
+
+    def test_ratio_at(self):
+        """
+        Verify ratioAt finds the ratio at any time covered by the checkpoints.
+        """
+        for claimable_gas in (10 * DECIMALS_MULTIPLIER, 7 * DECIMALS_MULTIPLIER, 2 * DECIMALS_MULTIPLIER):
+            self.increase_block()
+            self.harvest(claimable_gas)
+
+        checkpoints = self.call_method("ratioCheckpoints")
+        first_time = checkpoints[0][0]
+        self.assertEqual(0, self.call_method("ratioAt", first_time - 1))
+
+        for (checkpoint_time, ratio), (next_time, _) in zip(checkpoints, checkpoints[1:] + [[None, None]]):
+            self.assertEqual(ratio, self.call_method("ratioAt", checkpoint_time))
+            if next_time is not None:
+                self.assertEqual(ratio, self.call_method("ratioAt", next_time - 1))
+
+        self.assertEqual(checkpoints[-1][1], self.call_method("ratioAt", checkpoints[-1][0] * 2))
+
+    def test_ratio_checkpoints_huge_ratio(self):
+        """
+        Verify a share ratio above SUPPLY_SHIFT, a single sNEO unit left after a big harvest, is checkpointed intact.
+        """
+        self.reset()
+        self.deploy()
+        self.deposit(self.OTHER_ACCOUNT_1, 1)
+
+        self.increase_block()
+        self.harvest(1_000_000 * DECIMALS_MULTIPLIER)
+        ratio = self.call_method("getState")[2]
+        self.assertGreater(ratio, SUPPLY_SHIFT)
+
+        checkpoint_time, checkpoint_ratio = self.call_method("ratioCheckpoints")[-1]
+        self.assertEqual(ratio, checkpoint_ratio)
+        self.assertEqual(ratio, self.call_method("ratioAt", checkpoint_time))
+        self.assertEqual(DECIMALS_MULTIPLIER, self.call_method("ratioAt", checkpoint_time - 1))
+
+    def test_ratio_at_before_deposits(self):
+        self.reset()
+        self.deploy()
+        self.assertEqual(0, self.call_method("ratioAt", 2 ** 62))
+        self.assertEqual([], self.call_method("ratioCheckpoints"))
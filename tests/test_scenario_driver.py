@@ -0,0 +1,133 @@
+import random
+
+import pytest
+from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
+from utils.base_test import SCENARIO_CHUNK_SIZE, BaseTest
+from utils.compile import script_hash
+from utils.model import ModelFault, SandwichModel, random_operations
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+ACCOUNTS = [bytes([index]) * 20 for index in range(1, 9)]
+
+SCENARIO_LENGTH = 500
+
+# long enough to overflow the 2048 VM stack items in a single driver invocation
+LONG_SCENARIO_LENGTH = 3000
+
+
+@pytest.mark.contracts("neo_sandwich")
+class TestScenarioDriver(BaseTest):
+    """
+    Testing suite for `BaseTest.run_scenario`, running many operations in a single invocation.
+    """
+
+    def valid_operations(self, seed: int, count: int) -> tuple:
+        """
+        Generates a random sequence where no operation FAULTs, as a failing operation FAULTs the whole scenario.
+        :return: the scenario operations & the model that ran them
+        """
+        model = SandwichModel()
+        operations = []
+        for operation in random_operations(random.Random(seed), ACCOUNTS, count, 100 * DECIMALS_MULTIPLIER):
+            method, *args = operation
+            if method == "inject_yield" or (method != "deposit" and not args[-1]):
+                continue
+            try:
+                model.apply(operation)
+            except ModelFault:
+                continue
+
+            if method == "transfer":
+                operations.append(("transfer", *args[:3], None))
+            elif method == "burn":
+                operations.append(("burn", *args[:2]))
+            else:
+                operations.append(operation)
+        return operations, model
+
+    def test_run_scenario(self):
+        """
+        Verify a long scenario ends in the model state, with the results & events of every operation.
+        """
+        self.deploy()
+        operations, model = self.valid_operations(0, SCENARIO_LENGTH)
+
+        steps = self.run_scenario(operations)
+
+        self.assertEqual(len(operations), len(steps))
+        self.assertEqual([model.total_supply, model.burger_supply],
+                         self.call_method("getState")[:2])
+        self.assertEqual([model.balance_of(account) for account in ACCOUNTS],
+                         self.call_method("balancesOf", ACCOUNTS))
+
+        bneo_hash = script_hash(self.bneo_path)
+        for operation, step in zip(operations, steps):
+            method, account, *args = operation
+            sneo_transfers = [event.arguments for event in step.events
+                              if event.name == "Transfer" and bytes(event.origin) == self.contract_hash]
+            bneo_transfers = [event.arguments for event in step.events
+                              if event.name == "Transfer" and bytes(event.origin) == bneo_hash]
+
+            if method == "deposit":
+                self.assertEqual(True, step.result)
+                self.assertEqual(None, sneo_transfers[0][0])
+                self.assertEqual(account, sneo_transfers[0][1])
+            elif method == "transfer":
+                self.assertEqual(True, step.result)
+                self.assertEqual([(account, args[0], args[1])], sneo_transfers)
+            else:
+                self.assertEqual([(account, None, args[0])], sneo_transfers)
+                self.assertEqual(account, bneo_transfers[0][1])
+
+    def test_run_long_scenario(self):
+        """
+        Verify a scenario too long for a single invocation is run in chunks, ending in the model state.
+        """
+        self.deploy()
+        operations, model = self.valid_operations(1, LONG_SCENARIO_LENGTH)
+        self.assertGreater(len(operations), 10 * SCENARIO_CHUNK_SIZE)
+
+        # a single invocation overflows the VM stack
+        with self.assertRaises(TestExecutionException):
+            self.run_scenario(operations, chunk_size=len(operations))
+
+        steps = self.run_scenario(operations)
+
+        self.assertEqual(len(operations), len(steps))
+        self.assertEqual([model.total_supply, model.burger_supply], self.call_method("getState")[:2])
+        self.assertEqual([model.balance_of(account) for account in ACCOUNTS],
+                         self.call_method("balancesOf", ACCOUNTS))
+        # the deposits & transfers of every chunk succeeded
+        self.assertTrue(all(step.result for step, (method, *_) in zip(steps, operations) if method != "burn"))
+
+    def test_run_scenario_fault(self):
+        """
+        Verify a failing operation reverts the whole scenario.
+        """
+        self.deploy()
+        self.deposit(ACCOUNTS[0], DECIMALS_MULTIPLIER)
+
+        with self.assertRaises(TestExecutionException):
+            self.run_scenario([
+                ("deposit", ACCOUNTS[1], DECIMALS_MULTIPLIER),
+                ("burn", ACCOUNTS[1], 2 * DECIMALS_MULTIPLIER),
+            ])
+
+        self.assertEqual(0, self.call_method("balanceOf", ACCOUNTS[1]))
+        self.assertEqual(DECIMALS_MULTIPLIER, self.call_method("totalSupply"))
+
+    def test_run_scenario_signers(self):
+        """
+        Verify only the signer accounts can move their sNEO.
+        """
+        self.deploy()
+        self.deposit(ACCOUNTS[0], DECIMALS_MULTIPLIER)
+
+        steps = self.run_scenario([
+            ("deposit", ACCOUNTS[1], DECIMALS_MULTIPLIER),
+            ("transfer", ACCOUNTS[0], ACCOUNTS[1], DECIMALS_MULTIPLIER, None),
+        ], signer_accounts=[ACCOUNTS[1]])
+
+        self.assertEqual([True, False], [step.result for step in steps])
+        self.assertEqual(DECIMALS_MULTIPLIER, self.call_method("balanceOf", ACCOUNTS[0]))
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+from offchain.consts import RATIO_PRECISION
+from utils.model import SandwichModel
+from utils.simulator import MAX_MUL_DIV_INPUT, SimulationConfig, mul_div, report, simulate
+
+
+def test_mul_div_is_exact():
+    """
+    Verify `mul_div` matches the python integer math, products way above int64 included.
+    """
+    rng = random.Random(0)
+    values = [(rng.randrange(MAX_MUL_DIV_INPUT), rng.randrange(MAX_MUL_DIV_INPUT), rng.randrange(1, MAX_MUL_DIV_INPUT))
+              for _ in range(10_000)]
+    values += [(rng.randrange(10 ** 12), rng.randrange(10 ** 12), rng.randrange(10 ** 12, MAX_MUL_DIV_INPUT))
+               for _ in range(10_000)]
+    values = [(a, b, c) for a, b, c in values if a * b // c < 2 ** 62]
+    a, b, c = (np.array(column, dtype=np.int64) for column in zip(*values))
+
+    quotient, remainder = mul_div(a, b, c)
+
+    assert quotient.tolist() == [a * b // c for a, b, c in values]
+    assert remainder.tolist() == [a * b % c for a, b, c in values]
+
+
+def test_simulation_matches_model():
+    """
+    Verify a simulated path ends in the same state as its operations replayed on the model.
+    """
+    config = SimulationConfig(paths=16, days=60, seed=1, deposits_per_day=20, withdrawals_per_day=20,
+                              harvest_intervals=(1, 7))
+    result = simulate(config, trace=True)
+
+    model = SandwichModel()
+    for operation in result.trace:
+        model.apply(operation)
+
+    assert any(method == "inject_yield" for method, *_ in result.trace)
+    assert (model.total_supply, model.burger_supply) == (result.total_supplies[0, 0], result.burger_supplies[0, 0])
+
+
+def test_simulation_report():
+    """
+    Verify the report compares the harvest intervals on the same flows.
+    """
+    config = SimulationConfig(paths=64, days=60, harvest_intervals=(1, 7, 30))
+    result = simulate(config)
+    summary = report(result)
+
+    rows = {row["interval_days"]: row for row in summary["intervals"]}
+    assert rows[30]["harvests"] == 2
+    assert rows[1]["harvests"] > rows[7]["harvests"] > rows[30]["harvests"]
+    # fewer harvests pay fewer fees
+    assert rows[1]["fee_burgers"] > rows[7]["fee_burgers"] > rows[30]["fee_burgers"]
+    assert summary["best_interval_days"] in rows
+    assert rows[1]["ratio_growth"] > 0
+    assert rows[1]["mint_rounding_loss"] > 0 and rows[1]["burn_rounding_loss"] > 0
+
+    # the rounding always favors the pool, the ratio never goes below 1 bNEO per sNEO
+    assert np.all(result.final_ratios >= RATIO_PRECISION)
+    assert result.daily_ratio_percentiles.shape == (3, config.days + 1, 5)
+    assert np.all(result.daily_ratio_percentiles[:, 0] == RATIO_PRECISION)
@@ -1,3 +1,4 @@
+import pytest
 from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
 from utils.base_test import BaseTest
 
@@ -7,6 +8,7 @@ DECIMALS = 8
 DECIMALS_MULTIPLIER = 100_000_000
 
 
+@pytest.mark.contracts("neo_sandwich")
 class TestSandwichAsNEP17(BaseTest):
     """
     Testing suite for neo_sandwich.py contracts, validating it's behavior as NEP17 token.
@@ -0,0 +1,78 @@
+import pytest
+from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
+from utils.base_test import BaseTest
+
+DECIMALS_MULTIPLIER = 100_000_000
+SUPPLY_SHIFT = 2 ** 64
+STORAGE_VERSION = 0
+BALANCE_PREFIX = b"b"
+
+
+@pytest.mark.contracts("neo_sandwich")
+@pytest.mark.usefixtures("funded")
+class TestUpdate(BaseTest):
+    """
+    Testing suite for the updates of neo_sandwich.py, `update` & the storage layout version.
+    """
+    OTHER_ACCOUNT_1 = bytes(range(20))
+
+    def update_contract(self, signer: bytes):
+        with open(self.contract_path.replace(".py", ".nef"), "rb") as nef_file:
+            nef = nef_file.read()
+        with open(self.contract_path.replace(".py", ".manifest.json"), "rb") as manifest_file:
+            manifest = manifest_file.read()
+        return self.call_method("update", nef, manifest, None, signer_accounts=[signer])
+
+    def test_update_keeps_storage(self):
+        """
+        Verify an update keeps the balances, supplies & storage version, without touching any account.
+        """
+        holders = list(self.FUNDED_DEPOSITS)
+        state = self.call_method("getState")
+        balances = self.call_method("balancesOf", holders)
+
+        self.update_contract(self.OWNER_SCRIPT_HASH)
+
+        self.assertEqual(state, self.call_method("getState"))
+        self.assertEqual(balances, self.call_method("balancesOf", holders))
+        self.assertEqual(STORAGE_VERSION, self.call_method("storageVersion"))
+
+        # the balances are still usable after the update
+        result = self.call_method("transfer", holders[0], self.OTHER_ACCOUNT_1, balances[0], None,
+                                  signer_accounts=[holders[0]], expected_result_type=bool)
+        self.assertEqual(True, result)
+        self.assertEqual([0, balances[0]], self.call_method("balancesOf", [holders[0], self.OTHER_ACCOUNT_1]))
+
+    def test_update_requires_owner(self):
+        """
+        Verify only the owner can update.
+        """
+        with self.assertRaises(TestExecutionException):
+            self.update_contract(self.OTHER_ACCOUNT_1)
+
+    def test_storage_version(self):
+        """
+        Verify the deploy writes the current layout version.
+        """
+        self.assertEqual(STORAGE_VERSION, self.call_method("storageVersion"))
+
+    def test_balance_of_other_layout_version(self):
+        """
+        Verify a balance record written by another layout version is read through `migrate_balance`, and rewritten
+        with the current version by the next write of the account.
+        """
+        account_key = BALANCE_PREFIX + self.OTHER_ACCOUNT_1
+        self.engine.storage_put(account_key, (STORAGE_VERSION + 1) * SUPPLY_SHIFT + 5 * DECIMALS_MULTIPLIER,
+                                self.contract_path)
+
+        self.assertEqual(5 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
+        self.assertEqual([5 * DECIMALS_MULTIPLIER], self.call_method("balancesOf", [self.OTHER_ACCOUNT_1]))
+
+        holder = next(iter(self.FUNDED_DEPOSITS))
+        result = self.call_method("transfer", self.OTHER_ACCOUNT_1, holder, 2 * DECIMALS_MULTIPLIER, None,
+                                  signer_accounts=[self.OTHER_ACCOUNT_1], expected_result_type=bool)
+        self.assertEqual(True, result)
+
+        record = int.from_bytes(self.engine.storage_get(account_key, self.contract_path), "little", signed=True)
+        self.assertEqual(STORAGE_VERSION * SUPPLY_SHIFT + 3 * DECIMALS_MULTIPLIER, record)
+        self.assertEqual(3 * DECIMALS_MULTIPLIER, self.call_method("balanceOf", self.OTHER_ACCOUNT_1))
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+from boa3.neo.vm.type.String import String
+from boa3_test.tests.test_classes.TestExecutionException import TestExecutionException
+from utils.base_test import BaseTest
+from utils.compile import compile_contract, script_hash
+from utils.consts import TEST_CONTRACTS_DIR_PATH
+from utils.model import SandwichModel
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+REJECTING_RECEIVER_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'rejecting_receiver_stand_in.py')
+
+
+@pytest.mark.contracts("neo_sandwich")
+@pytest.mark.usefixtures("funded")
+class TestWithdrawalQueue(BaseTest):
+    """
+    Testing suite for the queued withdrawals of neo_sandwich.py, `requestWithdraw` & `settleWithdrawals`.
+    """
+    OTHER_ACCOUNT_1 = bytes(range(20))
+
+    def request_withdraw(self, account: bytes, amount: int) -> int:
+        return self.call_method("requestWithdraw", account, amount, signer_accounts=[account])
+
+    def test_request_withdraw(self):
+        """
+        Verify a request burns the sNEO right away, but keeps the bNEO until it's settled.
+        """
+        holder, deposit = next(iter(self.FUNDED_DEPOSITS.items()))
+        total_supply = self.call_method("totalSupply")
+        burger_supply = self.call_method("burgerSupply")
+        contract_burgers = self.call_bneo("balanceOf", self.contract_hash)
+
+        self.assertEqual(0, self.request_withdraw(holder, deposit // 4))
+        self.assertEqual(1, self.request_withdraw(holder, deposit // 4))
+
+        self.assertEqual(deposit // 2, self.call_method("balanceOf", holder))
+        self.assertEqual(total_supply - deposit // 2, self.call_method("totalSupply"))
+        self.assertEqual(burger_supply - deposit // 2, self.call_method("burgerSupply"))
+        self.assertEqual(contract_burgers, self.call_bneo("balanceOf", self.contract_hash))
+        self.assertEqual(0, self.call_bneo("balanceOf", holder))
+
+        self.assertEqual([0, 2], self.call_method("withdrawalQueue"))
+        request = self.call_method("getWithdrawal", 1)
+        self.assertEqual(deposit // 4, request[1])
+
+        # the account must sign & hold enough sNEO
+        with self.assertRaises(TestExecutionException):
+            self.call_method("requestWithdraw", holder, 1)
+        with self.assertRaises(TestExecutionException):
+            self.request_withdraw(holder, deposit)
+        with self.assertRaises(TestExecutionException):
+            self.request_withdraw(holder, 0)
+
+    def test_settle_withdrawals_order(self):
+        """
+        Verify the requests are paid oldest first, at most `max_requests` per call.
+        """
+        holders = list(self.FUNDED_DEPOSITS)[:3]
+        for holder in holders:
+            self.request_withdraw(holder, self.FUNDED_DEPOSITS[holder])
+
+        events_before = len(self.engine.get_events("Transfer", origin=script_hash(self.bneo_path)))
+        self.assertEqual(2, self.call_method("settleWithdrawals", 2))
+        self.assertEqual([2, 3], self.call_method("withdrawalQueue"))
+        self.assertEqual([], self.call_method("getWithdrawal", 0))
+
+        # the first two requests were paid, in order, the third is still queued
+        payments = self.engine.get_events("Transfer", origin=script_hash(self.bneo_path))[events_before:]
+        receivers = [event.arguments[1] for event in payments]
+        receivers = [String(receiver).to_bytes() if isinstance(receiver, str) else receiver for receiver in receivers]
+        self.assertEqual(holders[:2], receivers)
+        for holder in holders[:2]:
+            self.assertEqual(self.FUNDED_DEPOSITS[holder], self.call_bneo("balanceOf", holder))
+        self.assertEqual(0, self.call_bneo("balanceOf", holders[2]))
+
+        # anyone can settle, the bNEO still go to the requesting account
+        self.assertEqual(1, self.call_method("settleWithdrawals", 10, signer_accounts=[self.OTHER_ACCOUNT_1]))
+        self.assertEqual(self.FUNDED_DEPOSITS[holders[2]], self.call_bneo("balanceOf", holders[2]))
+        self.assertEqual(0, self.call_bneo("balanceOf", self.OTHER_ACCOUNT_1))
+
+        self.assertEqual(0, self.call_method("settleWithdrawals", 10))
+        self.assertEqual([3, 3], self.call_method("withdrawalQueue"))
+        with self.assertRaises(TestExecutionException):
+            self.call_method("settleWithdrawals", 0)
+
+    def test_settle_withdrawals_ratio_fairness(self):
+        """
+        Verify a queued request is paid at the ratio it was requested at, the yield harvested before the settlement
+        going to the remaining holders only.
+        """
+        model = SandwichModel()
+        for holder, amount in self.FUNDED_DEPOSITS.items():
+            model.deposit(holder, amount)
+
+        # some yield before the request is shared by everyone
+        model.inject_yield(self.harvest(10 * DECIMALS_MULTIPLIER))
+
+        withdrawing, staying = list(self.FUNDED_DEPOSITS)[:2]
+        model.request_withdraw(withdrawing, self.FUNDED_DEPOSITS[withdrawing])
+        self.request_withdraw(withdrawing, self.FUNDED_DEPOSITS[withdrawing])
+
+        # the yield harvested while the request is queued goes to the remaining holders
+        model.inject_yield(self.harvest(20 * DECIMALS_MULTIPLIER))
+        self.assertEqual(model.burger_supply, self.call_method("burgerSupply"))
+
+        (account, locked_burgers), = model.settle_withdrawals(10)
+        self.assertEqual(1, self.call_method("settleWithdrawals", 10))
+        self.assertEqual(locked_burgers, self.call_bneo("balanceOf", withdrawing))
+
+        # after the settlement the contracts holds exactly the pool's bNEO
+        self.assertEqual(model.burger_supply, self.call_method("burgerSupply"))
+        self.assertEqual(model.burger_supply, self.call_bneo("balanceOf", self.contract_hash))
+
+        # a burn of the staying holder gets the whole queued-period yield share
+        self.call_method("burn", staying, self.FUNDED_DEPOSITS[staying], signer_accounts=[staying])
+        self.assertEqual(model.burn(staying, self.FUNDED_DEPOSITS[staying]), self.call_bneo("balanceOf", staying))
+
+    def test_settle_withdrawals_rejecting_receiver(self):
+        """
+        Verify a smart contracts whose onNEP17Payment aborts can't block the queue, its bNEO are credited instead &
+        it claims them once it accepts them.
+        """
+        self.add_contract(compile_contract(REJECTING_RECEIVER_PATH))
+        receiver_hash = script_hash(REJECTING_RECEIVER_PATH)
+        self.call_bneo("mint", self.OTHER_ACCOUNT_1, 10 * DECIMALS_MULTIPLIER)
+        self.call_bneo("transfer", self.OTHER_ACCOUNT_1, self.contract_hash, 10 * DECIMALS_MULTIPLIER, receiver_hash,
+                       signer_accounts=[self.OTHER_ACCOUNT_1])
+        sandwiches = self.call_method("balanceOf", receiver_hash)
+
+        # the receiver is at the head of the queue & rejects any payment
+        self.run_smart_contract(self.engine, REJECTING_RECEIVER_PATH, "requestWithdraw", self.contract_hash,
+                                sandwiches)
+        holder = list(self.FUNDED_DEPOSITS)[0]
+        self.request_withdraw(holder, self.FUNDED_DEPOSITS[holder])
+        self.run_smart_contract(self.engine, REJECTING_RECEIVER_PATH, "setRejecting", True)
+
+        self.assertEqual(2, self.call_method("settleWithdrawals", 10))
+        self.assertEqual(self.FUNDED_DEPOSITS[holder], self.call_bneo("balanceOf", holder))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("withdrawalCredit", receiver_hash))
+        self.assertEqual(0, self.call_bneo("balanceOf", receiver_hash))
+
+        # the claim fails while the receiver rejects the bNEO, keeping the credit
+        with self.assertRaises(TestExecutionException):
+            self.run_smart_contract(self.engine, REJECTING_RECEIVER_PATH, "claimWithdrawal", self.contract_hash)
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_method("withdrawalCredit", receiver_hash))
+
+        self.run_smart_contract(self.engine, REJECTING_RECEIVER_PATH, "setRejecting", False)
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.run_smart_contract(
+            self.engine, REJECTING_RECEIVER_PATH, "claimWithdrawal", self.contract_hash))
+        self.assertEqual(10 * DECIMALS_MULTIPLIER, self.call_bneo("balanceOf", receiver_hash))
+        self.assertEqual(0, self.call_method("withdrawalCredit", receiver_hash))
+
+        # only the credited account can claim
+        with self.assertRaises(TestExecutionException):
+            self.call_method("claimWithdrawal", receiver_hash)
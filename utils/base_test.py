@@ -1,6 +1,31 @@
+import copy
+import os
+from typing import Any, Iterable, List, NamedTuple, Optional, Union
+
 import pytest
-from boa3.boa3 import Boa3
+from boa3 import constants
+from boa3.neo.smart_contract.notification import Notification
 from boa3_test.tests.boa_test import BoaTest
+from boa3_test.tests.test_classes.testengine import TestEngine
+from boa3_test.tests.test_classes.witnessscope import WitnessScope
+
+import utils.compile
+from utils.consts import FLAMINGO_ROUTER_STAND_IN_PATH, PROFILES_DIR_PATH, SCENARIO_DRIVER_PATH
+from utils.model import Operation
+from utils.profiler import Profile, Profiler
+
+
+# operations run per scenario_driver.py invocation. The driver keeps every operation & result on the VM stack, whose
+# items are limited to 2048, an operation taking up to ~10 of them
+SCENARIO_CHUNK_SIZE = 100
+
+
+class ScenarioStep(NamedTuple):
+    """
+    Outcome of an operation run by `BaseTest.run_scenario`
+    """
+    result: Any
+    events: List[Notification]
 
 
 class BaseTest(BoaTest):
@@ -9,14 +34,45 @@ class BaseTest(BoaTest):
     """
     OWNER_SCRIPT_HASH = bytes(20)
 
+    # holders & their bNEO deposits in the session's baseline state, see `funded`
+    FUNDED_DEPOSITS = {
+        bytes([0xA1]) * 20: 100 * 100_000_000,
+        bytes([0xA2]) * 20: 25 * 100_000_000,
+        bytes([0xA3]) * 20: 7 * 100_000_000,
+        bytes([0xA4]) * 20: 1,
+    }
+
+    # replays the invocations when profiling (`--profile`), None otherwise
+    profiler: Optional[Profiler] = None
+    # where the invocations profiles are written, None to keep them in `profiles` only
+    profiles_dir: Optional[str] = None
+
     @pytest.fixture(autouse=True)
-    def setup(self, engine, contract_path):
+    def setup(self, request, engine, contract_path, contract_hash, bneo_path):
         self.engine = engine
         self.contract_path = contract_path
+        self.contract_hash = contract_hash
+        self.bneo_path = bneo_path
+
+        self.profiles: List[Profile] = []
+        if request.config.getoption("profile"):
+            self.profiler = Profiler()
+            self.profiles_dir = os.path.join(PROFILES_DIR_PATH, request.node.name)
+
+    @pytest.fixture
+    def funded(self, setup, funded_builder):
+        """
+        Replaces the engine with a copy of the session's baseline state, where the contracts is deployed and
+        `FUNDED_DEPOSITS` are deposited. Use with `@pytest.mark.usefixtures("funded")`.
+        """
+        self.engine = copy.deepcopy(funded_builder.engine)
+        if self.profiler is not None:
+            self.profiler = copy.deepcopy(funded_builder.profiler)
 
     @pytest.fixture(scope='session', autouse=True)
-    def compile_contract(self, contract_path):
-        Boa3.compile(contract_path)
+    def compile_contract(self, contract_path, bneo_path):
+        utils.compile.compile_contract(contract_path, debug=True)
+        utils.compile.compile_contract(bneo_path)
 
     def deploy(self, signer=None):
         """
@@ -26,6 +82,63 @@ class BaseTest(BoaTest):
         signer = signer or self.OWNER_SCRIPT_HASH
         return self.call_method("deploy", signer_accounts=[signer])
 
+    def run_smart_contract(self, engine, path: str, method: str, *arguments, **kwargs):
+        """
+        Invokes a contracts method on `engine`, profiling it first when profiling.
+        The profiles are kept in `profiles` & written to `profiles_dir` as `<index>-<method>.json` & `.folded`.
+        """
+        self.profile(path, method, arguments, kwargs.get("signer_accounts", ()))
+        return super().run_smart_contract(engine, path, method, *arguments, **kwargs)
+
+    def profile(self, path: Union[str, bytes], method: str, arguments: Iterable[Any],
+                signer_accounts: Iterable[bytes]):
+        if self.profiler is not None:
+            name = f"{len(self.profiles):03d}-{method}"
+            profile = self.profiler.profile(name, path, method, list(arguments), list(signer_accounts))
+            self.profiles.append(profile)
+            if self.profiles_dir is not None:
+                profile.save(self.profiles_dir)
+
+    def reset(self):
+        """
+        Starts over from an empty chain.
+        """
+        self.engine = TestEngine()
+        if self.profiler is not None:
+            self.profiler = Profiler()
+
+    def add_contract(self, nef_path: str):
+        """
+        Deploys a compiled contracts without calling it.
+        :param nef_path: path to the .nef file
+        """
+        self.engine.add_contract(nef_path)
+        if self.profiler is not None:
+            self.profiler.add_contract(nef_path)
+
+    def add_gas(self, account: bytes, amount: int):
+        self.engine.add_gas(account, amount)
+        if self.profiler is not None:
+            self.profiler.add_gas(account, amount)
+
+    def add_neo(self, account: bytes, amount: int):
+        self.engine.add_neo(account, amount)
+        if self.profiler is not None:
+            self.profiler.add_neo(account, amount)
+
+    def storage_put(self, key: bytes, value: int, contract_path: str):
+        """
+        Writes a storage record of a deployed contracts, without running it.
+        """
+        self.engine.storage_put(key, value, contract_path)
+        if self.profiler is not None:
+            self.profiler.storage_put(contract_path.replace('.py', '.nef'), key, value)
+
+    def increase_block(self):
+        self.engine.increase_block()
+        if self.profiler is not None:
+            self.profiler.increase_block()
+
     def call_method(self, method: str, *args, **kwargs):
         """
         Invokes a contracts method
@@ -33,3 +146,119 @@ class BaseTest(BoaTest):
         :return: The returned value from contracts.
         """
         return self.run_smart_contract(self.engine, self.contract_path, method, *args, **kwargs)
+
+    def call_bneo(self, method: str, *args, **kwargs):
+        """
+        Invokes a method of the bNEO stand-in contracts
+        :param method: The contracts method name
+        :return: The returned value from contracts.
+        """
+        return self.run_smart_contract(self.engine, self.bneo_path, method, *args, **kwargs)
+
+    def run_scenario(self, operations: Iterable[Operation], signer_accounts: Optional[Iterable[bytes]] = None,
+                     chunk_size: int = SCENARIO_CHUNK_SIZE) -> List[ScenarioStep]:
+        """
+        Runs many operations on the tested contracts through tests/contracts/scenario_driver.py, `chunk_size`
+        operations per invocation.
+        An operation is the method name followed by its arguments, e.g. ("transfer", from, to, amount, None), and
+        ("deposit", account, amount) mints & deposits bNEO. A failing operation FAULTs its whole chunk, the previous
+        chunks are kept.
+
+        :param operations: the operations to run, in order
+        :param signer_accounts: accounts signing with a global scope, defaults to the first argument of every
+            operation when it's an account
+        :param chunk_size: the number of operations run by a single invocation
+        :return: the result & the notifications of every operation
+        """
+        operations = [[method, list(arguments)] for method, *arguments in operations]
+        if signer_accounts is None:
+            signer_accounts = dict.fromkeys(arguments[0] for _, arguments in operations
+                                            if arguments and isinstance(arguments[0], bytes)
+                                            and len(arguments[0]) == 20)
+        signer_accounts = list(signer_accounts)
+
+        self.add_contract(self.contract_path.replace('.py', '.nef'))
+        self.add_contract(utils.compile.compile_contract(self.bneo_path))
+        driver_hash = utils.compile.script_hash(SCENARIO_DRIVER_PATH)
+        bneo_hash = utils.compile.script_hash(self.bneo_path)
+
+        steps: List[ScenarioStep] = []
+        for start in range(0, len(operations), chunk_size):
+            # the operations are called by the driver, not by the entry script, `signer_accounts` would not reach them.
+            # The engine forgets the signers after every invocation
+            for account in signer_accounts:
+                self.engine.add_signer_account(account, WitnessScope.Global)
+            arguments = (self.contract_hash, bneo_hash, operations[start:start + chunk_size])
+            notifications_count = len(self.engine.notifications)
+            self.profile(SCENARIO_DRIVER_PATH, "run", arguments, signer_accounts)
+            results = BoaTest.run_smart_contract(self, self.engine, SCENARIO_DRIVER_PATH, "run", *arguments)
+
+            chunk_steps: List[ScenarioStep] = []
+            events: List[Notification] = []
+            for notification in self.engine.notifications[notifications_count:]:
+                if notification.name == "Operation" and bytes(notification.origin) == driver_hash:
+                    chunk_steps.append(ScenarioStep(results[len(chunk_steps)], events))
+                    events = []
+                else:
+                    events.append(notification)
+            steps.extend(chunk_steps)
+        return steps
+
+    def fund(self):
+        """
+        Deploys the contracts and deposits `FUNDED_DEPOSITS`.
+        """
+        self.deploy()
+        for holder, amount in self.FUNDED_DEPOSITS.items():
+            self.deposit(holder, amount)
+
+    def harvest(self, claimable_gas: int, rate: int = 100, paid_rate: Optional[int] = None, min_burgers_out: int = 0):
+        """
+        Lets the bNEO stand-in generate `claimable_gas` GAS, and harvests it through the router stand-in.
+        :param claimable_gas: The GAS the tested contracts can claim
+        :param rate: The bNEO the router quotes for 100 GAS
+        :param paid_rate: The bNEO the router actually pays for 100 GAS, defaults to `rate`
+        :param min_burgers_out: The `harvest` argument
+        :return: The bNEO added to the pool
+        """
+        paid_rate = rate if paid_rate is None else paid_rate
+        router_hash = utils.compile.script_hash(FLAMINGO_ROUTER_STAND_IN_PATH)
+        self.add_contract(utils.compile.compile_contract(FLAMINGO_ROUTER_STAND_IN_PATH))
+
+        self.add_gas(utils.compile.script_hash(self.bneo_path), claimable_gas)
+        self.run_smart_contract(self.engine, FLAMINGO_ROUTER_STAND_IN_PATH, "setRate", rate, 100, paid_rate)
+        if claimable_gas * paid_rate // 100 > 0:
+            self.call_bneo("mint", router_hash, claimable_gas * paid_rate // 100)
+
+        return self.call_method("harvest", min_burgers_out,
+                                signer_accounts=[self.OWNER_SCRIPT_HASH, self.contract_hash])
+
+    def deposit(self, account: bytes, amount: int):
+        """
+        Mints `amount` bNEO to `account` and deposits them into the tested contracts.
+        :param account: Account that deposits, also signs the transfer
+        :param amount: The amount of bNEO to deposit
+        """
+        self.add_contract(self.contract_path.replace('.py', '.nef'))
+        self.call_bneo("mint", account, amount)
+        return self.call_bneo("transfer", account, self.contract_hash, amount, None, signer_accounts=[account],
+                              expected_result_type=bool)
+
+    def deposit_neo(self, account: bytes, amount: int, data: Any = None):
+        """
+        Credits `amount` NEO to `account` and deposits them into the tested contracts, which wraps them into bNEO.
+        :param account: Account that deposits, also signs the transfer
+        :param amount: The amount of NEO to deposit
+        :param data: The transfer data, see the contracts `onNEP17Payment`
+        """
+        self.add_contract(self.contract_path.replace('.py', '.nef'))
+        self.add_contract(self.bneo_path.replace('.py', '.nef'))
+        self.add_neo(account, amount)
+        return self.run_smart_contract(self.engine, constants.NEO_SCRIPT, "transfer", account, self.contract_hash,
+                                       amount, data, signer_accounts=[account], expected_result_type=bool)
+
+    def neo_balance(self, account: bytes) -> int:
+        """
+        Reads the NEO balance of `account`, a plain read the profiler doesn't record.
+        """
+        return BoaTest.run_smart_contract(self, self.engine, constants.NEO_SCRIPT, "balanceOf", account)
@@ -0,0 +1,165 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+# ContractManagement policies: the storage price per byte & the minimum deployment fee, in datoshi
+STORAGE_PRICE = 100_000
+MINIMUM_DEPLOYMENT_FEE = 10_00000000
+
+
+class GasReport:
+    """
+    Collects the GAS consumed by the benchmark scenarios and compares it against a stored baseline
+    """
+
+    def __init__(self, baseline_path: str, threshold: float, updating: bool = False):
+        """
+        :param baseline_path: path to the json baseline
+        :param threshold: allowed relative growth before a scenario counts as a regression, e.g. 0.05 for 5%
+        :param updating: whether the results become the new baseline, the scenarios missing from it are fine then
+        """
+        self.baseline_path = baseline_path
+        self.threshold = threshold
+        self.updating = updating
+        self.results = {}
+
+        self.baseline = {}
+        if os.path.isfile(baseline_path):
+            with open(baseline_path) as baseline_file:
+                self.baseline = json.load(baseline_file)
+
+    def record(self, scenario: str, method: str, gas_consumed: int, instructions: int):
+        """
+        Records a scenario measurement.
+        :param scenario: unique name of the scenario
+        :param method: the measured contracts method
+        :param gas_consumed: the GAS consumed by the invocation, in datoshi
+        :param instructions: the number of instructions `method` was compiled to
+        """
+        self.results[scenario] = {"method": method, "gas": gas_consumed, "instructions": instructions}
+
+    def regression(self, scenario: str) -> Optional[str]:
+        """
+        Compares a recorded scenario with the baseline.
+        :return: a description of the regression or of the missing baseline, None if the scenario didn't regress
+        """
+        if scenario not in self.baseline:
+            if self.updating:
+                return None
+            return f"{scenario}: no baseline in {self.baseline_path}, run with --update-gas-baseline to record it"
+
+        for metric in ("gas", "instructions"):
+            baseline_value = self.baseline[scenario][metric]
+            value = self.results[scenario][metric]
+            if value > baseline_value * (1 + self.threshold):
+                return f"{scenario}: {metric} went from {baseline_value} to {value} " \
+                       f"(+{(value - baseline_value) / baseline_value:.1%}, threshold is {self.threshold:.1%})"
+        return None
+
+    def save(self, path: str):
+        """
+        Writes the recorded results as json.
+        :param path: output path
+        """
+        self._write(path, self.results)
+
+    def update_baseline(self):
+        """
+        Merges the recorded results into the baseline, keeping the scenarios that weren't run this time.
+        """
+        self.baseline = {**self.baseline, **self.results}
+        self._write(self.baseline_path, self.baseline)
+
+    @staticmethod
+    def _write(path: str, results: dict):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as report_file:
+            json.dump(results, report_file, indent=4, sort_keys=True)
+            report_file.write("\n")
+
+
+def update_fee(nef_size: int, manifest_size: int) -> int:
+    """
+    :return: the fee of `ContractManagement.update`, charged on the NEF & manifest sizes
+    """
+    return STORAGE_PRICE * (nef_size + manifest_size)
+
+
+def deploy_fee(nef_size: int, manifest_size: int) -> int:
+    """
+    :return: the fee of `ContractManagement.deploy`, the update fee with a minimum
+    """
+    return max(update_fee(nef_size, manifest_size), MINIMUM_DEPLOYMENT_FEE)
+
+
+class SizeReport:
+    """
+    Collects the compiled contracts sizes & deployment fees and compares them against a stored baseline
+    """
+    # metrics of a contracts compared against the baseline, the deploy fee hides growth under its minimum
+    METRICS = ("nef_size", "update_fee")
+
+    def __init__(self, baseline_path: str, threshold: float):
+        """
+        :param baseline_path: path to the json baseline
+        :param threshold: allowed relative growth before a metrics counts as a regression, e.g. 0.05 for 5%
+        """
+        self.baseline_path = baseline_path
+        self.threshold = threshold
+        self.results = {}
+
+        self.baseline = {}
+        if os.path.isfile(baseline_path):
+            with open(baseline_path) as baseline_file:
+                self.baseline = json.load(baseline_file)
+
+    def record(self, contract: str, nef_size: int, manifest_size: int, method_instructions: Dict[str, int]):
+        """
+        Records a compiled contracts.
+        :param contract: the contracts name
+        :param nef_size: the .nef file size, in bytes
+        :param manifest_size: the manifest size, in bytes
+        :param method_instructions: the number of instructions of each public method
+        """
+        self.results[contract] = {
+            "nef_size": nef_size,
+            "manifest_size": manifest_size,
+            "deploy_fee": deploy_fee(nef_size, manifest_size),
+            "update_fee": update_fee(nef_size, manifest_size),
+            "instructions": method_instructions,
+        }
+
+    def regressions(self, contract: str) -> List[str]:
+        """
+        Compares a recorded contracts with the baseline, both its sizes & its methods instructions.
+        :return: a description of every regression or of the missing baseline, empty if the contracts didn't regress
+        """
+        if contract not in self.baseline:
+            return [f"{contract}: no baseline in {self.baseline_path}, run with --update-size-baseline to record it"]
+
+        baseline, result = self.baseline[contract], self.results[contract]
+        metrics = [(metric, baseline[metric], result[metric]) for metric in self.METRICS]
+        metrics += [(f"{method} instructions", baseline["instructions"][method], instructions)
+                    for method, instructions in result["instructions"].items()
+                    if method in baseline["instructions"]]
+
+        return [
+            f"{contract}: {metric} went from {baseline_value} to {value} "
+            f"(+{(value - baseline_value) / baseline_value:.1%}, threshold is {self.threshold:.1%})"
+            for metric, baseline_value, value in metrics
+            if baseline_value > 0 and value > baseline_value * (1 + self.threshold)
+        ]
+
+    def save(self, path: str):
+        """
+        Writes the recorded results as json.
+        :param path: output path
+        """
+        GasReport._write(path, self.results)
+
+    def update_baseline(self):
+        """
+        Merges the recorded results into the baseline, keeping the contracts that weren't built this time.
+        """
+        self.baseline = {**self.baseline, **self.results}
+        GasReport._write(self.baseline_path, self.baseline)
@@ -1,14 +1,375 @@
+"""
+Compiles the contracts, caching the artifacts by source hash.
+
+usage: python -m utils.compile [contracts ...] [--output-dir DIR] [--stand-ins] [--no-debug] [--workers N] [--watch]
+                               [--size-baseline PATH] [--size-threshold RATIO] [--update-size-baseline]
+
+Without contracts, every contracts under the contracts directory is compiled. A contracts is either a name (e.g.
+neo_sandwich) or a path to its source. The NEF, manifest & debug information are written to the output directory,
+followed by a size, deployment fee & methods summary of each contracts. The sizes are recorded to
+`build/size_report.json` & compared against the size baseline, the build fails when they grow past the threshold
+or aren't in the baseline yet, `--update-size-baseline` records them.
+"""
+import argparse
+import filecmp
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from typing import Dict, List, NamedTuple, Optional
+
 from boa3.boa3 import Boa3
+from boa3.neo.cryptography import hash160
+
+from utils.benchmark import SizeReport, deploy_fee
+from utils.consts import BNEO_STAND_IN_PATH, BUILD_DIR_PATH, COMPILE_CACHE_DIR_PATH, CONTRACTS_DIR_PATH, \
+    FLAMINGO_ROUTER_STAND_IN_PATH, ROOT_DIR, TEST_CONTRACTS_DIR_PATH
+from utils.nef import count_method_instructions, load_debug_info, method_ranges, read_nef_script
+
+CONTRACT_PATH = os.path.join(CONTRACTS_DIR_PATH, "neo_sandwich.py")
+
+# suffixes of the files generated by the compiler next to the contracts source
+ARTIFACTS_SUFFIXES = (".nef", ".manifest.json")
+DEBUG_ARTIFACTS_SUFFIXES = (".nefdbgnfo",)
+
+# default output directory of the CLI
+OUTPUT_DIR_PATH = os.path.join(BUILD_DIR_PATH, "contracts")
+
+# default sizes baseline of the CLI, see `utils.benchmark.SizeReport`
+SIZE_BASELINE_PATH = os.path.join(ROOT_DIR, "tests", "size_baseline.json")
+
+
+def cache_key(contract_path: str, debug: bool = False) -> str:
+    """
+    Computes the compile cache key, covering everything that affects the compiler output.
+    :param contract_path: path to the contracts source
+    :param debug: whether debug information is generated
+    :return: hex digest identifying the artifacts
+    """
+    with open(contract_path, "rb") as source_file:
+        source = source_file.read()
+
+    # the manifest is named after the file, and the debug information points at the source path
+    options = {
+        "neo3-boa": version("neo3-boa"),
+        "debug": debug,
+        "source": os.path.abspath(contract_path) if debug else os.path.basename(contract_path),
+    }
+    return hashlib.sha256(source + json.dumps(options, sort_keys=True).encode()).hexdigest()
+
+
+def is_cached(contract_path: str, debug: bool = False) -> bool:
+    """
+    :return: whether the contracts artifacts are in the compile cache, i.e. `compile_contract` won't recompile it
+    """
+    return os.path.isdir(os.path.join(COMPILE_CACHE_DIR_PATH, cache_key(contract_path, debug)))
+
+
+def compile_contract(contract_path: str = CONTRACT_PATH, debug: bool = False) -> str:
+    """
+    Compiles a contracts, saving the artifacts next to its source.
+    Artifacts are cached by `cache_key`, so an unchanged contracts is copied from the cache instead of recompiled.
+
+    :param contract_path: path to the contracts source
+    :param debug: whether to generate debug information as well
+    :return: path to the .nef file
+    """
+    suffixes = ARTIFACTS_SUFFIXES + (DEBUG_ARTIFACTS_SUFFIXES if debug else ())
+    artifacts = [contract_path.replace(".py", suffix) for suffix in suffixes]
+    cached_dir = os.path.join(COMPILE_CACHE_DIR_PATH, cache_key(contract_path, debug))
+
+    if os.path.isdir(cached_dir):
+        for artifact in artifacts:
+            _restore_artifact(os.path.join(cached_dir, os.path.basename(artifact)), artifact)
+        return artifacts[0]
+
+    Boa3.compile_and_save(contract_path, debug=debug)
+
+    # populate the cache atomically, another process may be compiling the same contracts
+    os.makedirs(COMPILE_CACHE_DIR_PATH, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=COMPILE_CACHE_DIR_PATH)
+    for artifact in artifacts:
+        shutil.copyfile(artifact, os.path.join(staging_dir, os.path.basename(artifact)))
+    try:
+        os.rename(staging_dir, cached_dir)
+    except OSError:
+        shutil.rmtree(staging_dir)
+
+    return artifacts[0]
+
+
+def _restore_artifact(cached_path: str, artifact_path: str):
+    """
+    Copies a cached artifact next to the contracts source, unless it's already there.
+    The copy replaces the artifact atomically, other processes may be reading it.
+    """
+    if os.path.isfile(artifact_path) and filecmp.cmp(cached_path, artifact_path, shallow=False):
+        return
+
+    artifact_dir = os.path.dirname(os.path.abspath(artifact_path))
+    file_descriptor, staging_path = tempfile.mkstemp(dir=artifact_dir)
+    os.close(file_descriptor)
+    shutil.copyfile(cached_path, staging_path)
+    os.replace(staging_path, artifact_path)
+
+
+def script_hash(contract_path: str) -> bytes:
+    """
+    Computes the script hash the given contracts gets once deployed.
+    :param contract_path: path to the contracts source
+    :return: the 20 bytes script hash
+    """
+    return hash160(read_nef_script(compile_contract(contract_path)))
+
+
+def link_contract(contract_path: str, constants: dict) -> str:
+    """
+    Creates a copy of the contracts source with some of its UInt160 constants replaced.
+    Used to point hardcoded dependencies (e.g. `bNEO`) at stand-in contracts.
+    Constants the contracts doesn't define are ignored.
+
+    :param contract_path: path to the contracts source
+    :param constants: maps the constant name to the script hash it should hold
+    :return: path to the linked contracts source
+    """
+    with open(contract_path) as source_file:
+        source = source_file.read()
+
+    for name, value in constants.items():
+        linked_line = f"{name} = UInt160({bytes(value)!r})"
+        source = re.sub(
+            rf"^{re.escape(name)} = UInt160\([^)]*\)", lambda _: linked_line, source, flags=re.MULTILINE
+        )
+
+    os.makedirs(BUILD_DIR_PATH, exist_ok=True)
+    linked_path = os.path.join(BUILD_DIR_PATH, os.path.basename(contract_path))
+    if os.path.isfile(linked_path):
+        with open(linked_path) as linked_file:
+            if linked_file.read() == source:
+                return linked_path
+
+    with open(linked_path, "w") as linked_file:
+        linked_file.write(source)
+
+    return linked_path
+
+
+def link_stand_ins(contract_path: str) -> str:
+    """
+    Links the contracts against the test stand-ins of its on-chain dependencies.
+    :param contract_path: path to the contracts source
+    :return: path to the linked contracts source
+    """
+    return link_contract(contract_path, {
+        "bNEO": script_hash(BNEO_STAND_IN_PATH),
+        "FLAMINGO_SWAP_ROUTER": script_hash(FLAMINGO_ROUTER_STAND_IN_PATH),
+    })
+
+
+class MethodSummary(NamedTuple):
+    name: str
+    offset: int
+    size: int
+    instructions: Optional[int]
+    safe: bool
+
+
+class BuildResult(NamedTuple):
+    contract_path: str
+    # "compiled", "cached" or "failed"
+    status: str
+    nef_size: int = 0
+    manifest_size: int = 0
+    script_size: int = 0
+    methods: List[MethodSummary] = []
+    error: Optional[str] = None
+
+
+def summarize(contract_path: str, debug: bool) -> BuildResult:
+    """
+    Sizes of the compiled contracts & of its public methods, the methods sizes are only known with debug information.
+    """
+    nef_path = contract_path.replace(".py", ".nef")
+    manifest_path = contract_path.replace(".py", ".manifest.json")
+    script = read_nef_script(nef_path)
+    with open(manifest_path) as manifest_file:
+        abi_methods = json.load(manifest_file)["abi"]["methods"]
+
+    ranges: Dict[str, tuple] = {}
+    instructions: Dict[str, int] = {}
+    if debug:
+        debug_info = load_debug_info(contract_path)
+        ranges = method_ranges(debug_info)
+        instructions = count_method_instructions(script, debug_info)
+
+    methods = []
+    for method in sorted(abi_methods, key=lambda abi_method: abi_method["offset"]):
+        start, end = ranges.get(method["name"], (method["offset"], method["offset"] - 1))
+        methods.append(MethodSummary(method["name"], method["offset"], end - start + 1,
+                                     instructions.get(method["name"]), method.get("safe", False)))
+
+    return BuildResult(contract_path, "", os.path.getsize(nef_path), os.path.getsize(manifest_path), len(script),
+                       methods)
+
+
+def build(contract_path: str, output_dir: str, debug: bool = True) -> BuildResult:
+    """
+    Compiles a contracts & copies its artifacts to `output_dir`, unchanged artifacts are left untouched.
+    :return: the build status & the contracts summary
+    """
+    status = "cached" if is_cached(contract_path, debug) else "compiled"
+    try:
+        compile_contract(contract_path, debug)
+    except Exception as error:
+        return BuildResult(contract_path, "failed", error=f"{type(error).__name__}: {error}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    suffixes = ARTIFACTS_SUFFIXES + (DEBUG_ARTIFACTS_SUFFIXES if debug else ())
+    for suffix in suffixes:
+        artifact = contract_path.replace(".py", suffix)
+        _restore_artifact(artifact, os.path.join(output_dir, os.path.basename(artifact)))
+
+    return summarize(contract_path, debug)._replace(status=status)
+
+
+def build_all(contract_paths: List[str], output_dir: str, debug: bool = True, workers: int = None) -> List[BuildResult]:
+    """
+    Builds the contracts in parallel, see `build`.
+    """
+    if len(contract_paths) == 1:
+        return [build(contract_paths[0], output_dir, debug)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(build, contract_paths, [output_dir] * len(contract_paths),
+                                 [debug] * len(contract_paths)))
+
+
+def format_summary(result: BuildResult) -> str:
+    name = os.path.basename(result.contract_path)
+    if result.status == "failed":
+        return f"{name}: failed\n    {result.error}"
+
+    fee = deploy_fee(result.nef_size, result.manifest_size) / 100_000_000
+    lines = [f"{name}: {result.status}, {result.nef_size} bytes NEF, {result.script_size} bytes script, "
+             f"{result.manifest_size} bytes manifest, {fee:.8g} GAS deploy fee, {len(result.methods)} methods"]
+    for method in result.methods:
+        instructions = "" if method.instructions is None else f"{method.instructions:>6} instructions"
+        size = "" if method.instructions is None else f"{method.size:>6} bytes"
+        lines.append(f"    {method.name:<24} offset {method.offset:>6} {size} {instructions}"
+                     f"{'  (safe)' if method.safe else ''}".rstrip())
+    return "\n".join(lines)
+
+
+def resolve_contracts(contracts: List[str], stand_ins: bool = False) -> List[str]:
+    """
+    :param contracts: contracts names or source paths, all the contracts under the contracts directory if empty
+    :param stand_ins: whether to add the test stand-ins
+    :return: the contracts sources paths
+    """
+    directories = [CONTRACTS_DIR_PATH] + ([TEST_CONTRACTS_DIR_PATH] if stand_ins else [])
+    if not contracts:
+        return [os.path.join(directory, name) for directory in directories
+                for name in sorted(os.listdir(directory)) if name.endswith(".py")]
+
+    paths = []
+    for contract in contracts:
+        if os.path.isfile(contract):
+            paths.append(os.path.abspath(contract))
+            continue
+
+        name = contract if contract.endswith(".py") else f"{contract}.py"
+        candidates = [os.path.join(directory, name) for directory in (CONTRACTS_DIR_PATH, TEST_CONTRACTS_DIR_PATH)
+                      if os.path.isfile(os.path.join(directory, name))]
+        if not candidates:
+            raise FileNotFoundError(f"No contracts named {contract}")
+        paths.append(candidates[0])
+    return paths
+
+
+def check_sizes(results: List[BuildResult], report: SizeReport) -> List[str]:
+    """
+    Records the built contracts into `report`.
+    :return: the sizes regressions against the baseline
+    """
+    regressions = []
+    for result in results:
+        if result.status == "failed":
+            continue
+
+        contract = os.path.basename(result.contract_path)[:-len(".py")]
+        report.record(contract, result.nef_size, result.manifest_size,
+                      {method.name: method.instructions for method in result.methods
+                       if method.instructions is not None})
+        regressions += report.regressions(contract)
+    return regressions
+
+
+def watch(contract_paths: List[str], output_dir: str, debug: bool, workers: int, poll_interval: float = 0.5):
+    """
+    Rebuilds the contracts whenever their sources are saved, until interrupted.
+    """
+    modified_times = {path: os.path.getmtime(path) for path in contract_paths}
+    print(f"watching {len(contract_paths)} contracts, press Ctrl+C to stop")
+    while True:
+        time.sleep(poll_interval)
+        changed = []
+        for path in contract_paths:
+            modified_time = os.path.getmtime(path) if os.path.isfile(path) else None
+            if modified_time != modified_times[path]:
+                modified_times[path] = modified_time
+                if modified_time is not None:
+                    changed.append(path)
+
+        for result in build_all(changed, output_dir, debug, workers) if changed else []:
+            print(format_summary(result), flush=True)
+
 
-CONTRACT_PATH = "../contracts/neo_sandwich.py"
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compiles the contracts, skipping the unchanged ones")
+    parser.add_argument("contracts", nargs="*", help="contracts names or paths, defaults to every contracts")
+    parser.add_argument("--output-dir", "-o", default=OUTPUT_DIR_PATH, help="where the artifacts are written")
+    parser.add_argument("--stand-ins", action="store_true", help="compile the test stand-ins as well")
+    parser.add_argument("--no-debug", action="store_true", help="don't generate the debug information")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of parallel compilations")
+    parser.add_argument("--watch", "-w", action="store_true", help="recompile the contracts whenever they're saved")
+    parser.add_argument("--size-baseline", default=SIZE_BASELINE_PATH, help="json file holding the sizes baseline")
+    parser.add_argument("--size-threshold", type=float, default=0.05,
+                        help="relative growth of a size that fails the build, e.g. 0.05 for 5%%")
+    parser.add_argument("--update-size-baseline", action="store_true",
+                        help="write the measured sizes as the new baseline")
+    args = parser.parse_args(argv)
 
+    contract_paths = resolve_contracts(args.contracts, args.stand_ins)
+    debug = not args.no_debug
+    results = build_all(contract_paths, args.output_dir, debug, args.workers)
+    for result in results:
+        print(format_summary(result))
 
-# todo - create small CLI
+    size_report = SizeReport(args.size_baseline, args.size_threshold)
+    regressions = check_sizes(results, size_report)
+    size_report.save(os.path.join(BUILD_DIR_PATH, "size_report.json"))
+    if args.update_size_baseline:
+        size_report.update_baseline()
+        regressions = []
+    for regression in regressions:
+        print(f"size regression - {regression}")
 
+    if args.watch:
+        try:
+            watch(contract_paths, args.output_dir, debug, args.workers)
+        except KeyboardInterrupt:
+            pass
+        return 0
 
-def compile_contract():
-    Boa3.compile_and_save(CONTRACT_PATH)
+    return 1 if regressions or any(result.status == "failed" for result in results) else 0
 
 
 if __name__ == "__main__":
-    compile_contract()
+    # run from the repository root: python -m utils.compile [contracts ...], the paths may be relative to anywhere
+    sys.exit(main())
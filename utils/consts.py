@@ -3,3 +3,21 @@ import os
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 
 CONTRACTS_DIR_PATH = os.path.join(ROOT_DIR, 'contracts')
+
+# contracts that only exist to support the tests (stand-ins for on-chain dependencies)
+TEST_CONTRACTS_DIR_PATH = os.path.join(ROOT_DIR, 'tests', 'contracts')
+
+BNEO_STAND_IN_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'bneo_stand_in.py')
+FLAMINGO_ROUTER_STAND_IN_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'flamingo_router_stand_in.py')
+
+# runs many operations in a single invocation, see `BaseTest.run_scenario`
+SCENARIO_DRIVER_PATH = os.path.join(TEST_CONTRACTS_DIR_PATH, 'scenario_driver.py')
+
+# generated contracts sources & artifacts
+BUILD_DIR_PATH = os.path.join(ROOT_DIR, 'build')
+
+# compiled contracts artifacts, keyed by the contracts source hash
+COMPILE_CACHE_DIR_PATH = os.path.join(BUILD_DIR_PATH, 'cache')
+
+# instruction level profiles of the tests invocations, see `utils.profiler`
+PROFILES_DIR_PATH = os.path.join(BUILD_DIR_PATH, 'profiles')
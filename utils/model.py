@@ -0,0 +1,164 @@
+import random
+from typing import Dict, Iterator, List, Tuple
+
+# an operation is the method name followed by its arguments, e.g. ("transfer", from, to, amount, signed)
+Operation = Tuple
+
+
+class ModelFault(Exception):
+    """
+    Raised where the contracts execution would FAULT, the model state is left untouched
+    """
+
+
+class SandwichModel:
+    """
+    Pure python model of the neo_sandwich.py state machine.
+
+    Mirrors the contracts integer share math exactly, so it can be used to property test long operations sequences
+    thousands of times faster than the TestEngine, and replayed against the compiled contracts to verify they agree.
+    """
+
+    def __init__(self):
+        self.total_supply = 0
+        self.burger_supply = 0
+        self.balances: Dict[bytes, int] = {}
+        # queued withdrawals, (account, bNEO amount) by request id, & the first request to settle
+        self.withdrawals: List[Tuple[bytes, int]] = []
+        self.settled_withdrawals = 0
+
+    def balance_of(self, account: bytes) -> int:
+        return self.balances.get(account, 0)
+
+    def _set_balance(self, account: bytes, balance: int):
+        if balance == 0:
+            self.balances.pop(account, None)
+        else:
+            self.balances[account] = balance
+
+    def deposit(self, account: bytes, amount: int) -> int:
+        """
+        `onNEP17Payment` of `amount` bNEO from `account`.
+        :return: the minted sNEO amount
+        """
+        if self.total_supply > 0:
+            sandwiches_to_mint = amount * self.total_supply // self.burger_supply
+        else:
+            sandwiches_to_mint = amount
+
+        if sandwiches_to_mint <= 0:
+            raise ModelFault("mint amount must be positive")
+
+        self.total_supply += sandwiches_to_mint
+        self.burger_supply += amount
+        self._set_balance(account, self.balance_of(account) + sandwiches_to_mint)
+        return sandwiches_to_mint
+
+    def transfer(self, from_address: bytes, to_address: bytes, amount: int, signed: bool = True) -> bool:
+        """
+        `transfer` of `amount` sNEO.
+        :return: the value returned by the contracts
+        """
+        if amount < 0:
+            raise ModelFault("amount must not be negative")
+
+        from_balance = self.balance_of(from_address)
+        if from_balance < amount or not signed:
+            return False
+
+        if from_address != to_address and amount != 0:
+            self._set_balance(from_address, from_balance - amount)
+            self._set_balance(to_address, self.balance_of(to_address) + amount)
+        return True
+
+    def burn(self, account: bytes, amount: int, signed: bool = True) -> int:
+        """
+        `burn` of `amount` sNEO.
+        :return: the bNEO amount paid back to `account`
+        """
+        if amount <= 0:
+            raise ModelFault("amount must be positive")
+        if not signed:
+            return 0
+
+        account_balance = self.balance_of(account)
+        if account_balance < amount:
+            raise ModelFault("not enough sNEO to burn")
+
+        burgers_to_transfer = amount * self.burger_supply // self.total_supply
+        self.total_supply -= amount
+        self.burger_supply -= burgers_to_transfer
+        self._set_balance(account, account_balance - amount)
+        return burgers_to_transfer
+
+    def request_withdraw(self, account: bytes, amount: int, signed: bool = True) -> int:
+        """
+        `requestWithdraw` of `amount` sNEO.
+        :return: the withdrawal request id
+        """
+        if amount <= 0 or not signed:
+            raise ModelFault("amount must be positive & the account must sign")
+
+        burgers_to_transfer = self.burn(account, amount)
+        self.withdrawals.append((account, burgers_to_transfer))
+        return len(self.withdrawals) - 1
+
+    def settle_withdrawals(self, max_requests: int) -> List[Tuple[bytes, int]]:
+        """
+        `settleWithdrawals` of up to `max_requests` requests.
+        :return: the (account, bNEO amount) payments, in order
+        """
+        if max_requests <= 0:
+            raise ModelFault("max_requests must be positive")
+
+        settled = self.withdrawals[self.settled_withdrawals:self.settled_withdrawals + max_requests]
+        self.settled_withdrawals += len(settled)
+        return settled
+
+    def inject_yield(self, amount: int):
+        """
+        Adds bNEO to the pool without minting sNEO, as `harvest` does.
+        """
+        if amount < 0:
+            raise ModelFault("amount must not be negative")
+        self.burger_supply += amount
+
+    def apply(self, operation: Operation):
+        """
+        Applies an operation, as generated by `random_operations`.
+        :return: the operation result
+        :raise ModelFault: raised if the contracts would FAULT
+        """
+        method, *args = operation
+        return getattr(self, method)(*args)
+
+    def state(self) -> dict:
+        return {
+            "total_supply": self.total_supply,
+            "burger_supply": self.burger_supply,
+            "balances": dict(self.balances),
+        }
+
+
+def random_operations(rng: random.Random, accounts: List[bytes], count: int, max_amount: int,
+                      min_yield: int = 0) -> Iterator[Operation]:
+    """
+    Generates a random operations sequence, mostly valid but with some failing & edge cases.
+    :param rng: the random source, seed it to replay a sequence
+    :param accounts: the accounts interacting with the contracts
+    :param count: the number of operations
+    :param max_amount: the largest amount used in an operation
+    :param min_yield: the smallest `inject_yield` amount
+    """
+    methods = ["deposit", "transfer", "burn", "inject_yield"]
+    for _ in range(count):
+        method = rng.choice(methods)
+        amount = rng.choice([0, 1, rng.randint(1, max_amount), rng.randint(1, max_amount)])
+        if method == "deposit":
+            yield method, rng.choice(accounts), max(amount, 1)
+        elif method == "transfer":
+            yield method, rng.choice(accounts), rng.choice(accounts), amount, rng.random() > 0.1
+        elif method == "burn":
+            yield method, rng.choice(accounts), max(amount, 1), rng.random() > 0.1
+        else:
+            yield method, max(amount, min_yield)
@@ -0,0 +1,206 @@
+import json
+import os
+import zipfile
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+# size of the operand of each opcode that has a fixed size operand
+OPERAND_SIZES = {
+    0x00: 1, 0x01: 2, 0x02: 4, 0x03: 8, 0x04: 16, 0x05: 32,  # PUSHINT*
+    0x0A: 4,  # PUSHA
+    0x22: 1, 0x23: 4, 0x24: 1, 0x25: 4, 0x26: 1, 0x27: 4, 0x28: 1, 0x29: 4, 0x2A: 1, 0x2B: 4,  # JMP*
+    0x2C: 1, 0x2D: 4, 0x2E: 1, 0x2F: 4, 0x30: 1, 0x31: 4, 0x32: 1, 0x33: 4,  # JMP*
+    0x34: 1, 0x35: 4, 0x37: 2,  # CALL, CALL_L, CALLT
+    0x3B: 2, 0x3C: 8, 0x3D: 1, 0x3E: 4,  # TRY, TRY_L, ENDTRY, ENDTRY_L
+    0x41: 4,  # SYSCALL
+    0x56: 1, 0x57: 2,  # INITSSLOT, INITSLOT
+    0x5F: 1, 0x67: 1, 0x6F: 1, 0x77: 1, 0x7F: 1, 0x87: 1,  # LDSFLD, STSFLD, LDLOC, STLOC, LDARG, STARG
+    0xC4: 1, 0xD9: 1, 0xDB: 1,  # NEWARRAY_T, ISTYPE, CONVERT
+}
+
+# size of the length prefix of the PUSHDATA opcodes
+PREFIX_SIZES = {0x0C: 1, 0x0D: 2, 0x0E: 4}
+
+OPCODE_NAMES = {
+    0x00: "PUSHINT8", 0x01: "PUSHINT16", 0x02: "PUSHINT32", 0x03: "PUSHINT64", 0x04: "PUSHINT128",
+    0x05: "PUSHINT256", 0x08: "PUSHT", 0x09: "PUSHF", 0x0A: "PUSHA", 0x0B: "PUSHNULL", 0x0C: "PUSHDATA1",
+    0x0D: "PUSHDATA2", 0x0E: "PUSHDATA4", 0x0F: "PUSHM1",
+    **{0x10 + value: f"PUSH{value}" for value in range(17)},
+    0x21: "NOP", 0x22: "JMP", 0x23: "JMP_L", 0x24: "JMPIF", 0x25: "JMPIF_L", 0x26: "JMPIFNOT", 0x27: "JMPIFNOT_L",
+    0x28: "JMPEQ", 0x29: "JMPEQ_L", 0x2A: "JMPNE", 0x2B: "JMPNE_L", 0x2C: "JMPGT", 0x2D: "JMPGT_L", 0x2E: "JMPGE",
+    0x2F: "JMPGE_L", 0x30: "JMPLT", 0x31: "JMPLT_L", 0x32: "JMPLE", 0x33: "JMPLE_L", 0x34: "CALL", 0x35: "CALL_L",
+    0x36: "CALLA", 0x37: "CALLT", 0x38: "ABORT", 0x39: "ASSERT", 0x3A: "THROW", 0x3B: "TRY", 0x3C: "TRY_L",
+    0x3D: "ENDTRY", 0x3E: "ENDTRY_L", 0x3F: "ENDFINALLY", 0x40: "RET", 0x41: "SYSCALL",
+    0x43: "DEPTH", 0x45: "DROP", 0x46: "NIP", 0x48: "XDROP", 0x49: "CLEAR", 0x4A: "DUP", 0x4B: "OVER", 0x4D: "PICK",
+    0x4E: "TUCK", 0x50: "SWAP", 0x51: "ROT", 0x52: "ROLL", 0x53: "REVERSE3", 0x54: "REVERSE4", 0x55: "REVERSEN",
+    0x56: "INITSSLOT", 0x57: "INITSLOT",
+    **{0x58 + index: f"LDSFLD{index}" for index in range(7)}, 0x5F: "LDSFLD",
+    **{0x60 + index: f"STSFLD{index}" for index in range(7)}, 0x67: "STSFLD",
+    **{0x68 + index: f"LDLOC{index}" for index in range(7)}, 0x6F: "LDLOC",
+    **{0x70 + index: f"STLOC{index}" for index in range(7)}, 0x77: "STLOC",
+    **{0x78 + index: f"LDARG{index}" for index in range(7)}, 0x7F: "LDARG",
+    **{0x80 + index: f"STARG{index}" for index in range(7)}, 0x87: "STARG",
+    0x88: "NEWBUFFER", 0x89: "MEMCPY", 0x8B: "CAT", 0x8C: "SUBSTR", 0x8D: "LEFT", 0x8E: "RIGHT",
+    0x90: "INVERT", 0x91: "AND", 0x92: "OR", 0x93: "XOR", 0x97: "EQUAL", 0x98: "NOTEQUAL",
+    0x99: "SIGN", 0x9A: "ABS", 0x9B: "NEGATE", 0x9C: "INC", 0x9D: "DEC", 0x9E: "ADD", 0x9F: "SUB", 0xA0: "MUL",
+    0xA1: "DIV", 0xA2: "MOD", 0xA3: "POW", 0xA4: "SQRT", 0xA5: "MODMUL", 0xA6: "MODPOW", 0xA8: "SHL", 0xA9: "SHR",
+    0xAA: "NOT", 0xAB: "BOOLAND", 0xAC: "BOOLOR", 0xB1: "NZ", 0xB3: "NUMEQUAL", 0xB4: "NUMNOTEQUAL", 0xB5: "LT",
+    0xB6: "LE", 0xB7: "GT", 0xB8: "GE", 0xB9: "MIN", 0xBA: "MAX", 0xBB: "WITHIN",
+    0xBE: "PACKMAP", 0xBF: "PACKSTRUCT", 0xC0: "PACK", 0xC1: "UNPACK", 0xC2: "NEWARRAY0", 0xC3: "NEWARRAY",
+    0xC4: "NEWARRAY_T", 0xC5: "NEWSTRUCT0", 0xC6: "NEWSTRUCT", 0xC8: "NEWMAP", 0xCA: "SIZE", 0xCB: "HASKEY",
+    0xCC: "KEYS", 0xCD: "VALUES", 0xCE: "PICKITEM", 0xCF: "APPEND", 0xD0: "SETITEM", 0xD1: "REVERSEITEMS",
+    0xD2: "REMOVE", 0xD3: "CLEARITEMS", 0xD4: "POPITEM", 0xD8: "ISNULL", 0xD9: "ISTYPE", 0xDB: "CONVERT",
+    0xE0: "ABORTMSG", 0xE1: "ASSERTMSG",
+}
+
+
+class Instruction(NamedTuple):
+    """
+    A single NeoVM instruction of a contracts script
+    """
+    address: int
+    opcode: int
+    operand: bytes
+    size: int
+
+    @property
+    def name(self) -> str:
+        return OPCODE_NAMES.get(self.opcode, hex(self.opcode))
+
+
+def _read_var_int(data: bytes, offset: int) -> Tuple[int, int]:
+    """
+    Reads a variable length integer.
+    :return: the integer value & the offset right after it
+    """
+    prefix = data[offset]
+    if prefix < 0xFD:
+        return prefix, offset + 1
+
+    size = {0xFD: 2, 0xFE: 4, 0xFF: 8}[prefix]
+    return int.from_bytes(data[offset + 1:offset + 1 + size], "little"), offset + 1 + size
+
+
+class MethodToken(NamedTuple):
+    """
+    A static call of the contracts, i.e. the target of a CALLT instruction
+    """
+    hash: bytes
+    method: str
+    parameters_count: int
+    has_return_value: bool
+    call_flags: int
+
+
+class Nef(NamedTuple):
+    script: bytes
+    tokens: List[MethodToken]
+
+
+def read_nef(nef_path: str) -> Nef:
+    """
+    Parses a NEF file.
+    :param nef_path: path to the .nef file
+    :return: the contracts script & method tokens
+    """
+    with open(nef_path, "rb") as nef_file:
+        return parse_nef(nef_file.read())
+
+
+def parse_nef(nef: bytes) -> Nef:
+    """
+    Parses the content of a NEF file.
+    :return: the contracts script & method tokens
+    """
+    assert nef[:4] == b"NEF3", "not a NEF file"
+
+    offset = 4 + 64  # magic & compiler
+    source_length, offset = _read_var_int(nef, offset)
+    offset += source_length + 1  # source & reserved byte
+
+    tokens = []
+    tokens_count, offset = _read_var_int(nef, offset)
+    for _ in range(tokens_count):
+        token_hash = nef[offset:offset + 20]
+        method_length, offset = _read_var_int(nef, offset + 20)
+        method = nef[offset:offset + method_length].decode()
+        offset += method_length
+        parameters_count = int.from_bytes(nef[offset:offset + 2], "little")
+        tokens.append(MethodToken(token_hash, method, parameters_count, nef[offset + 2] != 0, nef[offset + 3]))
+        offset += 2 + 1 + 1  # parameters count, has return value, call flags
+
+    offset += 2  # reserved
+    script_length, offset = _read_var_int(nef, offset)
+    return Nef(nef[offset:offset + script_length], tokens)
+
+
+def read_nef_script(nef_path: str) -> bytes:
+    """
+    Extracts the NeoVM script out of a NEF file.
+    :param nef_path: path to the .nef file
+    :return: the contracts script
+    """
+    return read_nef(nef_path).script
+
+
+def iter_instructions(script: bytes) -> Iterator[Instruction]:
+    """
+    Walks over the instructions of a NeoVM script.
+    :param script: the contracts script
+    """
+    address = 0
+    while address < len(script):
+        opcode = script[address]
+        operand_start = address + 1
+
+        if opcode in PREFIX_SIZES:
+            prefix_size = PREFIX_SIZES[opcode]
+            data_length = int.from_bytes(script[operand_start:operand_start + prefix_size], "little")
+            operand_start += prefix_size
+            operand_size = data_length
+        else:
+            operand_size = OPERAND_SIZES.get(opcode, 0)
+
+        operand = script[operand_start:operand_start + operand_size]
+        size = operand_start + operand_size - address
+        yield Instruction(address, opcode, operand, size)
+        address += size
+
+
+def load_debug_info(contract_path: str) -> dict:
+    """
+    Loads the debug information generated with the contracts (`compile_and_save(..., debug=True)`)
+    :param contract_path: path to the contracts source
+    :return: the debug information json
+    """
+    debug_info_path = contract_path.replace(".py", ".nefdbgnfo")
+    with zipfile.ZipFile(debug_info_path) as debug_info_zip:
+        debug_json_name = os.path.basename(contract_path).replace(".py", ".debug.json")
+        return json.loads(debug_info_zip.read(debug_json_name))
+
+
+def method_ranges(debug_info: dict) -> Dict[str, Tuple[int, int]]:
+    """
+    Maps each contracts method to the script addresses range it was compiled to.
+    :param debug_info: the contracts debug information
+    :return: method name -> (first address, last address)
+    """
+    ranges = {}
+    for method in debug_info["methods"]:
+        name = method["name"].split(",")[-1]
+        start, end = method["range"].split("-")
+        ranges[name] = (int(start), int(end))
+    return ranges
+
+
+def count_method_instructions(script: bytes, debug_info: dict) -> Dict[str, int]:
+    """
+    Counts the instructions each contracts method was compiled to.
+    :param script: the contracts script
+    :param debug_info: the contracts debug information
+    :return: method name -> number of instructions
+    """
+    instructions = list(iter_instructions(script))
+    return {
+        name: sum(1 for instruction in instructions if start <= instruction.address <= end)
+        for name, (start, end) in method_ranges(debug_info).items()
+    }
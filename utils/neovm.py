@@ -0,0 +1,1308 @@
+"""
+A small in-process NeoVM & application engine.
+
+The TestEngine runs every invocation in a separate process and only reports its outcome. This module executes the
+compiled contracts instruction by instruction instead, so executions can be observed step by step (see
+`utils.profiler`). It implements the whole NeoVM instruction set, the syscalls & the native contracts methods the repo
+contracts use, with the N3 opcode & syscall prices. It's not a full node: witnesses are checked against the signers
+only (with a global scope), and there are no blocks nor transactions.
+"""
+import copy
+import hashlib
+import json
+import math
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from offchain.rpc import CONTRACT_CALL_SYSCALL, SYSCALL, emit_push
+from utils.nef import MethodToken, Instruction, iter_instructions, parse_nef, read_nef
+
+# stack items types, as used by ISTYPE & CONVERT
+ANY = 0x00
+POINTER = 0x10
+BOOLEAN = 0x20
+INTEGER = 0x21
+BYTE_STRING = 0x28
+BUFFER = 0x30
+ARRAY = 0x40
+STRUCT = 0x41
+MAP = 0x48
+INTEROP_INTERFACE = 0x60
+
+MAX_INTEGER_SIZE = 32
+
+# default network policies
+EXEC_FEE_FACTOR = 30
+STORAGE_PRICE = 100_000
+
+# CallFlags.All, the flags of the entry script call
+CALL_FLAGS_ALL = 0x0F
+# script hash of the entry script of the invocations started by `Chain.invoke`, i.e. their calling script hash
+ENTRY_SCRIPT_HASH = hashlib.new("ripemd160", hashlib.sha256(b"neovm entry script").digest()).digest()
+
+# execution price of each opcode, multiplied by EXEC_FEE_FACTOR
+OPCODE_PRICES = {
+    **{opcode: 1 << 0 for opcode in (0x00, 0x01, 0x02, 0x03)},  # PUSHINT8-64
+    0x04: 1 << 2, 0x05: 1 << 2,  # PUSHINT128-256
+    0x08: 1 << 0, 0x09: 1 << 0, 0x0A: 1 << 2, 0x0B: 1 << 0,  # PUSHT, PUSHF, PUSHA, PUSHNULL
+    0x0C: 1 << 3, 0x0D: 1 << 9, 0x0E: 1 << 12,  # PUSHDATA1-4
+    **{opcode: 1 << 0 for opcode in range(0x0F, 0x21)},  # PUSHM1-PUSH16
+    0x21: 1 << 0,  # NOP
+    **{opcode: 1 << 1 for opcode in range(0x22, 0x34)},  # JMP*
+    0x34: 1 << 9, 0x35: 1 << 9, 0x36: 1 << 9, 0x37: 1 << 15,  # CALL, CALL_L, CALLA, CALLT
+    0x38: 0, 0x39: 1 << 0, 0x3A: 1 << 9,  # ABORT, ASSERT, THROW
+    0x3B: 1 << 2, 0x3C: 1 << 2, 0x3D: 1 << 2, 0x3E: 1 << 2, 0x3F: 1 << 2,  # TRY*, ENDTRY*, ENDFINALLY
+    0x40: 0, 0x41: 0,  # RET, SYSCALL
+    0x43: 1 << 1, 0x45: 1 << 1, 0x46: 1 << 1, 0x48: 1 << 4, 0x49: 1 << 4,  # DEPTH, DROP, NIP, XDROP, CLEAR
+    0x4A: 1 << 1, 0x4B: 1 << 1, 0x4D: 1 << 1, 0x4E: 1 << 1,  # DUP, OVER, PICK, TUCK
+    0x50: 1 << 1, 0x51: 1 << 1, 0x52: 1 << 4, 0x53: 1 << 1, 0x54: 1 << 1, 0x55: 1 << 4,  # SWAP-REVERSEN
+    0x56: 1 << 4, 0x57: 1 << 6,  # INITSSLOT, INITSLOT
+    **{opcode: 1 << 1 for opcode in range(0x58, 0x88)},  # LDSFLD-STARG
+    0x88: 1 << 8, 0x89: 1 << 11, 0x8B: 1 << 11, 0x8C: 1 << 11, 0x8D: 1 << 11, 0x8E: 1 << 11,  # NEWBUFFER-RIGHT
+    0x90: 1 << 2, 0x91: 1 << 3, 0x92: 1 << 3, 0x93: 1 << 3, 0x97: 1 << 5, 0x98: 1 << 5,  # INVERT-NOTEQUAL
+    0x99: 1 << 2, 0x9A: 1 << 2, 0x9B: 1 << 2, 0x9C: 1 << 2, 0x9D: 1 << 2,  # SIGN, ABS, NEGATE, INC, DEC
+    0x9E: 1 << 3, 0x9F: 1 << 3, 0xA0: 1 << 3, 0xA1: 1 << 3, 0xA2: 1 << 3,  # ADD, SUB, MUL, DIV, MOD
+    0xA3: 1 << 6, 0xA4: 1 << 6, 0xA5: 1 << 5, 0xA6: 1 << 11, 0xA8: 1 << 3, 0xA9: 1 << 3,  # POW-SHR
+    0xAA: 1 << 2, 0xAB: 1 << 3, 0xAC: 1 << 3, 0xB1: 1 << 2,  # NOT, BOOLAND, BOOLOR, NZ
+    **{opcode: 1 << 3 for opcode in range(0xB3, 0xBC)},  # NUMEQUAL-WITHIN
+    0xBE: 1 << 11, 0xBF: 1 << 11, 0xC0: 1 << 11, 0xC1: 1 << 11,  # PACKMAP, PACKSTRUCT, PACK, UNPACK
+    0xC2: 1 << 4, 0xC3: 1 << 9, 0xC4: 1 << 9, 0xC5: 1 << 4, 0xC6: 1 << 9, 0xC8: 1 << 3,  # NEWARRAY0-NEWMAP
+    0xCA: 1 << 2, 0xCB: 1 << 6, 0xCC: 1 << 4, 0xCD: 1 << 13, 0xCE: 1 << 6,  # SIZE-PICKITEM
+    0xCF: 1 << 13, 0xD0: 1 << 13, 0xD1: 1 << 13, 0xD2: 1 << 4, 0xD3: 1 << 4, 0xD4: 1 << 4,  # APPEND-POPITEM
+    0xD8: 1 << 1, 0xD9: 1 << 1, 0xDB: 1 << 13,  # ISNULL, ISTYPE, CONVERT
+    0xE0: 0, 0xE1: 1 << 0,  # ABORTMSG, ASSERTMSG
+}
+
+# native contracts script hashes
+CONTRACT_MANAGEMENT_HASH = bytes.fromhex("fffdc93764dbaddd97c48f252a53ea4643faa3fd")[::-1]
+STD_LIB_HASH = bytes.fromhex("acce6fd80d44e1796aa0c2c625e9e4e0ce39efc0")[::-1]
+NEO_HASH = bytes.fromhex("ef4073a0f2b305a38ec4050e4d3d28bc40ea63f5")[::-1]
+GAS_HASH = bytes.fromhex("d2a4cff31913016155e38e474a2c06d08be276cf")[::-1]
+
+NATIVE_NAMES = {
+    CONTRACT_MANAGEMENT_HASH: "ContractManagement",
+    STD_LIB_HASH: "StdLib",
+    NEO_HASH: "NeoToken",
+    GAS_HASH: "GasToken",
+}
+
+
+class VMFault(Exception):
+    """
+    Raised when the execution FAULTs
+    """
+
+
+class VMException(Exception):
+    """
+    A catchable exception, thrown by THROW or by an invalid instruction
+    """
+
+    def __init__(self, item: Any):
+        super().__init__(item)
+        self.item = item
+
+
+class Struct(list):
+    """
+    NeoVM Struct, a list copied by value
+    """
+
+
+class Map:
+    """
+    NeoVM Map, keyed by primitive stack items
+    """
+
+    def __init__(self):
+        self._items: Dict[tuple, Tuple[Any, Any]] = {}
+
+    @staticmethod
+    def _key(key: Any) -> tuple:
+        if type_of(key) not in (BOOLEAN, INTEGER, BYTE_STRING):
+            raise VMException("Map keys must be primitive types")
+        return type_of(key), key
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Any) -> bool:
+        return self._key(key) in self._items
+
+    def __getitem__(self, key: Any) -> Any:
+        if key not in self:
+            raise VMException("Map key not found")
+        return self._items[self._key(key)][1]
+
+    def __setitem__(self, key: Any, value: Any):
+        self._items[self._key(key)] = (key, value)
+
+    def __delitem__(self, key: Any):
+        self._items.pop(self._key(key), None)
+
+    def keys(self) -> List[Any]:
+        return [key for key, _ in self._items.values()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self._items.values()]
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        return list(self._items.values())
+
+    def clear(self):
+        self._items.clear()
+
+
+class Pointer(NamedTuple):
+    script: bytes
+    position: int
+
+
+def type_of(item: Any) -> int:
+    if item is None:
+        return ANY
+    if isinstance(item, bool):
+        return BOOLEAN
+    if isinstance(item, int):
+        return INTEGER
+    if isinstance(item, bytes):
+        return BYTE_STRING
+    if isinstance(item, bytearray):
+        return BUFFER
+    if isinstance(item, Struct):
+        return STRUCT
+    if isinstance(item, list):
+        return ARRAY
+    if isinstance(item, Map):
+        return MAP
+    if isinstance(item, Pointer):
+        return POINTER
+    return INTEROP_INTERFACE
+
+
+def int_to_bytes(value: int) -> bytes:
+    """
+    :return: the minimal two's complement little endian representation of `value`, as NeoVM integers
+    """
+    if value == 0:
+        return b""
+    length = ((value if value >= 0 else ~value).bit_length() + 8) // 8
+    return value.to_bytes(length, "little", signed=True)
+
+
+def check_integer(value: int) -> int:
+    if len(int_to_bytes(value)) > MAX_INTEGER_SIZE:
+        raise VMException("Integer overflow")
+    return value
+
+
+def to_int(item: Any) -> int:
+    item_type = type_of(item)
+    if item_type in (BOOLEAN, INTEGER):
+        return int(item)
+    if item_type in (BYTE_STRING, BUFFER):
+        if len(item) > MAX_INTEGER_SIZE:
+            raise VMException("Integer too large")
+        return int.from_bytes(item, "little", signed=True)
+    raise VMException(f"Can't convert {type(item).__name__} to an integer")
+
+
+def to_bool(item: Any) -> bool:
+    item_type = type_of(item)
+    if item_type == ANY:
+        return False
+    if item_type in (BOOLEAN, INTEGER):
+        return item != 0
+    if item_type == BYTE_STRING:
+        if len(item) > MAX_INTEGER_SIZE:
+            raise VMException("ByteString too large to convert to a boolean")
+        return any(item)
+    return True
+
+
+def to_bytes(item: Any) -> bytes:
+    item_type = type_of(item)
+    if item_type == BOOLEAN:
+        return b"\x01" if item else b"\x00"
+    if item_type == INTEGER:
+        return int_to_bytes(item)
+    if item_type in (BYTE_STRING, BUFFER):
+        return bytes(item)
+    raise VMException(f"Can't convert {type(item).__name__} to bytes")
+
+
+def items_equal(first: Any, second: Any) -> bool:
+    """
+    NeoVM EQUAL semantics: primitive types are compared by value, Structs deeply, the other types by reference.
+    """
+    first_type, second_type = type_of(first), type_of(second)
+    if first_type != second_type:
+        return False
+    if first_type in (ANY, BOOLEAN, INTEGER, BYTE_STRING, POINTER):
+        return first == second
+    if first_type == STRUCT:
+        return len(first) == len(second) and all(items_equal(x, y) for x, y in zip(first, second))
+    return first is second
+
+
+def clone_struct(item: Any) -> Any:
+    if isinstance(item, Struct):
+        return Struct(clone_struct(value) for value in item)
+    return item
+
+
+def convert(item: Any, target_type: int) -> Any:
+    item_type = type_of(item)
+    if target_type == item_type:
+        return item
+    if item_type == ANY:
+        if target_type == ANY:
+            raise VMException("Invalid conversion")
+        return None
+    if target_type == BOOLEAN:
+        return to_bool(item)
+    if item_type in (BOOLEAN, INTEGER, BYTE_STRING, BUFFER):
+        if target_type == INTEGER:
+            return to_int(item)
+        if target_type == BYTE_STRING:
+            return to_bytes(item)
+        if target_type == BUFFER:
+            return bytearray(to_bytes(item))
+    if item_type == ARRAY and target_type == STRUCT:
+        return Struct(item)
+    if item_type == STRUCT and target_type == ARRAY:
+        return list(item)
+    raise VMException(f"Can't convert {type(item).__name__} to type {target_type:#x}")
+
+
+def to_python(item: Any) -> Any:
+    """
+    Converts a stack item to plain python values, e.g. for results & notifications.
+    """
+    if isinstance(item, bytearray):
+        return bytes(item)
+    if isinstance(item, list):
+        return [to_python(value) for value in item]
+    if isinstance(item, Map):
+        return {to_python(key): to_python(value) for key, value in item.items()}
+    return item
+
+
+def interop_hash(name: str) -> bytes:
+    return hashlib.sha256(name.encode()).digest()[:4]
+
+
+def hash160(data: bytes) -> bytes:
+    return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+
+
+def entry_script(script_hash: bytes, method: str, args: List[Any]) -> bytes:
+    """
+    Builds the script of a transaction invoking a contracts method, as `ScriptBuilder.EmitDynamicCall` does: the
+    arguments packed in an array, CallFlags.All, the method & the script hash, then System.Contract.Call.
+    :return: the NeoVM script
+    """
+    script = bytearray()
+    emit_push(script, list(args))
+    emit_push(script, CALL_FLAGS_ALL)
+    emit_push(script, method)
+    emit_push(script, script_hash)
+    script += bytes([SYSCALL]) + CONTRACT_CALL_SYSCALL
+    return bytes(script)
+
+
+class ContractMethod(NamedTuple):
+    name: str
+    offset: int
+    parameters_count: int
+    has_return_value: bool
+
+
+class Contract:
+    """
+    A deployed contracts
+    """
+
+    def __init__(self, contract_id: int, script_hash: bytes, script: bytes, tokens: List[MethodToken],
+                 manifest: dict, name: str):
+        self.id = contract_id
+        self.hash = script_hash
+        self.script = script
+        self.tokens = tokens
+        self.manifest = manifest
+        self.name = name
+        self.methods = {
+            (method["name"], len(method["parameters"])): ContractMethod(
+                method["name"], method["offset"], len(method["parameters"]), method["returntype"] != "Void"
+            )
+            for method in manifest["abi"]["methods"]
+        }
+        self.instructions: Dict[int, Instruction] = {
+            instruction.address: instruction for instruction in iter_instructions(script)
+        }
+
+    def method(self, name: str, parameters_count: int) -> Optional[ContractMethod]:
+        return self.methods.get((name, parameters_count))
+
+
+class SharedStates:
+    """
+    The states shared by an execution context & its clones, i.e. a contracts invocation
+    """
+
+    def __init__(self, contract: Contract, calling_script_hash: Optional[bytes]):
+        self.contract = contract
+        self.calling_script_hash = calling_script_hash
+        self.evaluation_stack: List[Any] = []
+        self.static_fields: Optional[List[Any]] = None
+
+
+class TryContext:
+    def __init__(self, catch_pointer: int, finally_pointer: int):
+        self.catch_pointer = catch_pointer
+        self.finally_pointer = finally_pointer
+        self.end_pointer = -1
+        self.state = "try"
+
+
+class ExecutionContext:
+    def __init__(self, shared: SharedStates, position: int, rvcount: int, method: str):
+        self.shared = shared
+        self.ip = position
+        self.rvcount = rvcount
+        self.method = method
+        self.local_fields: Optional[List[Any]] = None
+        self.arguments: Optional[List[Any]] = None
+        self.try_stack: List[TryContext] = []
+
+    @property
+    def contract(self) -> Contract:
+        return self.shared.contract
+
+    @property
+    def script_hash(self) -> bytes:
+        return self.shared.contract.hash
+
+    @property
+    def evaluation_stack(self) -> List[Any]:
+        return self.shared.evaluation_stack
+
+    def clone(self, position: int, method: str) -> "ExecutionContext":
+        return ExecutionContext(self.shared, position, 0, method)
+
+
+class StorageContext(NamedTuple):
+    script_hash: bytes
+    read_only: bool
+
+
+class StorageIterator:
+    # `storage.find` options
+    KEYS_ONLY = 0x01
+    REMOVE_PREFIX = 0x02
+    VALUES_ONLY = 0x04
+
+    def __init__(self, entries: List[Tuple[bytes, bytes]], prefix_length: int, options: int):
+        self.entries = entries
+        self.prefix_length = prefix_length
+        self.options = options
+        self.index = -1
+
+    def next(self) -> bool:
+        self.index += 1
+        return self.index < len(self.entries)
+
+    def value(self) -> Any:
+        key, value = self.entries[self.index]
+        if self.options & self.REMOVE_PREFIX:
+            key = key[self.prefix_length:]
+        if self.options & self.KEYS_ONLY:
+            return key
+        if self.options & self.VALUES_ONLY:
+            return value
+        return Struct([key, value])
+
+
+class Notification(NamedTuple):
+    script_hash: bytes
+    event_name: str
+    state: list
+
+
+class InvocationResult(NamedTuple):
+    state: str
+    result: Any
+    gas_consumed: int
+    notifications: List[Notification]
+    exception: Optional[str]
+
+
+class Tracer:
+    """
+    Observes an execution, see `Chain.tracer`
+    """
+
+    def step(self, chain: "Chain", context: ExecutionContext, instruction: Instruction):
+        """
+        Called before executing each instruction.
+        """
+
+    def fee(self, label: str, amount: int):
+        """
+        Called for every GAS charge, e.g. the opcode price, a syscall price or a storage fee.
+        """
+
+
+class NativeMethod(NamedTuple):
+    handler: Callable
+    cpu_fee: int
+    storage_fee: int
+    has_return_value: bool
+
+
+class Chain:
+    """
+    Application engine & chain state, executing the contracts invocations.
+    """
+
+    def __init__(self, time: int = 1_600_000_000_000, tracer: Optional[Tracer] = None):
+        """
+        :param time: the persisting block timestamp, in milliseconds
+        :param tracer: observes the executions
+        """
+        self.time = time
+        self.tracer = tracer
+        self.contracts: Dict[bytes, Contract] = {}
+        self.storage: Dict[bytes, Dict[bytes, bytes]] = {}
+        # NEO & GAS balances
+        self.balances: Dict[bytes, Dict[bytes, int]] = {NEO_HASH: {}, GAS_HASH: {}}
+
+        self.natives: Dict[bytes, Dict[str, NativeMethod]] = {
+            CONTRACT_MANAGEMENT_HASH: {
+                "getContract": NativeMethod(self._get_contract, 1 << 15, 0, True),
+                "update": NativeMethod(self._update_contract, 0, 0, False),
+            },
+            STD_LIB_HASH: {
+                "itoa": NativeMethod(lambda value, base=10: self._itoa(value, base), 1 << 12, 0, True),
+                "atoi": NativeMethod(lambda value, base=10: int(bytes(value).decode(), base), 1 << 6, 0, True),
+                "jsonSerialize": NativeMethod(lambda item: json.dumps(to_python(item)).encode(), 1 << 12, 0, True),
+            },
+        }
+        for token_hash, symbol, decimals in ((NEO_HASH, "NEO", 0), (GAS_HASH, "GAS", 8)):
+            self.natives[token_hash] = self._nep17_methods(token_hash, symbol, decimals)
+
+        self.invocation_stack: List[ExecutionContext] = []
+        self.result_stack: List[Any] = []
+        self.signers: List[bytes] = []
+        self.notifications: List[Notification] = []
+        self.gas_consumed = 0
+        self._uncaught_exception: Optional[VMException] = None
+        # calling script hash of the running native method
+        self._native_caller: Optional[bytes] = None
+
+    # state
+
+    def deploy(self, nef_path: str) -> bytes:
+        """
+        Deploys a compiled contracts, its manifest being next to the .nef file.
+        The script hash is the hash of the script, as with the TestEngine.
+        :return: the contracts script hash
+        """
+        nef = read_nef(nef_path)
+        script_hash = hash160(nef.script)
+        if script_hash not in self.contracts:
+            with open(nef_path.replace(".nef", ".manifest.json")) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.contracts[script_hash] = Contract(len(self.contracts) + 1, script_hash, nef.script, nef.tokens,
+                                                   manifest, manifest["name"])
+            self.storage.setdefault(script_hash, {})
+        return script_hash
+
+    def add_balance(self, token_hash: bytes, account: bytes, amount: int):
+        """
+        Credits NEO or GAS to an account, without running any contracts.
+        """
+        balances = self.balances[token_hash]
+        balances[account] = balances.get(account, 0) + amount
+
+    def invoke(self, script_hash: bytes, method: str, args: List[Any] = (), signers: List[bytes] = (),
+               gas_limit: Optional[int] = None) -> InvocationResult:
+        """
+        Invokes a contracts method, as a transaction calling it would. The state changes are reverted on FAULT.
+        :return: the invocation outcome
+        """
+        # the contracts aren't mutated, `ContractManagement.update` replaces them
+        snapshot = copy.deepcopy((self.storage, self.balances)), dict(self.contracts)
+        self.signers = list(signers)
+        self.notifications = []
+        self.gas_consumed = 0
+        self.result_stack = []
+        self.invocation_stack = []
+
+        try:
+            entry = Contract(0, ENTRY_SCRIPT_HASH, entry_script(script_hash, method, args), [],
+                             {"abi": {"methods": []}}, "EntryScript")
+            self.invocation_stack.append(ExecutionContext(SharedStates(entry, None), 0, -1, "script"))
+            while self.invocation_stack:
+                self._execute_next()
+                if gas_limit is not None and self.gas_consumed > gas_limit:
+                    raise VMFault("Insufficient GAS")
+        except (VMFault, VMException) as error:
+            (self.storage, self.balances), self.contracts = snapshot
+            return InvocationResult("FAULT", None, self.gas_consumed, [], str(error))
+
+        result = to_python(self.result_stack[-1]) if self.result_stack else None
+        return InvocationResult("HALT", result, self.gas_consumed, self.notifications, None)
+
+    # execution
+
+    def add_gas(self, amount: int, label: str):
+        self.gas_consumed += amount
+        if self.tracer is not None:
+            self.tracer.fee(label, amount)
+
+    @property
+    def current_context(self) -> ExecutionContext:
+        return self.invocation_stack[-1]
+
+    def _method_name(self, contract: Contract, position: int) -> str:
+        for method in contract.methods.values():
+            if method.offset == position:
+                return method.name
+        return f"{position}"
+
+    def _load_contract(self, contract: Contract, method: ContractMethod, args: List[Any],
+                       calling_script_hash: Optional[bytes], rvcount: int):
+        context = ExecutionContext(SharedStates(contract, calling_script_hash), method.offset, rvcount, method.name)
+        for arg in reversed(args):
+            context.evaluation_stack.append(arg)
+        self.invocation_stack.append(context)
+
+        # the static variables are initialized before every call
+        initialize = contract.method("_initialize", 0)
+        if initialize is not None:
+            self.invocation_stack.append(context.clone(initialize.offset, initialize.name))
+
+    def _run_until(self, depth: int):
+        """
+        Executes until the invocation stack goes back to `depth` contexts, used for the calls made by natives.
+        """
+        while len(self.invocation_stack) > depth:
+            self._execute_next()
+
+    def call_contract(self, script_hash: bytes, method: str, args: List[Any], calling_script_hash: bytes,
+                      has_return_value: Optional[bool] = None) -> Optional[List[Any]]:
+        """
+        Calls a contracts method from the current context, natives are run right away.
+        :return: the native call results, None for non native calls
+        """
+        if script_hash in self.natives:
+            native_method = self.natives[script_hash].get(method)
+            if native_method is None:
+                raise VMException(f"Native method {method} not supported")
+            native_name = f"{NATIVE_NAMES[script_hash]}.{method}"
+            self.add_gas(native_method.cpu_fee * EXEC_FEE_FACTOR, f"native {native_name}")
+            if native_method.storage_fee:
+                self.add_gas(native_method.storage_fee * STORAGE_PRICE, f"native {native_name} storage")
+
+            self._native_caller = calling_script_hash
+            result = native_method.handler(*args)
+            return [result] if native_method.has_return_value else []
+
+        contract = self.contracts.get(script_hash)
+        if contract is None:
+            raise VMException(f"Called contract {script_hash[::-1].hex()} not found")
+        contract_method = contract.method(method, len(args))
+        if contract_method is None or method.startswith("_"):
+            raise VMException(f"Method {method} with {len(args)} parameters not found")
+
+        if has_return_value is None and not contract_method.has_return_value:
+            # Contract.Call always returns a value, Null for void methods
+            self.current_context.evaluation_stack.append(None)
+        self._load_contract(contract, contract_method, args, calling_script_hash,
+                            rvcount=1 if contract_method.has_return_value else 0)
+        return None
+
+    def _call_from_native(self, native_hash: bytes, script_hash: bytes, method: str, args: List[Any]):
+        depth = len(self.invocation_stack)
+        context = self.current_context
+        stack_size = len(context.evaluation_stack)
+        self.call_contract(script_hash, method, args, native_hash)
+        self._run_until(depth)
+        # the native discards the callback result
+        del context.evaluation_stack[stack_size:]
+
+    def _execute_next(self):
+        context = self.current_context
+        instruction = context.contract.instructions.get(context.ip)
+        if instruction is None:
+            if context.ip >= len(context.contract.script):
+                instruction = Instruction(context.ip, 0x40, b"", 1)  # implicit RET
+            else:
+                raise VMFault(f"Invalid instruction pointer {context.ip}")
+
+        if self.tracer is not None:
+            self.tracer.step(self, context, instruction)
+        self.add_gas(OPCODE_PRICES.get(instruction.opcode, 0) * EXEC_FEE_FACTOR, instruction.name)
+
+        try:
+            jumped = self._execute(context, instruction)
+        except VMException as exception:
+            self._execute_throw(exception)
+            return
+        if not jumped:
+            context.ip = instruction.address + instruction.size
+
+    def _execute_throw(self, exception: VMException):
+        self._uncaught_exception = exception
+        while self.invocation_stack:
+            context = self.current_context
+            while context.try_stack:
+                try_context = context.try_stack[-1]
+                if try_context.state == "finally" or (try_context.state == "catch" and try_context.finally_pointer < 0):
+                    context.try_stack.pop()
+                    continue
+                if try_context.state == "try" and try_context.catch_pointer >= 0:
+                    try_context.state = "catch"
+                    context.evaluation_stack.append(exception.item)
+                    context.ip = try_context.catch_pointer
+                    self._uncaught_exception = None
+                else:
+                    try_context.state = "finally"
+                    context.ip = try_context.finally_pointer
+                return
+            self.invocation_stack.pop()
+        raise VMFault(f"Unhandled exception: {exception.item!r}")
+
+    def _jump(self, context: ExecutionContext, instruction: Instruction) -> bool:
+        context.ip = instruction.address + int.from_bytes(instruction.operand, "little", signed=True)
+        return True
+
+    def _execute_ret(self, context: ExecutionContext):
+        popped = self.invocation_stack.pop()
+        caller_stack = self.invocation_stack[-1].evaluation_stack if self.invocation_stack else self.result_stack
+        if popped.evaluation_stack is not caller_stack:
+            if popped.rvcount >= 0 and len(popped.evaluation_stack) != popped.rvcount:
+                raise VMFault("Returned values count doesn't match the method")
+            caller_stack.extend(popped.evaluation_stack)
+            popped.evaluation_stack.clear()
+
+    def _execute(self, context: ExecutionContext, instruction: Instruction) -> bool:
+        """
+        Executes an instruction.
+        :return: whether the instruction pointer was moved
+        """
+        opcode = instruction.opcode
+        stack = context.evaluation_stack
+        pop = stack.pop
+        push = stack.append
+
+        # constants
+        if opcode <= 0x05:
+            push(int.from_bytes(instruction.operand, "little", signed=True))
+        elif opcode == 0x08:
+            push(True)
+        elif opcode == 0x09:
+            push(False)
+        elif opcode == 0x0A:
+            position = instruction.address + int.from_bytes(instruction.operand, "little", signed=True)
+            push(Pointer(context.contract.script, position))
+        elif opcode == 0x0B:
+            push(None)
+        elif opcode in (0x0C, 0x0D, 0x0E):
+            push(bytes(instruction.operand))
+        elif 0x0F <= opcode <= 0x20:
+            push(opcode - 0x10)
+
+        # flow control
+        elif opcode == 0x21:
+            pass
+        elif opcode in (0x22, 0x23):
+            return self._jump(context, instruction)
+        elif opcode in (0x24, 0x25, 0x26, 0x27):
+            condition = to_bool(pop())
+            if condition == (opcode in (0x24, 0x25)):
+                return self._jump(context, instruction)
+        elif 0x28 <= opcode <= 0x33:
+            second, first = to_int(pop()), to_int(pop())
+            comparison = (opcode - 0x28) // 2
+            if (first == second, first != second, first > second, first >= second, first < second,
+                    first <= second)[comparison]:
+                return self._jump(context, instruction)
+        elif opcode in (0x34, 0x35):
+            position = instruction.address + int.from_bytes(instruction.operand, "little", signed=True)
+            context.ip = instruction.address + instruction.size
+            self.invocation_stack.append(context.clone(position, self._method_name(context.contract, position)))
+            return True
+        elif opcode == 0x36:
+            pointer = pop()
+            if not isinstance(pointer, Pointer) or pointer.script != context.contract.script:
+                raise VMException("CALLA requires a pointer of the same script")
+            context.ip = instruction.address + instruction.size
+            self.invocation_stack.append(context.clone(pointer.position,
+                                                       self._method_name(context.contract, pointer.position)))
+            return True
+        elif opcode == 0x37:
+            token = context.contract.tokens[int.from_bytes(instruction.operand, "little")]
+            args = [pop() for _ in range(token.parameters_count)]
+            context.ip = instruction.address + instruction.size
+            results = self.call_contract(token.hash, token.method, args, context.script_hash,
+                                         has_return_value=token.has_return_value)
+            if results is not None:
+                stack.extend(results)
+            return True
+        elif opcode == 0x38:
+            raise VMFault("ABORT is executed")
+        elif opcode == 0x39:
+            if not to_bool(pop()):
+                raise VMFault("ASSERT is executed with false result")
+        elif opcode == 0x3A:
+            raise VMException(pop())
+        elif opcode in (0x3B, 0x3C):
+            half = len(instruction.operand) // 2
+            catch_offset = int.from_bytes(instruction.operand[:half], "little", signed=True)
+            finally_offset = int.from_bytes(instruction.operand[half:], "little", signed=True)
+            context.try_stack.append(TryContext(
+                instruction.address + catch_offset if catch_offset else -1,
+                instruction.address + finally_offset if finally_offset else -1,
+            ))
+        elif opcode in (0x3D, 0x3E):
+            try_context = context.try_stack[-1]
+            end = instruction.address + int.from_bytes(instruction.operand, "little", signed=True)
+            if try_context.finally_pointer >= 0:
+                try_context.state = "finally"
+                try_context.end_pointer = end
+                context.ip = try_context.finally_pointer
+            else:
+                context.try_stack.pop()
+                context.ip = end
+            return True
+        elif opcode == 0x3F:
+            try_context = context.try_stack.pop()
+            if self._uncaught_exception is None:
+                context.ip = try_context.end_pointer
+                return True
+            self._execute_throw(self._uncaught_exception)
+            return True
+        elif opcode == 0x40:
+            self._execute_ret(context)
+            return True
+        elif opcode == 0x41:
+            self._syscall(context, instruction.operand)
+            context.ip = instruction.address + instruction.size
+            return True
+
+        # stack
+        elif opcode == 0x43:
+            push(len(stack))
+        elif opcode == 0x45:
+            pop()
+        elif opcode == 0x46:
+            del stack[-2]
+        elif opcode == 0x48:
+            index = to_int(pop())
+            del stack[-1 - index]
+        elif opcode == 0x49:
+            stack.clear()
+        elif opcode == 0x4A:
+            push(stack[-1])
+        elif opcode == 0x4B:
+            push(stack[-2])
+        elif opcode == 0x4D:
+            index = to_int(pop())
+            if index < 0 or index >= len(stack):
+                raise VMException("PICK out of range")
+            push(stack[-1 - index])
+        elif opcode == 0x4E:
+            stack.insert(-2, stack[-1])
+        elif opcode == 0x50:
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+        elif opcode == 0x51:
+            push(stack.pop(-3))
+        elif opcode == 0x52:
+            index = to_int(pop())
+            if index > 0:
+                push(stack.pop(-1 - index))
+        elif opcode in (0x53, 0x54, 0x55):
+            count = {0x53: 3, 0x54: 4}.get(opcode) or to_int(pop())
+            if count > len(stack):
+                raise VMException("REVERSE out of range")
+            if count > 0:
+                stack[-count:] = stack[-count:][::-1]
+
+        # slots
+        elif opcode == 0x56:
+            context.shared.static_fields = [None] * instruction.operand[0]
+        elif opcode == 0x57:
+            context.local_fields = [None] * instruction.operand[0]
+            context.arguments = [pop() for _ in range(instruction.operand[1])]
+        elif 0x58 <= opcode <= 0x87:
+            group, index = divmod(opcode - 0x58, 8)
+            if index == 7:
+                index = instruction.operand[0]
+            slots = (context.shared.static_fields, context.shared.static_fields, context.local_fields,
+                     context.local_fields, context.arguments, context.arguments)[group]
+            if slots is None or index >= len(slots):
+                raise VMException("Slot out of range")
+            if group % 2 == 0:
+                push(slots[index])
+            else:
+                slots[index] = pop()
+
+        # splice
+        elif opcode == 0x88:
+            push(bytearray(to_int(pop())))
+        elif opcode == 0x89:
+            count, source_index, source = to_int(pop()), to_int(pop()), to_bytes(pop())
+            destination_index, destination = to_int(pop()), pop()
+            if not isinstance(destination, bytearray) or source_index + count > len(source) \
+                    or destination_index + count > len(destination):
+                raise VMException("MEMCPY out of range")
+            destination[destination_index:destination_index + count] = source[source_index:source_index + count]
+        elif opcode == 0x8B:
+            second, first = to_bytes(pop()), to_bytes(pop())
+            push(bytearray(first + second))
+        elif opcode == 0x8C:
+            count, index, data = to_int(pop()), to_int(pop()), to_bytes(pop())
+            if index < 0 or count < 0 or index + count > len(data):
+                raise VMException("SUBSTR out of range")
+            push(bytearray(data[index:index + count]))
+        elif opcode == 0x8D:
+            count, data = to_int(pop()), to_bytes(pop())
+            if count < 0 or count > len(data):
+                raise VMException("LEFT out of range")
+            push(bytearray(data[:count]))
+        elif opcode == 0x8E:
+            count, data = to_int(pop()), to_bytes(pop())
+            if count < 0 or count > len(data):
+                raise VMException("RIGHT out of range")
+            push(bytearray(data[len(data) - count:]))
+
+        # bitwise logic
+        elif opcode == 0x90:
+            push(~to_int(pop()))
+        elif opcode in (0x91, 0x92, 0x93):
+            second, first = to_int(pop()), to_int(pop())
+            push((first & second, first | second, first ^ second)[opcode - 0x91])
+        elif opcode in (0x97, 0x98):
+            second, first = pop(), pop()
+            push(items_equal(first, second) == (opcode == 0x97))
+
+        # arithmetic
+        elif 0x99 <= opcode <= 0x9D:
+            value = to_int(pop())
+            push(check_integer((
+                (value > 0) - (value < 0), abs(value), -value, value + 1, value - 1
+            )[opcode - 0x99]))
+        elif 0x9E <= opcode <= 0xA2 or opcode in (0xA3, 0xA8, 0xA9):
+            second, first = to_int(pop()), to_int(pop())
+            push(check_integer(self._binary_operation(opcode, first, second)))
+        elif opcode == 0xA4:
+            value = to_int(pop())
+            if value < 0:
+                raise VMException("SQRT of a negative value")
+            push(math.isqrt(value))
+        elif opcode == 0xA5:
+            modulus, second, first = to_int(pop()), to_int(pop()), to_int(pop())
+            push(self._binary_operation(0xA2, first * second, modulus))
+        elif opcode == 0xA6:
+            modulus, exponent, value = to_int(pop()), to_int(pop()), to_int(pop())
+            push(pow(value, exponent, modulus))
+        elif opcode == 0xAA:
+            push(not to_bool(pop()))
+        elif opcode in (0xAB, 0xAC):
+            second, first = to_bool(pop()), to_bool(pop())
+            push(first and second if opcode == 0xAB else first or second)
+        elif opcode == 0xB1:
+            push(to_int(pop()) != 0)
+        elif 0xB3 <= opcode <= 0xBA:
+            second, first = pop(), pop()
+            if opcode in (0xB3, 0xB4):
+                result = to_int(first) == to_int(second)
+                push(result if opcode == 0xB3 else not result)
+            elif opcode in (0xB5, 0xB6, 0xB7, 0xB8):
+                if first is None or second is None:
+                    push(False)
+                else:
+                    first, second = to_int(first), to_int(second)
+                    push((first < second, first <= second, first > second, first >= second)[opcode - 0xB5])
+            else:
+                push(min(to_int(first), to_int(second)) if opcode == 0xB9 else max(to_int(first), to_int(second)))
+        elif opcode == 0xBB:
+            upper, lower, value = to_int(pop()), to_int(pop()), to_int(pop())
+            push(lower <= value < upper)
+
+        # compound types
+        elif opcode == 0xBE:
+            result = Map()
+            for _ in range(to_int(pop())):
+                key = pop()
+                result[key] = pop()
+            push(result)
+        elif opcode in (0xBF, 0xC0):
+            count = to_int(pop())
+            if count > len(stack):
+                raise VMException("PACK out of range")
+            items = [pop() for _ in range(count)]
+            push(Struct(items) if opcode == 0xBF else items)
+        elif opcode == 0xC1:
+            compound = pop()
+            if isinstance(compound, Map):
+                for key, value in reversed(compound.items()):
+                    push(value)
+                    push(key)
+            elif isinstance(compound, list):
+                for item in reversed(compound):
+                    push(item)
+            else:
+                raise VMException("UNPACK requires a compound type")
+            push(len(compound))
+        elif opcode == 0xC2:
+            push([])
+        elif opcode in (0xC3, 0xC4):
+            count = to_int(pop())
+            default = {BOOLEAN: False, INTEGER: 0, BYTE_STRING: b""}.get(
+                instruction.operand[0] if opcode == 0xC4 else ANY)
+            push([default] * count)
+        elif opcode == 0xC5:
+            push(Struct())
+        elif opcode == 0xC6:
+            push(Struct([None] * to_int(pop())))
+        elif opcode == 0xC8:
+            push(Map())
+        elif opcode == 0xCA:
+            item = pop()
+            if isinstance(item, (list, Map, bytes, bytearray)):
+                push(len(item))
+            else:
+                push(len(to_bytes(item)))
+        elif opcode == 0xCB:
+            key, compound = pop(), pop()
+            if isinstance(compound, Map):
+                push(key in compound)
+            else:
+                index = to_int(key)
+                if index < 0:
+                    raise VMException("HASKEY index must be positive")
+                push(index < len(compound))
+        elif opcode == 0xCC:
+            compound = pop()
+            if not isinstance(compound, Map):
+                raise VMException("KEYS requires a Map")
+            push(compound.keys())
+        elif opcode == 0xCD:
+            compound = pop()
+            values = compound.values() if isinstance(compound, Map) else list(compound)
+            push([clone_struct(value) for value in values])
+        elif opcode == 0xCE:
+            key, compound = pop(), pop()
+            if isinstance(compound, Map):
+                push(compound[key])
+            elif isinstance(compound, (list, bytes, bytearray)) or type_of(compound) in (BOOLEAN, INTEGER):
+                if not isinstance(compound, (list, bytearray)):
+                    compound = to_bytes(compound)
+                index = to_int(key)
+                if index < 0 or index >= len(compound):
+                    raise VMException("PICKITEM out of range")
+                push(compound[index])
+            else:
+                raise VMException("PICKITEM requires a compound type")
+        elif opcode == 0xCF:
+            item, compound = clone_struct(pop()), pop()
+            if not isinstance(compound, list):
+                raise VMException("APPEND requires an Array")
+            compound.append(item)
+        elif opcode == 0xD0:
+            value, key, compound = clone_struct(pop()), pop(), pop()
+            if isinstance(compound, Map):
+                compound[key] = value
+            elif isinstance(compound, (list, bytearray)):
+                index = to_int(key)
+                if index < 0 or index >= len(compound):
+                    raise VMException("SETITEM out of range")
+                compound[index] = value if isinstance(compound, list) else to_int(value)
+            else:
+                raise VMException("SETITEM requires a compound type")
+        elif opcode == 0xD1:
+            compound = pop()
+            compound.reverse()
+        elif opcode == 0xD2:
+            key, compound = pop(), pop()
+            if isinstance(compound, Map):
+                del compound[key]
+            else:
+                index = to_int(key)
+                if index < 0 or index >= len(compound):
+                    raise VMException("REMOVE out of range")
+                del compound[index]
+        elif opcode == 0xD3:
+            pop().clear()
+        elif opcode == 0xD4:
+            compound = pop()
+            if not compound:
+                raise VMException("POPITEM of an empty Array")
+            push(compound.pop())
+
+        # types
+        elif opcode == 0xD8:
+            push(pop() is None)
+        elif opcode == 0xD9:
+            target_type = instruction.operand[0]
+            if target_type == ANY:
+                raise VMException("Invalid type")
+            push(type_of(pop()) == target_type)
+        elif opcode == 0xDB:
+            push(convert(pop(), instruction.operand[0]))
+
+        # extensions
+        elif opcode == 0xE0:
+            raise VMFault(f"ABORTMSG is executed: {to_bytes(pop())!r}")
+        elif opcode == 0xE1:
+            message = pop()
+            if not to_bool(pop()):
+                raise VMFault(f"ASSERTMSG is executed with false result: {to_bytes(message)!r}")
+        else:
+            raise VMFault(f"Invalid opcode {opcode:#x}")
+
+        return False
+
+    @staticmethod
+    def _binary_operation(opcode: int, first: int, second: int) -> int:
+        if opcode == 0x9E:
+            return first + second
+        if opcode == 0x9F:
+            return first - second
+        if opcode == 0xA0:
+            return first * second
+        if opcode in (0xA1, 0xA2):
+            if second == 0:
+                raise VMException("Division by zero")
+            # C# semantics, the quotient is truncated toward zero & the remainder has the sign of the dividend
+            quotient = abs(first) // abs(second)
+            if (first < 0) != (second < 0):
+                quotient = -quotient
+            return quotient if opcode == 0xA1 else first - second * quotient
+        if opcode == 0xA3:
+            if second < 0:
+                raise VMException("Negative exponent")
+            return first ** second
+        if second < 0 or second > 256:
+            raise VMException("Invalid shift")
+        return first << second if opcode == 0xA8 else first >> second
+
+    # syscalls
+
+    def _syscall(self, context: ExecutionContext, operand: bytes):
+        syscall = SYSCALLS.get(bytes(operand))
+        if syscall is None:
+            raise VMFault(f"Syscall {bytes(operand).hex()} not supported")
+        name, price, handler = syscall
+        self.add_gas(price * EXEC_FEE_FACTOR, name)
+        handler(self, context)
+
+    def check_witness(self, context: ExecutionContext, script_hash: bytes) -> bool:
+        return script_hash == context.shared.calling_script_hash or script_hash in self.signers
+
+    def _storage_context(self, item: Any, write: bool) -> StorageContext:
+        if not isinstance(item, StorageContext):
+            raise VMException("Invalid storage context")
+        if write and item.read_only:
+            raise VMException("Storage context is read only")
+        return item
+
+    def _storage_put(self, context: ExecutionContext):
+        stack = context.evaluation_stack
+        storage_context = self._storage_context(stack.pop(), True)
+        key, value = to_bytes(stack.pop()), to_bytes(stack.pop())
+        if len(key) > 64 or len(value) > 65535:
+            raise VMException("Storage key or value too large")
+
+        storage = self.storage[storage_context.script_hash]
+        old_value = storage.get(key)
+        if old_value is None:
+            new_data_size = len(key) + len(value)
+        elif len(value) == 0:
+            new_data_size = 0
+        elif len(value) <= len(old_value):
+            new_data_size = (len(value) - 1) // 4 + 1
+        elif len(old_value) == 0:
+            new_data_size = len(value)
+        else:
+            new_data_size = (len(old_value) - 1) // 4 + 1 + len(value) - len(old_value)
+        self.add_gas(new_data_size * STORAGE_PRICE, "storage fee")
+        storage[key] = value
+
+    def _storage_find(self, context: ExecutionContext):
+        stack = context.evaluation_stack
+        storage_context = self._storage_context(stack.pop(), False)
+        prefix, options = to_bytes(stack.pop()), to_int(stack.pop())
+        entries = sorted((key, value) for key, value in self.storage[storage_context.script_hash].items()
+                         if key.startswith(prefix))
+        stack.append(StorageIterator(entries, len(prefix), options))
+
+    def _contract_call(self, context: ExecutionContext):
+        stack = context.evaluation_stack
+        script_hash, method = to_bytes(stack.pop()), to_bytes(stack.pop()).decode()
+        stack.pop()  # call flags
+        args = stack.pop()
+        if not isinstance(args, list):
+            raise VMException("Contract.Call arguments must be an Array")
+        context.ip += 5
+        results = self.call_contract(script_hash, method, list(args), context.script_hash)
+        context.ip -= 5
+        if results is not None:
+            stack.append(results[0] if results else None)
+
+    def _notify(self, context: ExecutionContext):
+        stack = context.evaluation_stack
+        event_name, state = to_bytes(stack.pop()).decode(), stack.pop()
+        if not isinstance(state, list):
+            raise VMException("Notification state must be an Array")
+        self.notifications.append(Notification(context.script_hash, event_name, to_python(state)))
+
+    # natives
+
+    def _get_contract(self, script_hash: Any) -> Any:
+        contract = self.contracts.get(to_bytes(script_hash))
+        if contract is None:
+            return None
+        return Struct([contract.id, 0, contract.hash, contract.script, Struct()])
+
+    def _update_contract(self, nef_file: Any, manifest: Any, data: Any = None):
+        """
+        Replaces the script & manifest of the calling contracts, keeping its script hash & storage, then calls its new
+        `_deploy` method.
+        """
+        contract = self.contracts.get(self._native_caller)
+        if contract is None:
+            raise VMException("Updated contract not found")
+        nef_file, manifest = to_bytes(nef_file), to_bytes(manifest)
+        self.add_gas((len(nef_file) + len(manifest)) * STORAGE_PRICE, "native ContractManagement.update storage")
+
+        new_manifest = json.loads(manifest)
+        if new_manifest["name"] != contract.name:
+            raise VMException("The name of the contract can't be changed")
+        nef = parse_nef(nef_file)
+        updated = Contract(contract.id, contract.hash, nef.script, nef.tokens, new_manifest, contract.name)
+        self.contracts[contract.hash] = updated
+
+        deploy = updated.method("_deploy", 2)
+        if deploy is not None:
+            depth = len(self.invocation_stack)
+            self._load_contract(updated, deploy, [data, True], CONTRACT_MANAGEMENT_HASH, rvcount=0)
+            self._run_until(depth)
+
+    @staticmethod
+    def _itoa(value: int, base: int) -> bytes:
+        if base == 16:
+            return int_to_bytes(value)[::-1].hex().encode() if value else b"0"
+        return str(value).encode()
+
+    def _nep17_methods(self, token_hash: bytes, symbol: str, decimals: int) -> Dict[str, NativeMethod]:
+        balances = lambda: self.balances[token_hash]
+
+        def transfer(from_address: Any, to_address: Any, amount: Any, data: Any) -> bool:
+            from_address, to_address, amount = to_bytes(from_address), to_bytes(to_address), to_int(amount)
+            if len(from_address) != 20 or len(to_address) != 20 or amount < 0:
+                raise VMException("Invalid transfer arguments")
+
+            caller = self._native_caller
+            if from_address != caller and from_address not in self.signers:
+                return False
+            from_balance = balances().get(from_address, 0)
+            if from_balance < amount:
+                return False
+
+            if from_address != to_address and amount != 0:
+                balances()[from_address] = from_balance - amount
+                balances()[to_address] = balances().get(to_address, 0) + amount
+
+            self.notifications.append(Notification(token_hash, "Transfer", [from_address, to_address, amount]))
+            if to_address in self.contracts:
+                self._call_from_native(token_hash, to_address, "onNEP17Payment", [from_address, amount, data])
+            return True
+
+        return {
+            "symbol": NativeMethod(lambda: symbol.encode(), 0, 0, True),
+            "decimals": NativeMethod(lambda: decimals, 0, 0, True),
+            "totalSupply": NativeMethod(lambda: sum(balances().values()), 1 << 15, 0, True),
+            "balanceOf": NativeMethod(lambda account: balances().get(to_bytes(account), 0), 1 << 15, 0, True),
+            "transfer": NativeMethod(transfer, 1 << 17, 50, True),
+        }
+
+
+def _push(value_getter: Callable[["Chain", ExecutionContext], Any]) -> Callable:
+    def handler(chain: Chain, context: ExecutionContext):
+        context.evaluation_stack.append(value_getter(chain, context))
+    return handler
+
+
+def _iterator_next(chain: Chain, context: ExecutionContext):
+    iterator = context.evaluation_stack.pop()
+    if not isinstance(iterator, StorageIterator):
+        raise VMException("Invalid iterator")
+    context.evaluation_stack.append(iterator.next())
+
+
+def _iterator_value(chain: Chain, context: ExecutionContext):
+    iterator = context.evaluation_stack.pop()
+    if not isinstance(iterator, StorageIterator):
+        raise VMException("Invalid iterator")
+    context.evaluation_stack.append(iterator.value())
+
+
+def _storage_get(chain: Chain, context: ExecutionContext):
+    stack = context.evaluation_stack
+    storage_context = chain._storage_context(stack.pop(), False)
+    stack.append(chain.storage[storage_context.script_hash].get(to_bytes(stack.pop())))
+
+
+def _storage_delete(chain: Chain, context: ExecutionContext):
+    stack = context.evaluation_stack
+    storage_context = chain._storage_context(stack.pop(), True)
+    chain.storage[storage_context.script_hash].pop(to_bytes(stack.pop()), None)
+
+
+def _storage_as_read_only(chain: Chain, context: ExecutionContext):
+    storage_context = chain._storage_context(context.evaluation_stack.pop(), False)
+    context.evaluation_stack.append(StorageContext(storage_context.script_hash, True))
+
+
+def _check_witness(chain: Chain, context: ExecutionContext):
+    script_hash = to_bytes(context.evaluation_stack.pop())
+    context.evaluation_stack.append(chain.check_witness(context, script_hash))
+
+
+def _log(chain: Chain, context: ExecutionContext):
+    context.evaluation_stack.pop()
+
+
+# syscall name -> (fixed price, handler), keyed by interop hash
+SYSCALLS: Dict[bytes, Tuple[str, int, Callable[[Chain, ExecutionContext], None]]] = {
+    interop_hash(name): (name, price, handler) for name, price, handler in (
+        ("System.Contract.Call", 1 << 15, Chain._contract_call),
+        ("System.Contract.GetCallFlags", 1 << 10, _push(lambda chain, context: 0x0F)),
+        ("System.Iterator.Next", 1 << 15, _iterator_next),
+        ("System.Iterator.Value", 1 << 4, _iterator_value),
+        ("System.Runtime.Platform", 1 << 3, _push(lambda chain, context: b"NEO")),
+        ("System.Runtime.GetNetwork", 1 << 3, _push(lambda chain, context: 860833102)),
+        ("System.Runtime.GetTrigger", 1 << 3, _push(lambda chain, context: 0x40)),
+        ("System.Runtime.GetTime", 1 << 3, _push(lambda chain, context: chain.time)),
+        ("System.Runtime.GetExecutingScriptHash", 1 << 4, _push(lambda chain, context: context.script_hash)),
+        ("System.Runtime.GetCallingScriptHash", 1 << 4,
+         _push(lambda chain, context: context.shared.calling_script_hash)),
+        ("System.Runtime.GetEntryScriptHash", 1 << 4, _push(lambda chain, context: ENTRY_SCRIPT_HASH)),
+        ("System.Runtime.CheckWitness", 1 << 10, _check_witness),
+        ("System.Runtime.GetInvocationCounter", 1 << 4, _push(lambda chain, context: 1)),
+        ("System.Runtime.Log", 1 << 15, _log),
+        ("System.Runtime.Notify", 1 << 15, Chain._notify),
+        ("System.Runtime.GasLeft", 1 << 4, _push(lambda chain, context: -1)),
+        ("System.Storage.GetContext", 1 << 4, _push(lambda chain, context: StorageContext(context.script_hash, False))),
+        ("System.Storage.GetReadOnlyContext", 1 << 4,
+         _push(lambda chain, context: StorageContext(context.script_hash, True))),
+        ("System.Storage.AsReadOnly", 1 << 4, _storage_as_read_only),
+        ("System.Storage.Get", 1 << 15, _storage_get),
+        ("System.Storage.Find", 1 << 15, Chain._storage_find),
+        ("System.Storage.Put", 1 << 15, Chain._storage_put),
+        ("System.Storage.Delete", 1 << 15, _storage_delete),
+    )
+}
@@ -0,0 +1,236 @@
+"""
+Instruction level profiling of contracts invocations.
+
+The invocations are replayed on `utils.neovm.Chain`, counting the instructions, syscalls & GAS of every opcode, syscall
+& source line, the lines being mapped from the compiler debug information. Each profile is written as a json summary &
+as folded stacks (`<name>.folded`), ready for flamegraph.pl or speedscope, the frames being the contracts methods &
+the leaves their source lines.
+"""
+import bisect
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from utils.nef import Instruction, load_debug_info, read_nef_script
+from utils.neovm import GAS_HASH, NEO_HASH, Chain, ExecutionContext, InvocationResult, Tracer, hash160, int_to_bytes
+
+# advance of the chain time for each `Profiler.increase_block`, in milliseconds
+BLOCK_TIME = 15_000
+
+
+class SourceLine(NamedTuple):
+    document: str
+    line: int
+
+    def __str__(self) -> str:
+        return f"{os.path.basename(self.document)}:{self.line}"
+
+
+class SourceMap:
+    """
+    Maps the script addresses of a contracts to its methods & source lines, from its debug information
+    """
+
+    def __init__(self, debug_info: dict):
+        documents = debug_info.get("documents", [])
+        # (first address, last address, name, sequence points addresses, sequence points lines), by first address
+        self._methods: List[Tuple[int, int, str, List[int], List[SourceLine]]] = []
+
+        for method in debug_info["methods"]:
+            start, end = (int(address) for address in method["range"].split("-"))
+            points = []
+            for sequence_point in method.get("sequence-points", []):
+                # e.g. 12[0]34:4-34:29, the address, the document index & the source range
+                address, rest = sequence_point.split("[", 1)
+                document, source_range = rest.split("]", 1)
+                points.append((int(address), SourceLine(documents[int(document)], int(source_range.split(":")[0]))))
+            points.sort(key=lambda point: point[0])
+            self._methods.append((start, end, method["name"].split(",")[-1],
+                                  [address for address, _ in points], [line for _, line in points]))
+        self._methods.sort()
+        self._starts = [method[0] for method in self._methods]
+
+    def _method(self, address: int) -> Optional[tuple]:
+        index = bisect.bisect_right(self._starts, address) - 1
+        if index >= 0 and address <= self._methods[index][1]:
+            return self._methods[index]
+        return None
+
+    def method_at(self, address: int) -> Optional[str]:
+        method = self._method(address)
+        return method[2] if method is not None else None
+
+    def line_at(self, address: int) -> Optional[SourceLine]:
+        """
+        :return: the source line of the closest sequence point at or before `address`, in the same method
+        """
+        method = self._method(address)
+        if method is None or not method[3]:
+            return None
+        _, _, _, addresses, lines = method
+        # the method prologue comes before its first sequence point
+        return lines[max(bisect.bisect_right(addresses, address) - 1, 0)]
+
+
+class Profile(Tracer):
+    """
+    Counts & GAS of a single invocation, by opcode, syscall, source line & call stack
+    """
+
+    def __init__(self, name: str, source_maps: Dict[bytes, SourceMap]):
+        self.name = name
+        self.source_maps = source_maps
+        self.result: Optional[InvocationResult] = None
+
+        # name -> [count, GAS]
+        self.opcodes: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self.syscalls: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self.lines: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        # folded call stack -> GAS
+        self.stacks: Dict[str, int] = defaultdict(int)
+
+        self._instruction: Optional[Instruction] = None
+        self._line = "?"
+        self._stack = ""
+
+    @property
+    def gas_consumed(self) -> int:
+        return sum(gas for _, gas in self.opcodes.values()) + sum(gas for _, gas in self.syscalls.values())
+
+    def _frame(self, context: ExecutionContext) -> str:
+        source_map = self.source_maps.get(context.script_hash)
+        method = source_map.method_at(context.ip) if source_map is not None else None
+        return f"{context.contract.name}.{method or context.method}"
+
+    def step(self, chain: Chain, context: ExecutionContext, instruction: Instruction):
+        source_map = self.source_maps.get(context.script_hash)
+        line = source_map.line_at(instruction.address) if source_map is not None else None
+
+        self._instruction = instruction
+        self._line = f"{context.contract.name}:{instruction.address}" if line is None else str(line)
+        self._stack = ";".join([self._frame(frame) for frame in chain.invocation_stack] + [self._line])
+
+        self.opcodes[instruction.name][0] += 1
+        self.lines[self._line][0] += 1
+
+    def fee(self, label: str, amount: int):
+        if self._instruction is not None and label == self._instruction.name:
+            self.opcodes[label][1] += amount
+        else:
+            self.syscalls[label][0] += 1
+            self.syscalls[label][1] += amount
+        self.lines[self._line][1] += amount
+        self.stacks[self._stack] += amount
+
+    def method_gas(self, contract_name: str, method: str) -> int:
+        """
+        :return: the GAS spent in a contracts method, its callees included
+        """
+        frame = f"{contract_name}.{method}"
+        return sum(gas for stack, gas in self.stacks.items() if frame in stack.split(";")[:-1])
+
+    def summary(self) -> dict:
+        """
+        :return: the profile as json, every table sorted by GAS
+        """
+        def table(rows: Dict[str, List[int]]) -> List[dict]:
+            return [{"name": name, "count": count, "gas": gas}
+                    for name, (count, gas) in sorted(rows.items(), key=lambda row: (-row[1][1], row[0]))]
+
+        return {
+            "name": self.name,
+            "state": self.result.state if self.result is not None else None,
+            "gas": self.gas_consumed,
+            "instructions": sum(count for count, _ in self.opcodes.values()),
+            "opcodes": table(self.opcodes),
+            "syscalls": table(self.syscalls),
+            "lines": table(self.lines),
+        }
+
+    def folded(self) -> str:
+        """
+        :return: the folded stacks, one `frame;frame;line gas` per line
+        """
+        return "".join(f"{stack} {gas}\n" for stack, gas in sorted(self.stacks.items()) if gas > 0)
+
+    def report(self, top: int = 10) -> str:
+        """
+        :return: a human readable summary of the most expensive opcodes, syscalls & lines
+        """
+        summary = self.summary()
+        lines = [f"{self.name}: {summary['gas']} GAS, {summary['instructions']} instructions"]
+        for table in ("lines", "opcodes", "syscalls"):
+            lines.append(f"  {table}:")
+            for row in summary[table][:top]:
+                lines.append(f"    {row['name']:<48} {row['count']:>8} {row['gas']:>12}")
+        return "\n".join(lines)
+
+    def save(self, directory: str):
+        """
+        Writes `<name>.json` & `<name>.folded` to `directory`.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.name}.json"), "w") as summary_file:
+            json.dump(self.summary(), summary_file, indent=4)
+            summary_file.write("\n")
+        with open(os.path.join(directory, f"{self.name}.folded"), "w") as folded_file:
+            folded_file.write(self.folded())
+
+
+class Profiler:
+    """
+    Mirrors the TestEngine state on a `Chain` & profiles the invocations replayed on it
+    """
+
+    def __init__(self):
+        self.chain = Chain()
+        self.source_maps: Dict[bytes, SourceMap] = {}
+
+    def add_contract(self, nef_path: str) -> bytes:
+        """
+        Deploys a compiled contracts, loading its debug information when it was compiled with it.
+        :return: the contracts script hash
+        """
+        script_hash = hash160(read_nef_script(nef_path))
+        if script_hash not in self.chain.contracts:
+            self.chain.deploy(nef_path)
+            if os.path.isfile(nef_path.replace(".nef", ".nefdbgnfo")):
+                self.source_maps[script_hash] = SourceMap(load_debug_info(nef_path.replace(".nef", ".py")))
+        return script_hash
+
+    def add_gas(self, account: bytes, amount: int):
+        self.chain.add_balance(GAS_HASH, account, amount)
+
+    def add_neo(self, account: bytes, amount: int):
+        self.chain.add_balance(NEO_HASH, account, amount)
+
+    def storage_put(self, nef_path: str, key: bytes, value: int):
+        """
+        Writes a storage record of a deployed contracts, without running it.
+        """
+        self.chain.storage[hash160(read_nef_script(nef_path))][key] = int_to_bytes(value)
+
+    def increase_block(self, count: int = 1):
+        self.chain.time += count * BLOCK_TIME
+
+    def profile(self, name: str, contract_path: Union[str, bytes], method: str, args: List[Any] = (),
+                signers: List[bytes] = ()) -> Profile:
+        """
+        Invokes a contracts method & profiles it.
+        :param name: the profile name, e.g. its file name
+        :param contract_path: path to the contracts source, compiled next to it, or the script hash of a native
+        contracts, e.g. NEO
+        :return: the profile, `Profile.result` holding the invocation outcome
+        """
+        if isinstance(contract_path, bytes):
+            script_hash = contract_path
+        else:
+            script_hash = self.add_contract(contract_path.replace(".py", ".nef"))
+        profile = Profile(name, self.source_maps)
+        self.chain.tracer = profile
+        try:
+            profile.result = self.chain.invoke(script_hash, method, list(args), list(signers))
+        finally:
+            self.chain.tracer = None
+        return profile
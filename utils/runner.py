@@ -0,0 +1,116 @@
+"""
+Runs the tests suite of every contracts under the contracts directory, in parallel.
+
+Contracts are compiled across all cores first, then each contracts suite runs in its own pytest process (and so with
+its own engine), selecting the tests marked `contracts(<its name>)`. The unmarked tests, e.g. the offchain ones, run
+once in a separate `shared` suite, and the junit reports are merged into `build/junit.xml`.
+
+usage: python -m utils.runner [--workers N] [pytest arguments...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, NamedTuple
+
+from utils.compile import compile_contract, link_stand_ins
+from utils.consts import BUILD_DIR_PATH, CONTRACTS_DIR_PATH, ROOT_DIR, TEST_CONTRACTS_DIR_PATH
+
+# name of the suite running the tests that aren't marked for a contracts
+SHARED_SUITE_NAME = 'shared'
+
+
+class SuiteResult(NamedTuple):
+    contract_name: str
+    return_code: int
+    junit_path: str
+    output: str
+
+
+def discover_contracts() -> List[str]:
+    """
+    :return: the names of the contracts under the contracts directory, e.g. ['neo_sandwich']
+    """
+    return sorted(name[:-len('.py')] for name in os.listdir(CONTRACTS_DIR_PATH) if name.endswith('.py'))
+
+
+def _compile_for_tests(contract_name: str):
+    compile_contract(link_stand_ins(os.path.join(CONTRACTS_DIR_PATH, f'{contract_name}.py')), debug=True)
+
+
+def compile_all(contract_names: List[str], workers: int):
+    """
+    Compiles the stand-ins and every contracts linked against them, filling the compile cache for the suites.
+    """
+    stand_ins = [os.path.join(TEST_CONTRACTS_DIR_PATH, name) for name in os.listdir(TEST_CONTRACTS_DIR_PATH)
+                 if name.endswith('.py')]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # the contracts are linked against the stand-ins hashes, so they must be compiled first
+        list(executor.map(compile_contract, stand_ins))
+        list(executor.map(_compile_for_tests, contract_names))
+
+
+def run_suite(contract_name: str, pytest_args: List[str]) -> SuiteResult:
+    """
+    Runs the tests suite of a single contracts in a new pytest process, only the tests marked for that contracts.
+    `SHARED_SUITE_NAME` runs the unmarked tests instead.
+    """
+    if contract_name == SHARED_SUITE_NAME:
+        selection = ['-m', 'not contracts']
+    else:
+        selection = ['--cn', contract_name, '-m', 'contracts']
+
+    junit_path = os.path.join(BUILD_DIR_PATH, f'{contract_name}.junit.xml')
+    process = subprocess.run(
+        [sys.executable, '-m', 'pytest', *selection, f'--junitxml={junit_path}', *pytest_args],
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    return SuiteResult(contract_name, process.returncode, junit_path, process.stdout)
+
+
+def merge_junit_reports(results: List[SuiteResult], output_path: str):
+    """
+    Merges the junit reports of the suites into one, naming each test suite after its contracts.
+    """
+    merged = ElementTree.Element('testsuites')
+    for result in results:
+        if not os.path.isfile(result.junit_path):
+            continue
+
+        root = ElementTree.parse(result.junit_path).getroot()
+        suites = [root] if root.tag == 'testsuite' else root.findall('testsuite')
+        for suite in suites:
+            suite.set('name', result.contract_name)
+            merged.append(suite)
+
+    ElementTree.ElementTree(merged).write(output_path, encoding='utf-8', xml_declaration=True)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Runs the tests suite of every contracts in parallel')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of parallel workers')
+    args, pytest_args = parser.parse_known_args(argv)
+
+    contract_names = discover_contracts()
+    os.makedirs(BUILD_DIR_PATH, exist_ok=True)
+    compile_all(contract_names, args.workers)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(lambda name: run_suite(name, pytest_args), contract_names + [SHARED_SUITE_NAME]))
+
+    merge_junit_reports(results, os.path.join(BUILD_DIR_PATH, 'junit.xml'))
+
+    for result in results:
+        print(f'========== {result.contract_name} ==========')
+        print(result.output)
+    for result in results:
+        print(f"{result.contract_name}: {'passed' if result.return_code == 0 else 'FAILED'}")
+
+    return max((result.return_code for result in results), default=0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+Monte Carlo simulator of the sNEO share ratio, to size the pool & choose the harvest cadence.
+
+Every path starts from the same pool and goes through a year of random deposits, withdrawals, GAS accrual & GAS price,
+one day at a time. The deposits & withdrawals are applied one by one with the contracts integer math (the
+`onNEP17Payment` mint & the `burn` payout, see `utils.model.SandwichModel`), vectorized over the paths with NumPy.
+Every harvest interval is simulated on the same random flows, so their outcomes are directly comparable.
+
+usage: python -m utils.simulator [--paths N] [--days N] [--intervals 1,2,7] [--seed N] [--json PATH]
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from offchain.consts import MIN_HARVEST_GAS, RATIO_PRECISION
+
+DECIMALS_MULTIPLIER = 100_000_000
+
+# the inputs of `mul_div` must stay below it for its float estimate to be corrected exactly, i.e. 720M bNEO
+MAX_MUL_DIV_INPUT = 1 << 56
+
+# account of every simulated holder when tracing a path, holding the whole supply, see `simulate`
+TRACE_ACCOUNT = bytes([1]) * 20
+
+# the daily ratio distribution percentiles
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def mul_div(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact `a * b // c` of non-negative int64 arrays, as the contracts integer math, even when `a * b` overflows int64.
+
+    The quotient is estimated with floats, then corrected with the remainder, which is exact modulo 2 ** 64.
+    :return: the quotient & the remainder, `a * b - quotient * c`
+    """
+    a, b, c = (np.asarray(value, dtype=np.int64) for value in (a, b, c))
+    assert np.all(((a | b | c) < MAX_MUL_DIV_INPUT) & (c > 0))
+
+    estimate = np.floor(a.astype(np.float64) * b / c)
+    assert np.all(estimate < 2.0 ** 63)
+    quotient = estimate.astype(np.int64)
+
+    # the unsigned products wrap around silently
+    remainder = (a.astype(np.uint64) * b.astype(np.uint64) - quotient.astype(np.uint64) * c.astype(np.uint64))
+    correction, remainder = np.divmod(remainder.astype(np.int64), c)
+    return quotient + correction, remainder
+
+
+def share_ratio(total_supply: np.ndarray, burger_supply: np.ndarray) -> np.ndarray:
+    """
+    :return: the bNEO per sNEO multiplied by RATIO_PRECISION, as the contracts `share_ratio`
+    """
+    ratio = mul_div(burger_supply, np.int64(RATIO_PRECISION), np.maximum(total_supply, 1))[0]
+    return np.where(total_supply > 0, ratio, RATIO_PRECISION)
+
+
+@dataclass
+class SimulationConfig:
+    paths: int = 1000
+    days: int = 365
+    seed: int = 0
+    # bNEO deposited before the simulation starts
+    initial_deposit: int = 10_000 * DECIMALS_MULTIPLIER
+    # Poisson rates of the deposits & withdrawals
+    deposits_per_day: float = 10
+    withdrawals_per_day: float = 5
+    # median sizes of the deposits & withdrawals in bNEO, log-normally distributed
+    deposit_size: int = 100 * DECIMALS_MULTIPLIER
+    withdrawal_size: int = 100 * DECIMALS_MULTIPLIER
+    size_sigma: float = 1.0
+    # GAS generated per NEO held, per year
+    gas_per_neo_year: float = 0.03
+    # bNEO the swap pays per GAS, & the daily volatility of that price
+    gas_price: float = 0.35
+    gas_price_volatility: float = 0.03
+    # GAS paid by the keeper for every harvest
+    harvest_fee: int = 10_000_000
+    # the harvest intervals to compare, in days
+    harvest_intervals: Tuple[int, ...] = (1, 2, 3, 7, 14, 30)
+
+
+class SimulationResult(NamedTuple):
+    config: SimulationConfig
+    # by harvest interval & path
+    total_supplies: np.ndarray
+    burger_supplies: np.ndarray
+    final_ratios: np.ndarray
+    harvests: np.ndarray
+    harvested_burgers: np.ndarray
+    fee_burgers: np.ndarray
+    # bNEO the depositors & withdrawers didn't get because of the rounding down, in datoshi
+    mint_rounding_loss: np.ndarray
+    burn_rounding_loss: np.ndarray
+    # bNEO deposited & withdrawn, in datoshi
+    deposited: np.ndarray
+    withdrawn: np.ndarray
+    # by harvest interval, day & percentile
+    daily_ratio_percentiles: np.ndarray
+    # the operations of the first path of the first interval, when traced
+    trace: Optional[List[tuple]]
+
+
+def simulate(config: SimulationConfig, trace: bool = False) -> SimulationResult:
+    """
+    Runs the simulation.
+    :param trace: whether to record the operations of the first path of the first interval, to be replayed on
+    `utils.model.SandwichModel`
+    """
+    rng = np.random.default_rng(config.seed)
+    intervals = np.array(config.harvest_intervals, dtype=np.int64)
+    shape = (len(intervals), config.paths)
+
+    def per_path(values: np.ndarray) -> np.ndarray:
+        # the same random flows for every interval
+        return np.broadcast_to(values, shape)
+
+    total_supply = np.full(shape, config.initial_deposit, dtype=np.int64)
+    burger_supply = total_supply.copy()
+    pending_gas = np.zeros(shape, dtype=np.int64)
+    harvests = np.zeros(shape, dtype=np.int64)
+    harvested_burgers = np.zeros(shape, dtype=np.int64)
+    fee_burgers = np.zeros(shape, dtype=np.int64)
+    mint_rounding_loss = np.zeros(shape)
+    burn_rounding_loss = np.zeros(shape)
+    deposited = np.zeros(shape, dtype=np.int64)
+    withdrawn = np.zeros(shape, dtype=np.int64)
+    daily_ratio_percentiles = np.zeros((len(intervals), config.days + 1, len(PERCENTILES)))
+
+    operations: Optional[List[tuple]] = [("deposit", TRACE_ACCOUNT, config.initial_deposit)] if trace else None
+
+    def record(mask: np.ndarray, method: str, *args):
+        if operations is not None and mask[0, 0]:
+            operations.append((method, *(int(arg[0, 0]) if isinstance(arg, np.ndarray) else arg for arg in args)))
+
+    def record_ratios(day: int):
+        ratios = share_ratio(total_supply, burger_supply)
+        daily_ratio_percentiles[:, day] = np.percentile(ratios, PERCENTILES, axis=1).T
+
+    # GAS generated per bNEO datoshi per day, as an exact fraction
+    gas_rate_denominator = 10 ** 15
+    gas_rate = round(config.gas_per_neo_year / 365 * gas_rate_denominator)
+    gas_price = np.full(config.paths, config.gas_price)
+    harvest_fee = np.int64(config.harvest_fee)
+
+    record_ratios(0)
+    for day in range(config.days):
+        gas_price *= np.exp(rng.normal(-config.gas_price_volatility ** 2 / 2, config.gas_price_volatility,
+                                       config.paths))
+        deposits = per_path(rng.poisson(config.deposits_per_day, config.paths))
+        withdrawals = per_path(rng.poisson(config.withdrawals_per_day, config.paths))
+
+        for slot in range(int(max(deposits.max(), withdrawals.max()))):
+            sizes = rng.lognormal(np.log(config.deposit_size), config.size_sigma, config.paths)
+            amount = np.where(slot < deposits, per_path(np.maximum(sizes.astype(np.int64), 1)), 0)
+            # onNEP17Payment: amount * total_supply // burger_supply, 1 sNEO per bNEO in an empty pool
+            minted, remainder = mul_div(amount, total_supply, np.maximum(burger_supply, 1))
+            minted = np.where(total_supply > 0, minted, amount)
+            # the contracts FAULTs rather than minting nothing
+            amount = np.where(minted > 0, amount, 0)
+
+            mint_rounding_loss += np.where(amount > 0, remainder, 0) / np.maximum(total_supply, 1)
+            record(amount > 0, "deposit", TRACE_ACCOUNT, amount)
+            total_supply += np.where(amount > 0, minted, 0)
+            burger_supply += amount
+            deposited += amount
+
+            sizes = rng.lognormal(np.log(config.withdrawal_size), config.size_sigma, config.paths)
+            # the sNEO worth the withdrawn bNEO, at most the whole supply
+            amount = np.minimum(np.maximum((per_path(sizes) * total_supply / np.maximum(burger_supply, 1))
+                                           .astype(np.int64), 1), total_supply)
+            amount = np.where(slot < withdrawals, amount, 0)
+            # burn: amount * burger_supply // total_supply
+            payout, remainder = mul_div(amount, burger_supply, np.maximum(total_supply, 1))
+
+            burn_rounding_loss += remainder / np.maximum(total_supply, 1)
+            record(amount > 0, "burn", TRACE_ACCOUNT, amount)
+            total_supply -= amount
+            burger_supply -= payout
+            withdrawn += payout
+
+        pending_gas += mul_div(burger_supply, np.int64(gas_rate), np.int64(gas_rate_denominator))[0]
+
+        harvest_mask = ((day + 1) % intervals[:, None] == 0) & (pending_gas >= MIN_HARVEST_GAS)
+        if harvest_mask.any():
+            price = per_path(np.round(gas_price * DECIMALS_MULTIPLIER).astype(np.int64))
+            bought = mul_div(pending_gas, price, np.int64(DECIMALS_MULTIPLIER))[0]
+            fee = mul_div(harvest_fee, price, np.int64(DECIMALS_MULTIPLIER))[0]
+
+            record(harvest_mask, "inject_yield", bought)
+            burger_supply += np.where(harvest_mask, bought, 0)
+            harvested_burgers += np.where(harvest_mask, bought, 0)
+            fee_burgers += np.where(harvest_mask, fee, 0)
+            harvests += harvest_mask
+            pending_gas = np.where(harvest_mask, 0, pending_gas)
+
+        record_ratios(day + 1)
+
+    return SimulationResult(
+        config=config,
+        total_supplies=total_supply,
+        burger_supplies=burger_supply,
+        final_ratios=share_ratio(total_supply, burger_supply),
+        harvests=harvests,
+        harvested_burgers=harvested_burgers,
+        fee_burgers=fee_burgers,
+        mint_rounding_loss=mint_rounding_loss,
+        burn_rounding_loss=burn_rounding_loss,
+        deposited=deposited,
+        withdrawn=withdrawn,
+        daily_ratio_percentiles=daily_ratio_percentiles,
+        trace=operations,
+    )
+
+
+def report(result: SimulationResult) -> dict:
+    """
+    Summarizes a simulation, for each harvest interval.
+
+    The break-even interval is the shortest one whose harvests buy more bNEO than their fee on average, harvesting more
+    often costs more than it compounds. The best interval is the one with the most bNEO harvested net of the fees.
+    :return: the report as json
+    """
+    config = result.config
+    initial_ratio = RATIO_PRECISION
+    rows = []
+    for index, interval in enumerate(config.harvest_intervals):
+        harvests = result.harvests[index]
+        harvested = result.harvested_burgers[index]
+        fees = result.fee_burgers[index]
+        per_harvest = np.divide(harvested - fees, harvests, out=np.zeros(config.paths), where=harvests > 0)
+        final_ratios = result.final_ratios[index]
+        rows.append({
+            "interval_days": interval,
+            "harvests": float(harvests.mean()),
+            "harvested_burgers": float(harvested.mean()),
+            "fee_burgers": float(fees.mean()),
+            "net_burgers": float((harvested - fees).mean()),
+            "net_burgers_per_harvest": float(per_harvest.mean()),
+            "ratio_growth": float(final_ratios.mean() / initial_ratio - 1),
+            "final_ratio_percentiles": {
+                str(percentile): int(value)
+                for percentile, value in zip(PERCENTILES, np.percentile(final_ratios, PERCENTILES))
+            },
+            "mint_rounding_loss": float(result.mint_rounding_loss[index].mean()),
+            "burn_rounding_loss": float(result.burn_rounding_loss[index].mean()),
+        })
+
+    profitable = [row["interval_days"] for row in rows if row["net_burgers_per_harvest"] > 0]
+    return {
+        "config": {key: list(value) if isinstance(value, tuple) else value for key, value in asdict(config).items()},
+        "deposited": float(result.deposited[0].mean()),
+        "withdrawn": float(result.withdrawn[0].mean()),
+        "intervals": rows,
+        "break_even_interval_days": min(profitable) if profitable else None,
+        "best_interval_days": max(rows, key=lambda row: row["net_burgers"])["interval_days"],
+    }
+
+
+def format_report(summary: dict) -> str:
+    """
+    :return: a table of the `report` intervals, the bNEO amounts in bNEO & the rounding loss in datoshi
+    """
+    lines = [f"{'interval':>8} {'harvests':>9} {'net bNEO':>14} {'per harvest':>12} {'ratio growth':>13} "
+             f"{'p5 ratio':>10} {'p95 ratio':>10} {'rounding loss':>14}"]
+    for row in summary["intervals"]:
+        percentiles = row["final_ratio_percentiles"]
+        rounding_loss = row["mint_rounding_loss"] + row["burn_rounding_loss"]
+        lines.append(f"{row['interval_days']:>7}d {row['harvests']:>9.1f} "
+                     f"{row['net_burgers'] / DECIMALS_MULTIPLIER:>14.4f} "
+                     f"{row['net_burgers_per_harvest'] / DECIMALS_MULTIPLIER:>12.4f} {row['ratio_growth']:>13.4%} "
+                     f"{percentiles['5']:>10} {percentiles['95']:>10} {rounding_loss:>14.1f}")
+    lines.append(f"break-even interval: {summary['break_even_interval_days']} days, "
+                 f"best interval: {summary['best_interval_days']} days")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Projects the sNEO share ratio over random deposits & harvests")
+    parser.add_argument("--paths", type=int, default=SimulationConfig.paths)
+    parser.add_argument("--days", type=int, default=SimulationConfig.days)
+    parser.add_argument("--seed", type=int, default=SimulationConfig.seed)
+    parser.add_argument("--intervals", default=",".join(map(str, SimulationConfig.harvest_intervals)),
+                        help="harvest intervals to compare, in days, e.g. 1,7,30")
+    parser.add_argument("--initial-deposit", type=float, default=SimulationConfig.initial_deposit / DECIMALS_MULTIPLIER,
+                        help="bNEO in the pool at the start")
+    parser.add_argument("--deposits-per-day", type=float, default=SimulationConfig.deposits_per_day)
+    parser.add_argument("--withdrawals-per-day", type=float, default=SimulationConfig.withdrawals_per_day)
+    parser.add_argument("--gas-per-neo-year", type=float, default=SimulationConfig.gas_per_neo_year)
+    parser.add_argument("--gas-price", type=float, default=SimulationConfig.gas_price, help="bNEO per GAS")
+    parser.add_argument("--harvest-fee", type=float, default=SimulationConfig.harvest_fee / DECIMALS_MULTIPLIER,
+                        help="GAS paid for every harvest")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    config = SimulationConfig(
+        paths=args.paths,
+        days=args.days,
+        seed=args.seed,
+        initial_deposit=round(args.initial_deposit * DECIMALS_MULTIPLIER),
+        deposits_per_day=args.deposits_per_day,
+        withdrawals_per_day=args.withdrawals_per_day,
+        gas_per_neo_year=args.gas_per_neo_year,
+        gas_price=args.gas_price,
+        harvest_fee=round(args.harvest_fee * DECIMALS_MULTIPLIER),
+        harvest_intervals=tuple(int(interval) for interval in args.intervals.split(",")),
+    )
+    summary = report(simulate(config))
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(summary, report_file, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())